@@ -1,8 +1,14 @@
 from django.contrib import admin
 
-from apps.countries.models import Country
+from apps.countries.models import Country, CountryReference
 
 
 @admin.register(Country)
 class CountryAdmin(admin.ModelAdmin):
     ...
+
+
+@admin.register(CountryReference)
+class CountryReferenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'alpha2_code', 'alpha3_code', 'capital', 'region', 'updated_at')
+    search_fields = ('name', 'alpha2_code', 'alpha3_code')
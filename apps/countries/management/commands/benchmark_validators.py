@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.countries.models import CountryReference
+from apps.countries.services.country import CountryReferenceService
+from services.country_layer.country_layer import CountryLayerService
+from services.country_layer.serializers import CountryLayerListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает проверку ответа CountryLayer со списком стран: сериализатор DRF "
+        "и CompiledValidator. Страны берутся из справочника CountryReference, "
+        "а если он пуст - генерируются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=250, help="Сколько стран в ответе.")
+        parser.add_argument('--iterations', type=int, default=50, help="Количество повторов.")
+
+    def handle(self, *args, count, iterations, **options):
+        countries = [
+            CountryReferenceService.to_country_data(reference)[0]
+            for reference in CountryReference.objects.order_by('name')[:count]
+        ] or [
+            {
+                'name': f'Country {i}', 'topLevelDomain': [f'.c{i % 100}'], 'alpha2Code': f'{i % 100:02d}',
+                'alpha3Code': f'{i % 1000:03d}', 'callingCodes': [str(i)], 'capital': f'Capital {i}',
+                'altSpellings': [f'C{i}', f'Country number {i}'], 'region': 'Region',
+            }
+            for i in range(count)
+        ]
+        data = {'countries': countries}
+
+        def drf():
+            serializer = CountryLayerListSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            return serializer.validated_data
+
+        def compiled():
+            return CountryLayerService.country_validator.validate(data)
+
+        if drf() != compiled():
+            self.stderr.write(self.style.WARNING("Результаты проверки различаются."))
+
+        for label, validate in (('DRF', drf), ('compiled', compiled)):
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                validate()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{label:>8}: median {statistics.median(timings):.2f} ms, "
+                f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms ({len(countries)} countries)"
+            )
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.countries.services.country import CountryReferenceService
+from services.country_layer.country_layer import CountryLayerService
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает весь справочник стран CountryLayer одним запросом (или из JSON-файла "
+        "с ответом /all, --file) в локальную таблицу CountryReference. Запускается "
+        "периодически (например, раз в сутки), чтобы подхватить изменения справочника."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help="JSON-файл со списком стран в формате ответа CountryLayer.")
+
+    def handle(self, *args, file=None, **options):
+        if file:
+            try:
+                with open(file, encoding='utf-8') as snapshot:
+                    data = json.load(snapshot)
+                countries = CountryLayerService.parse_country_data(data)
+            except (OSError, ValueError, ValidationError) as exc:
+                raise CommandError(f"Не удалось прочитать {file}: {exc}")
+        else:
+            countries = CountryLayerService.fetch_all_countries()
+
+        result = CountryReferenceService.sync(countries)
+        self.stdout.write(self.style.SUCCESS(
+            f"Справочник стран обновлен: сохранено {result['synced']}, удалено {result['deleted']}"
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 00:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_country_post_count(apps, schema_editor):
+    Country = apps.get_model('countries', 'Country')
+    Post = apps.get_model('posts', 'Post')
+    Country.objects.update(
+        post_count=Coalesce(
+            models.Subquery(
+                Post.objects.filter(country_id=models.OuterRef('pk'))
+                .values('country_id').annotate(total=models.Count('pk')).values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0001_initial'),
+        ('posts', '0009_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(fill_country_post_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0002_post_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CountryReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('name_key', models.CharField(max_length=255, unique=True, verbose_name='Название для поиска')),
+                ('alpha2_code', models.CharField(max_length=2, verbose_name='Код ISO alpha-2')),
+                ('alpha3_code', models.CharField(max_length=3, verbose_name='Код ISO alpha-3')),
+                ('capital', models.CharField(blank=True, max_length=255, verbose_name='Столица')),
+                ('region', models.CharField(max_length=255, verbose_name='Регион')),
+                ('calling_codes', models.JSONField(default=list, verbose_name='Телефонные коды')),
+                ('top_level_domains', models.JSONField(default=list, verbose_name='Домены верхнего уровня')),
+                ('alt_spellings', models.JSONField(default=list, verbose_name='Другие написания')),
+            ],
+            options={
+                'verbose_name': 'Country reference',
+                'verbose_name_plural': 'Country references',
+            },
+        ),
+    ]
@@ -8,6 +8,7 @@ class Country(TimeStampModel):
     Модель Country представляет собой список стран.
     """
     name = models.CharField(max_length=100, unique=True, verbose_name='Имя')
+    post_count = models.PositiveIntegerField(default=0, verbose_name='Количество постов')
 
     class Meta:
         verbose_name = "Country"
@@ -15,3 +16,31 @@ class Country(TimeStampModel):
 
     def __str__(self):
         return self.name
+
+
+class CountryReference(TimeStampModel):
+    """
+    Локальная копия справочника стран CountryLayer (поля CountryLayerSerializer).
+    Заполняется командой sync_countries; страна сопоставляется с Country по
+    названию без учета регистра.
+    """
+    name = models.CharField(max_length=255, verbose_name='Название')
+    name_key = models.CharField(max_length=255, unique=True, verbose_name='Название для поиска')
+    alpha2_code = models.CharField(max_length=2, verbose_name='Код ISO alpha-2')
+    alpha3_code = models.CharField(max_length=3, verbose_name='Код ISO alpha-3')
+    capital = models.CharField(max_length=255, blank=True, verbose_name='Столица')
+    region = models.CharField(max_length=255, verbose_name='Регион')
+    calling_codes = models.JSONField(default=list, verbose_name='Телефонные коды')
+    top_level_domains = models.JSONField(default=list, verbose_name='Домены верхнего уровня')
+    alt_spellings = models.JSONField(default=list, verbose_name='Другие написания')
+
+    class Meta:
+        verbose_name = "Country reference"
+        verbose_name_plural = "Country references"
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def get_name_key(name: str) -> str:
+        return name.strip().casefold()
@@ -1,29 +1,29 @@
-
 from rest_framework import serializers
+from services.base.serializers import ValuesSerializer
 from .models import Country
-from ..posts.models import Post
-from ..posts.serializers import PostSerializer
 
 
 class CountrySerializer(serializers.ModelSerializer):
-    post_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Country
         fields = ['id', 'name', 'post_count']
+        read_only_fields = ['post_count']
+
 
-    def get_post_count(self, obj):
-        return obj.post_set.count()
+class CountryValuesSerializer(ValuesSerializer):
+    """
+    Быстрое представление стран для списков, совпадает с CountrySerializer.
+    """
+    fields = ('id', 'name', 'post_count')
 
 
 class CountryDetailSerializer(serializers.ModelSerializer):
-    posts = serializers.SerializerMethodField()
+    """
+    Страна для детальной страницы. Посты страны добавляются представлением
+    отдельной страницей курсорной пагинации (см. CountryViewSet.retrieve).
+    """
 
     class Meta:
         model = Country
-        fields = ['id', 'name', 'posts']
-
-    def get_posts(self, obj):
-        posts = Post.objects.filter(country=obj).order_by('-created_at')
-        return PostSerializer(posts, many=True).data
-
+        fields = ['id', 'name']
@@ -1,7 +1,11 @@
-from django.db.models import Count
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import transaction
+
 from services.base.service import BaseService
 from services.country_layer.country_layer import CountryLayerService
-from ..models import Country
+from services.request_service.exceptions import HubServerError
+from ..models import Country, CountryReference
 
 
 class ListCountryService(BaseService):
@@ -14,7 +18,78 @@ class ListCountryService(BaseService):
         """
         Возвращает список стран, у которых есть хотя бы один пост.
         """
-        return self.model.objects.annotate(post_count=Count('post')).filter(post_count__gt=0)
+        return self.model.objects.filter(post_count__gt=0)
+
+
+class CountryReferenceService(BaseService):
+    """
+    Локальный справочник стран CountryLayer: страница страны берет данные из него
+    без запроса к внешнему сервису. Справочник целиком обновляет команда sync_countries.
+    """
+    model = CountryReference
+
+    @classmethod
+    def get_country_data(cls, name: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Данные страны в формате ответа CountryLayer или None, если ее нет в справочнике.
+        """
+        reference = cls.model.objects.filter(name_key=cls.model.get_name_key(name)).first()
+        return cls.to_country_data(reference)
+
+    @classmethod
+    async def aget_country_data(cls, name: str) -> Optional[List[Dict[str, Any]]]:
+        reference = await cls.model.objects.filter(name_key=cls.model.get_name_key(name)).afirst()
+        return cls.to_country_data(reference)
+
+    @staticmethod
+    def to_country_data(reference: Optional[CountryReference]) -> Optional[List[Dict[str, Any]]]:
+        if reference is None:
+            return None
+        return [{
+            'name': reference.name,
+            'topLevelDomain': reference.top_level_domains,
+            'alpha2Code': reference.alpha2_code,
+            'alpha3Code': reference.alpha3_code,
+            'callingCodes': reference.calling_codes,
+            'capital': reference.capital,
+            'altSpellings': reference.alt_spellings,
+            'region': reference.region,
+        }]
+
+    @classmethod
+    @transaction.atomic
+    def sync(cls, countries: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Заменяет справочник списком стран, уже проверенным CountryLayerListSerializer:
+        существующие строки обновляются, отсутствующие в списке удаляются.
+        Возвращает количество сохраненных и удаленных стран.
+        """
+        references = {}
+        for country in countries:
+            name_key = cls.model.get_name_key(country['name'])
+            references[name_key] = cls.model(
+                name=country['name'].strip(),
+                name_key=name_key,
+                alpha2_code=country['alpha2Code'],
+                alpha3_code=country['alpha3Code'],
+                capital=country['capital'],
+                region=country['region'],
+                calling_codes=list(country['callingCodes']),
+                top_level_domains=list(country['topLevelDomain']),
+                alt_spellings=list(country['altSpellings']),
+            )
+        cls.model.objects.bulk_create(
+            references.values(),
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['name_key'],
+            update_fields=[
+                'name', 'alpha2_code', 'alpha3_code', 'capital', 'region',
+                'calling_codes', 'top_level_domains', 'alt_spellings', 'updated_at',
+            ],
+        )
+        deleted, _ = cls.model.objects.exclude(name_key__in=list(references)).delete()
+        return {'synced': len(references), 'deleted': deleted}
 
 
 class RetrieveCountryService(BaseService):
@@ -24,26 +99,49 @@ class RetrieveCountryService(BaseService):
     model = Country
 
     @classmethod
-    def get_by_id(cls, object_id: int):
+    def get_by_id(cls, object_id: int, prefetched: tuple = None):
         """Переопределяем метод получения страны по ID, чтобы включить дополнительные данные.
 
+        Данные берутся из локального справочника CountryReference, а для стран,
+        которых в нем нет, - из CountryLayer. Если CountryLayer недоступен (в том
+        числе открыт circuit breaker), страна отдается без country_data.
+
         Args:
             object_id: The ID of the model instance to retrieve.
+            prefetched: (название страны, данные CountryLayer или ошибка), заранее
+                полученные асинхронным представлением; используются, если название совпадает.
 
         Returns:
-            dict: Словарь с данными о стране и дополнительной информацией.
+            dict: Страна, данные о ней (или None) и country_data_available.
 
         Raises:
             NotFound: Если страна не найдена.
         """
-        country_layer_service = CountryLayerService
         country = super().get_by_id(object_id)
-        country_data = country_layer_service.get_country_by_name(country.name)
+        country_data = CountryReferenceService.get_country_data(country.name)
+        if country_data is None:
+            try:
+                country_data = cls.get_external_data(country.name, prefetched)
+            except HubServerError:
+                return {
+                    'country': country,
+                    'country_data': None,
+                    'country_data_available': False,
+                }
         return {
             'country': country,
-            'country_data': country_data
+            'country_data': country_data,
+            'country_data_available': True,
         }
 
+    @staticmethod
+    def get_external_data(name: str, prefetched: tuple = None):
+        if prefetched is not None and prefetched[0] == name:
+            if isinstance(prefetched[1], Exception):
+                raise prefetched[1]
+            return prefetched[1]
+        return CountryLayerService.get_country_by_name(name)
+
 
 class CountryService:
     def __init__(self,
@@ -62,5 +160,5 @@ class CountryService:
         """
         return self.list_service.get_countries_with_posts()
 
-    def retrieve_country(self, country_id: int):
-        return self.retrieve_service.get_by_id(country_id)
+    def retrieve_country(self, country_id: int, prefetched: tuple = None):
+        return self.retrieve_service.get_by_id(country_id, prefetched)
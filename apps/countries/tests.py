@@ -1,3 +1,289 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.countries.models import Country, CountryReference
+from apps.countries.serializers import CountrySerializer, CountryValuesSerializer
+from apps.countries.services.country import CountryReferenceService
+from apps.countries.views import CountryViewSet
+from apps.posts.models import Post
+from apps.posts.services.counters import PostCounterService
+from apps.users.models import User
+from services.country_layer.country_layer import CountryLayerService, CountryNotFoundError
+from services.request_service.exceptions import CircuitOpenError, ClientNotFoundError, HubServerError, ResourceNotFoundError
+
+
+class CountryValuesSerializerTests(TestCase):
+    """Быстрый сериализатор стран возвращает то же, что и CountrySerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        for i, name in enumerate(('Japan', 'Peru', 'Chile')):
+            country = Country.objects.create(name=name)
+            for j in range(i):
+                Post.objects.create(title=f'{name} {j}', body='Body', author=author, country=country)
+
+    def test_queryset(self):
+        countries = Country.objects.order_by('id')
+        self.assertEqual(
+            CountryValuesSerializer(countries, many=True).data,
+            CountrySerializer(countries, many=True).data,
+        )
+
+    def test_page_of_instances(self):
+        countries = list(Country.objects.order_by('id'))
+        with self.assertNumQueries(0):
+            data = CountryValuesSerializer(countries, many=True).data
+        self.assertEqual(data, CountrySerializer(countries, many=True).data)
+
+
+class CountryDetailTests(TestCase):
+    """Детальная страница страны отдает первую страницу постов со ссылкой на следующие."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.country = Country.objects.create(name='Japan')
+        for i in range(12):
+            Post.objects.create(title=f'Post {i}', body='Body', author=author, country=cls.country)
+        # Посты созданы в обход PostService: счетчики сверяются командой reconcile_counters
+        PostCounterService.reconcile()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @mock.patch('apps.countries.services.country.CountryLayerService.get_country_by_name', side_effect=CircuitOpenError())
+    def test_detail_without_country_layer(self, get_country_by_name):
+        response = self.client.get(f'/api/countries/{self.country.id}/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['name'], data['country_data'], data['country_data_available']), ('Japan', None, False))
+        self.assertEqual(len(data['posts']['results']), 10)
+
+    def test_country_list_reads_post_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/countries/with-posts/')
+        self.assertEqual(response.json()['results'], [{'id': self.country.id, 'name': 'Japan', 'post_count': 12}])
+
+    @mock.patch('apps.countries.services.country.CountryLayerService.get_country_by_name', return_value={'capital': 'Tokyo'})
+    def test_detail_paginates_posts(self, get_country_by_name):
+        data = self.client.get(f'/api/countries/{self.country.id}/').json()
+        self.assertEqual((data['id'], data['name'], data['country_data']), (self.country.id, 'Japan', {'capital': 'Tokyo'}))
+        self.assertEqual([post['title'] for post in data['posts']['results']], [f'Post {i}' for i in range(11, 1, -1)])
+        self.assertIn(f'/api/countries/{self.country.id}/posts/?cursor=', data['posts']['next'])
+
+        data = self.client.get(data['posts']['next']).json()
+        self.assertEqual([post['title'] for post in data['results']], ['Post 1', 'Post 0'])
+        self.assertIsNone(data['next'])
+        get_country_by_name.assert_called_once_with('Japan')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'country_layer': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+})
+class CountryLayerCacheTests(SimpleTestCase):
+    """Ответы CountryLayer (и "не найдено") кешируются по названию страны."""
+
+    japan = {
+        'name': 'Japan', 'topLevelDomain': ['.jp'], 'alpha2Code': 'JP', 'alpha3Code': 'JPN',
+        'callingCodes': ['81'], 'capital': 'Tokyo', 'altSpellings': ['JP', 'Nippon'], 'region': 'Asia',
+    }
+
+    def setUp(self):
+        caches['country_layer'].clear()
+
+    @staticmethod
+    def response(data):
+        return mock.Mock(json=mock.Mock(return_value=data))
+
+    def test_found_country_is_cached(self):
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([self.japan])) as request:
+            first = CountryLayerService.get_country_by_name('Japan')
+            second = CountryLayerService.get_country_by_name(' japan ')
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['capital'], 'Tokyo')
+        request.assert_called_once()
+
+    def test_not_found_is_cached(self):
+        with mock.patch.object(CountryLayerService, '_make_request', side_effect=ResourceNotFoundError('Not Found')) as request:
+            for _ in range(2):
+                with self.assertRaises(ClientNotFoundError) as error:
+                    CountryLayerService.get_country_by_name('Atlantis')
+                self.assertEqual(error.exception.detail, 'Not Found')
+        request.assert_called_once()
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([])) as request:
+            for _ in range(2):
+                with self.assertRaises(CountryNotFoundError):
+                    CountryLayerService.get_country_by_name('Lemuria')
+        request.assert_called_once()
+
+    def test_other_client_errors_are_not_cached(self):
+        with mock.patch.object(CountryLayerService, '_make_request', side_effect=ClientNotFoundError('Invalid key')):
+            with self.assertRaises(ClientNotFoundError):
+                CountryLayerService.get_country_by_name('Japan')
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([self.japan])):
+            self.assertEqual(CountryLayerService.get_country_by_name('Japan')[0]['name'], 'Japan')
+
+    def test_invalid_response_is_not_cached(self):
+        invalid = {**self.japan, 'callingCodes': 'not a list'}
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([invalid])):
+            with self.assertRaises(ValidationError):
+                CountryLayerService.get_country_by_name('Japan')
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([self.japan])):
+            self.assertEqual(CountryLayerService.get_country_by_name('Japan')[0]['name'], 'Japan')
+
+    def test_server_errors_are_not_cached(self):
+        with mock.patch.object(CountryLayerService, '_make_request', side_effect=HubServerError()):
+            with self.assertRaises(HubServerError):
+                CountryLayerService.get_country_by_name('Japan')
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=self.response([self.japan])):
+            self.assertEqual(CountryLayerService.get_country_by_name('Japan')[0]['name'], 'Japan')
+
+    def test_concurrent_misses_make_one_request(self):
+        def slow_request(*args, **kwargs):
+            time.sleep(0.2)
+            return self.response([self.japan])
+
+        results = []
+        with mock.patch.object(CountryLayerService, '_make_request', side_effect=slow_request) as request:
+            threads = [
+                threading.Thread(target=lambda: results.append(CountryLayerService.get_country_by_name('Japan')))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(results), 4)
+        request.assert_called_once()
+
+    async def test_async_concurrent_misses_make_one_request(self):
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return self.response([self.japan])
+
+        with mock.patch.object(CountryLayerService, '_amake_request', side_effect=slow_request) as request:
+            results = await asyncio.gather(*(CountryLayerService.aget_country_by_name('Japan') for _ in range(4)))
+            self.assertEqual(await CountryLayerService.aget_country_by_name('japan'), results[0])
+        self.assertEqual(results[0][0]['capital'], 'Tokyo')
+        request.assert_called_once()
+
+    async def test_async_not_found_is_cached(self):
+        with mock.patch.object(CountryLayerService, '_amake_request', side_effect=ResourceNotFoundError('Not Found')) as request:
+            for _ in range(2):
+                with self.assertRaises(ClientNotFoundError):
+                    await CountryLayerService.aget_country_by_name('Atlantis')
+        request.assert_called_once()
+        with self.assertRaises(ClientNotFoundError):
+            CountryLayerService.get_country_by_name('Atlantis')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'country_layer': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class AsyncCountryDetailTests(TestCase):
+    """Асинхронная страница страны получает данные CountryLayer без синхронного запроса."""
+
+    japan = CountryLayerCacheTests.japan
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name='Japan')
+
+    def setUp(self):
+        caches['country_layer'].clear()
+        self.view = CountryViewSet.as_async_view({'get': 'retrieve'})
+
+    async def test_country_data_is_prefetched(self):
+        response_data = CountryLayerCacheTests.response([self.japan])
+        with mock.patch.object(CountryLayerService, '_amake_request', return_value=response_data) as arequest, \
+                mock.patch.object(CountryLayerService, '_make_request') as request:
+            response = await self.view(AsyncRequestFactory().get(f'/api/countries/{self.country.id}/'), pk=self.country.id)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Japan')
+        self.assertEqual(response.data['country_data'][0]['capital'], 'Tokyo')
+        arequest.assert_called_once()
+        request.assert_not_called()
+
+    async def test_upstream_error(self):
+        with mock.patch.object(CountryLayerService, '_amake_request', side_effect=HubServerError()):
+            response = await self.view(AsyncRequestFactory().get(f'/api/countries/{self.country.id}/'), pk=self.country.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['country_data'], response.data['country_data_available']), (None, False))
+
+    async def test_missing_country(self):
+        with mock.patch.object(CountryLayerService, '_amake_request') as arequest:
+            response = await self.view(AsyncRequestFactory().get('/api/countries/0/'), pk=0)
+        self.assertEqual(response.status_code, 400)
+        arequest.assert_not_called()
+
+
+class CountryReferenceTests(TestCase):
+    """Справочник стран загружается целиком и отдается на странице страны без запроса к CountryLayer."""
+
+    japan = CountryLayerCacheTests.japan
+    peru = {
+        'name': 'Peru', 'topLevelDomain': ['.pe'], 'alpha2Code': 'PE', 'alpha3Code': 'PER',
+        'callingCodes': ['51'], 'capital': 'Lima', 'altSpellings': ['PE'], 'region': 'Americas',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name='Japan')
+
+    def sync_from_file(self, countries):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as snapshot:
+            json.dump(countries, snapshot)
+        self.addCleanup(os.remove, snapshot.name)
+        call_command('sync_countries', file=snapshot.name, stdout=io.StringIO())
+
+    def test_sync_from_api(self):
+        response = CountryLayerCacheTests.response([self.japan, self.peru])
+        with mock.patch.object(CountryLayerService, '_make_request', return_value=response) as request:
+            call_command('sync_countries', stdout=io.StringIO())
+        request.assert_called_once_with('all', CountryLayerService.GET, headers=CountryLayerService.HEADERS)
+        self.assertEqual(CountryReferenceService.get_country_data(' PERU'), [self.peru])
+
+    def test_resync_updates_and_deletes(self):
+        self.sync_from_file([self.japan, self.peru])
+        self.sync_from_file([dict(self.japan, capital='Kyoto')])
+        self.assertEqual(CountryReference.objects.get().capital, 'Kyoto')
+        self.assertIsNone(CountryReferenceService.get_country_data('Peru'))
+
+    def test_invalid_snapshot(self):
+        with self.assertRaises(CommandError):
+            self.sync_from_file([{'name': 'Japan'}])
+        self.assertFalse(CountryReference.objects.exists())
+
+    def test_detail_is_served_locally(self):
+        self.sync_from_file([self.japan])
+        with mock.patch.object(CountryLayerService, '_make_request') as request:
+            data = APIClient().get(f'/api/countries/{self.country.id}/').json()
+        self.assertEqual(data['country_data'], [self.japan])
+        request.assert_not_called()
+
+    async def test_async_detail_is_served_locally(self):
+        await CountryReference.objects.acreate(
+            name='Japan', name_key='japan', alpha2_code='JP', alpha3_code='JPN', capital='Tokyo',
+            region='Asia', calling_codes=['81'], top_level_domains=['.jp'], alt_spellings=['JP', 'Nippon'],
+        )
+        view = CountryViewSet.as_async_view({'get': 'retrieve'})
+        with mock.patch.object(CountryLayerService, '_amake_request') as request:
+            response = await view(AsyncRequestFactory().get(f'/api/countries/{self.country.id}/'), pk=self.country.id)
+        self.assertEqual(response.data['country_data'], [self.japan])
+        request.assert_not_called()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import CountryViewSet
@@ -5,9 +6,13 @@ from .views import CountryViewSet
 router = DefaultRouter()
 router.register(r'countries', CountryViewSet, basename='countries')
 
+# Под ASGI страница страны ждет CountryLayer асинхронно, не занимая поток
+country_detail = CountryViewSet.as_async_view if settings.ASYNC_EXTERNAL_CALLS else CountryViewSet.as_view
+
 urlpatterns = [
     path('countries/with-posts/', CountryViewSet.as_view({'get': 'list'}), name='country-list-with-posts'),
-    path('countries/<int:pk>/', CountryViewSet.as_view({'get': 'retrieve'}), name='country-detail'),
+    path('countries/<int:pk>/', country_detail({'get': 'retrieve'}), name='country-detail'),
+    path('countries/<int:pk>/posts/', CountryViewSet.as_view({'get': 'posts'}), name='country-posts'),
 
 ]
 
@@ -1,12 +1,21 @@
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from services.base.pagination import ProductPagination
-from .serializers import CountrySerializer, CountryDetailSerializer
-from .services.country import CountryService, ListCountryService, RetrieveCountryService
+from apps.posts.serializers import PostSerializer, PostValuesSerializer
+from apps.posts.services.posts import ListPostService
+from services.country_layer.country_layer import CountryLayerService
+from services.base.pagination import KeysetPagination
+from .models import Country
+from .serializers import CountrySerializer, CountryDetailSerializer, CountryValuesSerializer
+from .services.country import CountryReferenceService, CountryService, ListCountryService, RetrieveCountryService
 
 
 class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
@@ -15,7 +24,7 @@ class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
     """
     permission_classes = [AllowAny]
     serializer_class = CountrySerializer
-    pagination_class = ProductPagination
+    pagination_class = KeysetPagination
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -23,6 +32,29 @@ class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
         retrieve_service = RetrieveCountryService()
         self.country_service = CountryService(list_service, retrieve_service)
 
+    @classmethod
+    def as_async_view(cls, actions: dict):
+        """
+        Асинхронное представление для ASGI: данные CountryLayer для страны из URL,
+        которой нет в локальном справочнике, запрашиваются без блокировки потока, затем синхронное представление DRF
+        получает готовый результат (или ошибку) в request.prefetched_country_data.
+        """
+        view = sync_to_async(cls.as_view(actions))
+
+        async def async_view(request, *args, **kwargs):
+            name = await Country.objects.filter(pk=kwargs.get('pk')).values_list('name', flat=True).afirst()
+            # Страны из локального справочника не требуют запроса к CountryLayer
+            if name is not None and await CountryReferenceService.aget_country_data(name) is None:
+                try:
+                    country_data = await CountryLayerService.aget_country_by_name(name)
+                except Exception as exc:
+                    # Ошибку обработает DRF, как и в синхронном представлении
+                    country_data = exc
+                request.prefetched_country_data = (name, country_data)
+            return await view(request, *args, **kwargs)
+
+        return csrf_exempt(async_view)
+
     def get_serializer_class(self):
         """
         Определяет сериалайзер для действий 'list' и 'retrieve'.
@@ -30,6 +62,7 @@ class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
         serializer_map = {
             'list': CountrySerializer,
             'retrieve': CountryDetailSerializer,
+            'posts': PostSerializer,
         }
         return serializer_map.get(self.action, self.serializer_class)
 
@@ -44,7 +77,7 @@ class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
         countries = self.country_service.list_countries_with_posts()
         paginator = self.pagination_class()  # Инициализируем пагинатор
         paginated_countries = paginator.paginate_queryset(countries, request)
-        serializer = self.get_serializer(paginated_countries, many=True)
+        serializer = CountryValuesSerializer(paginated_countries, many=True, context=self.get_serializer_context())
         return paginator.get_paginated_response(serializer.data)
 
     @swagger_auto_schema(
@@ -58,12 +91,42 @@ class CountryViewSet(viewsets.ViewSet, viewsets.GenericViewSet):
         """
         Получить информацию о конкретной стране.
         """
-        country_data = self.country_service.retrieve_country(pk)
+        prefetched = getattr(request, 'prefetched_country_data', None)
+        country_data = self.country_service.retrieve_country(pk, prefetched)
 
         country = country_data['country']
         additional_data = country_data['country_data']
 
         serializer = self.get_serializer(country)
         response_data = serializer.data
-        response_data.update({'country_data': additional_data})
+        # Первая страница постов; ссылка next ведет на /api/countries/<id>/posts/
+        posts_url = reverse('country-posts', args=[country.id])
+        response_data.update({
+            'posts': self._paginated_posts_response(country, base_url=posts_url).data,
+            'country_data': additional_data,
+            # False - CountryLayer недоступен, country_data пусто
+            'country_data_available': country_data['country_data_available'],
+        })
         return Response(response_data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        responses={200: PostSerializer(many=True)},
+        operation_description="Получить посты страны с пагинацией.",
+        manual_parameters=[
+            openapi.Parameter('pk', openapi.IN_PATH, description="ID страны", type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @action(detail=True, methods=['get'], url_path='posts')
+    def posts(self, request, pk=None):
+        """
+        Получить посты страны с пагинацией.
+        """
+        country = get_object_or_404(Country, pk=pk)
+        return self._paginated_posts_response(country)
+
+    def _paginated_posts_response(self, country: Country, base_url: str = None):
+        paginator = self.pagination_class()
+        paginator.base_url = base_url
+        paginated_posts = paginator.paginate_queryset(ListPostService.get_country_posts(country.id), self.request)
+        serializer = PostValuesSerializer(paginated_posts, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
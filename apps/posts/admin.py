@@ -1,12 +1,18 @@
 from django.contrib import admin
 
 
-from .models import Post, PostImage, Comment, Tag
+from .models import Post, PostImage, Comment, Tag, PostTag, PostLike
+
+
+class PostTagInline(admin.TabularInline):
+    model = PostTag
+    fields = ('tag',)
+    extra = 0
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    ...
+    inlines = [PostTagInline]
 
 
 @admin.register(PostImage)
@@ -22,3 +28,9 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Tag)
 class TagsAdmin(admin.ModelAdmin):
     ...
+
+
+@admin.register(PostLike)
+class PostLikeAdmin(admin.ModelAdmin):
+    list_display = ('post', 'user', 'created_at')
+    raw_id_fields = ('post', 'user')
@@ -0,0 +1,52 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.posts.models import Post
+from apps.posts.services.feed import SubscriptionFeed
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время построения первой страницы ленты подписок: "
+        "прежний OR-запрос с DISTINCT и слияние индексных веток."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int, help="ID пользователя, для которого строится лента.")
+        parser.add_argument('--limit', type=int, default=10, help="Размер страницы.")
+        parser.add_argument('--iterations', type=int, default=20, help="Количество повторов.")
+
+    def handle(self, *args, user_id, limit, iterations, **options):
+        try:
+            user = User.objects.get(pk=user_id)
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {user_id} не найден.")
+
+        def or_query():
+            return list(Post.objects.filter(
+                Q(author__in=user.subscribed_users.all()) |
+                Q(country__in=user.subscribed_countries.all()) |
+                Q(tags__in=user.subscribed_tags.all())
+            ).distinct().order_by('-created_at')[:limit])
+
+        def legs():
+            return SubscriptionFeed(user).latest(limit)
+
+        expected = [post.id for post in or_query()]
+        if [post.id for post in legs()] != expected:
+            self.stderr.write(self.style.WARNING("Результаты запросов различаются (совпадающие created_at?)."))
+
+        for name, query in (('OR + DISTINCT', or_query), ('index legs', legs)):
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{name:>14}: median {statistics.median(timings):.2f} ms, "
+                f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms"
+            )
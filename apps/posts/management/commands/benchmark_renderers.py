@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.posts.models import Post, Tag
+from apps.posts.serializers import PostValuesSerializer, TagValuesSerializer
+from apps.users.models import User
+from apps.users.serializers import TopUserValuesSerializer
+from services.base.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает размер ответа и время кодирования страницы постов и дашборда: "
+        "JSON (json и orjson) и MessagePack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help="Размер страницы постов.")
+        parser.add_argument('--iterations', type=int, default=200, help="Количество повторов.")
+
+    def handle(self, *args, limit, iterations, **options):
+        posts = Post.objects.order_by('-created_at', '-id')
+        payloads = (
+            ('posts page', {
+                'count': None, 'next': None, 'previous': None,
+                'results': PostValuesSerializer(posts[:limit], many=True).data,
+            }),
+            ('dashboard', {
+                'latest_posts': PostValuesSerializer(posts[:3], many=True).data,
+                'top_users': TopUserValuesSerializer(User.objects.order_by('-total_likes')[:5], many=True).data,
+                'tag_cloud': TagValuesSerializer(Tag.objects.all(), many=True).data,
+            }),
+        )
+        renderers = (('json', JSONRenderer()), ('orjson', ORJSONRenderer()), ('msgpack', MessagePackRenderer()))
+
+        for name, data in payloads:
+            for label, renderer in renderers:
+                size = len(renderer.render(data))
+                timings = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    renderer.render(data)
+                    timings.append((time.perf_counter() - started) * 1_000_000)
+                self.stdout.write(
+                    f"{name:>10} {label:>7}: {size:>8} bytes, "
+                    f"median {statistics.median(timings):.1f} µs, "
+                    f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.1f} µs"
+                )
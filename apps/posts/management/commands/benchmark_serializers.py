@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import prefetch_related_objects
+
+from apps.countries.models import Country
+from apps.countries.serializers import CountrySerializer, CountryValuesSerializer
+from apps.posts.models import Post, Tag
+from apps.posts.serializers import PostSerializer, PostValuesSerializer, TagSerializer, TagValuesSerializer
+from apps.users.models import User
+from apps.users.serializers import UserSerializer, UserValuesSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стоимость сериализации одного объекта в списках: "
+        "сериализаторы DRF и быстрые сериализаторы на values()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help="Сколько объектов сериализуется за проход.")
+        parser.add_argument('--iterations', type=int, default=20, help="Количество повторов.")
+
+    def handle(self, *args, count, iterations, **options):
+        cases = (
+            ('posts', Post.objects.order_by('-created_at', '-id'), PostSerializer, PostValuesSerializer, ('images', 'tags')),
+            ('tags', Tag.objects.order_by('-post_count', 'id'), TagSerializer, TagValuesSerializer, ()),
+            ('countries', Country.objects.order_by('id'), CountrySerializer, CountryValuesSerializer, ()),
+            ('users', User.objects.order_by('-id'), UserSerializer, UserValuesSerializer, ()),
+        )
+        for name, queryset, serializer_class, values_serializer_class, prefetch in cases:
+            objects = queryset[:count]
+            size = len(objects)
+            if not size:
+                self.stdout.write(f"{name:>10}: нет данных")
+                continue
+
+            def drf():
+                # Страница и связанные объекты читаются заново, как и в values()
+                page = list(objects.all())
+                prefetch_related_objects(page, *prefetch)
+                return serializer_class(page, many=True).data
+
+            def values():
+                return values_serializer_class(objects, many=True).data
+
+            if drf() != values():
+                self.stderr.write(self.style.WARNING(f"{name}: представления различаются."))
+
+            for label, serialize in (('DRF', drf), ('values', values)):
+                timings = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    serialize()
+                    timings.append((time.perf_counter() - started) * 1_000_000 / size)
+                self.stdout.write(
+                    f"{name:>10} {label:>6}: median {statistics.median(timings):.1f} µs/object, "
+                    f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.1f} µs/object ({size} objects)"
+                )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.services.timeline import TimelineService
+
+
+class Command(BaseCommand):
+    help = (
+        "Переводит в режим чтения при запросе ленты (User.feed_pulled) всех авторов, у которых "
+        "не меньше FEED_PULL_FOLLOWER_THRESHOLD подписчиков. Запускается после изменения порога "
+        "и периодически, если followers_count меняется в обход подписок."
+    )
+
+    def handle(self, *args, **options):
+        promoted = TimelineService.promote_pulled_authors()
+        self.stdout.write(self.style.SUCCESS(f"Авторов переведено в режим чтения: {promoted}"))
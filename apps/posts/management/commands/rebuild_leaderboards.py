@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.services.leaderboard import LeaderboardService
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает почасовые счетчики облака тегов и топа пользователей за окна "
+        "(24 часа, 7 дней) по тегам постов и лайкам и удаляет часы старше 7 дней."
+    )
+
+    def handle(self, *args, **options):
+        for model_name, count in LeaderboardService.rebuild().items():
+            self.stdout.write(f"{model_name}: {count}")
+        self.stdout.write(self.style.SUCCESS("Счетчики пересобраны"))
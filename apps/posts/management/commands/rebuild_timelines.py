@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.posts.services.timeline import TimelineService
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Перестраивает материализованные ленты пользователей по их текущим подпискам."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="ID пользователя (можно несколько).")
+
+    def handle(self, *args, user_ids=None, **options):
+        users = User.objects.filter(
+            Q(subscribed_users__isnull=False) |
+            Q(subscribed_countries__isnull=False) |
+            Q(subscribed_tags__isnull=False)
+        ).distinct()
+        if user_ids:
+            users = User.objects.filter(id__in=user_ids)
+
+        rebuilt = 0
+        for user in users.iterator():
+            TimelineService.rebuild_for_user(user)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f"Перестроено лент: {rebuilt}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.services.ranking import PostScoreService
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рейтинг всех постов для ранжированной ленты."
+
+    def handle(self, *args, **options):
+        refreshed = PostScoreService.refresh_all()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано постов: {refreshed}"))
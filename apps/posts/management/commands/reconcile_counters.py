@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.services.counters import PostCounterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики постов тегов, стран и пользователей и лайков "
+        "пользователей, исправляя разошедшиеся значения (например, после правок "
+        "в админке или каскадного удаления)."
+    )
+
+    def handle(self, *args, **options):
+        for counter, fixed in PostCounterService.reconcile().items():
+            self.stdout.write(f"{counter}: исправлено {fixed}")
+        self.stdout.write(self.style.SUCCESS("Счетчики сверены"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.services.likes import LikePostService
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает Post.likes по таблице лайков, например после аварийной "
+        "остановки процесса с незаписанным буфером счетчиков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, nargs='+', dest='post_ids', help="ID постов (по умолчанию все).")
+
+    def handle(self, *args, post_ids=None, **options):
+        fixed = LikePostService.recount(post_ids)
+        self.stdout.write(self.style.SUCCESS(f"Исправлено постов: {fixed}"))
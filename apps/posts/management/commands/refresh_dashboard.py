@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.posts.services.dashboard import DashboardSnapshotService
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает готовый ответ дашборда чаще, чем он устаревает (по умолчанию "
+        "каждые DASHBOARD_REFRESH_INTERVAL / 2 секунд), чтобы запросы никогда не "
+        "собирали его сами; --once - пересобрать один раз. Нужен общий кеш (REDIS_URL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Пересобрать один раз и выйти.")
+        parser.add_argument('--interval', type=float, help="Интервал в секундах.")
+
+    def handle(self, *args, once=False, interval=None, **options):
+        if not settings.REDIS_URL:
+            # Кеш в памяти процесса команды веб-процессам не виден
+            raise CommandError("Для refresh_dashboard нужен общий кеш: задайте REDIS_URL.")
+        interval = interval or DashboardSnapshotService.payload.refresh_interval / 2
+        while True:
+            started = time.monotonic()
+            DashboardSnapshotService.refresh()
+            self.stdout.write(f"Дашборд обновлен за {time.monotonic() - started:.2f} с")
+            if once:
+                break
+            connections.close_all()
+            time.sleep(max(interval - (time.monotonic() - started), 0))
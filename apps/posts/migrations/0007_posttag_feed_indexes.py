@@ -0,0 +1,71 @@
+# Generated by Django 5.1.15 on 2026-10-18 00:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_post_created_at(apps, schema_editor):
+    PostTag = apps.get_model('posts', 'PostTag')
+    Post = apps.get_model('posts', 'Post')
+    PostTag.objects.update(
+        post_created_at=models.Subquery(
+            Post.objects.filter(pk=models.OuterRef('post_id')).values('created_at')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_created_id_index'),
+    ]
+
+    operations = [
+        # Существующая таблица posts_post_tags становится явной промежуточной моделью.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PostTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='posts.post', verbose_name='Пост')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='posts.tag', verbose_name='Тег')),
+                    ],
+                    options={
+                        'verbose_name': 'Тег поста',
+                        'verbose_name_plural': 'Теги постов',
+                        'db_table': 'posts_post_tags',
+                        'unique_together': {('post', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='post',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='posts', through='posts.PostTag', to='posts.tag', verbose_name='Теги'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='posttag',
+            name='post_created_at',
+            field=models.DateTimeField(null=True, verbose_name='Дата публикации поста'),
+        ),
+        migrations.RunPython(fill_post_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='posttag',
+            name='post_created_at',
+            field=models.DateTimeField(verbose_name='Дата публикации поста'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_created'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['country', '-created_at', '-id'], name='posts_post_country_created'),
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-post_created_at', '-post'], name='posts_posttag_tag_created'),
+        ),
+    ]
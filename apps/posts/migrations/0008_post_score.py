@@ -0,0 +1,71 @@
+# Generated by Django 5.1.15 on 2026-10-18 00:39
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+# Веса рейтинга на момент миграции (значения FEED_RANK_* по умолчанию); после изменения
+# весов в настройках рейтинг пересчитывается командой recompute_post_scores
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 3
+DECAY_SECONDS = 45000
+
+
+def fill_comment_count_and_score(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Post.objects.update(
+        comment_count=Coalesce(
+            models.Subquery(
+                Comment.objects.filter(post_id=models.OuterRef('pk'))
+                .values('post_id').annotate(total=models.Count('pk')).values('total')
+            ),
+            0,
+        )
+    )
+    batch = []
+    for post in Post.objects.only('id', 'likes', 'comment_count', 'created_at').iterator(chunk_size=1000):
+        engagement = post.likes * LIKE_WEIGHT + post.comment_count * COMMENT_WEIGHT
+        post.score = math.log10(max(engagement, 1)) + post.created_at.timestamp() / DECAY_SECONDS
+        batch.append(post)
+        if len(batch) == 1000:
+            Post.objects.bulk_update(batch, ['score'])
+            batch = []
+    Post.objects.bulk_update(batch, ['score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0001_initial'),
+        ('posts', '0007_posttag_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.FloatField(default=0, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(fill_comment_count_and_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-score', '-id'], name='posts_post_score'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-score', '-id'], name='posts_post_author_score'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['country', '-score', '-id'], name='posts_post_country_score'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 00:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_tag_post_count(apps, schema_editor):
+    Tag = apps.get_model('posts', 'Tag')
+    PostTag = apps.get_model('posts', 'PostTag')
+    Tag.objects.update(
+        post_count=Coalesce(
+            models.Subquery(
+                PostTag.objects.filter(tag_id=models.OuterRef('pk'))
+                .values('tag_id').annotate(total=models.Count('pk')).values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(fill_tag_post_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count'], name='posts_tag_post_count'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 01:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество постов')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.tag', verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'Активность тега',
+                'verbose_name_plural': 'Активность тегов',
+                'indexes': [models.Index(fields=['hour'], name='posts_tagactivity_hour')],
+                'constraints': [models.UniqueConstraint(fields=('tag', 'hour'), name='posts_tagactivity_unique_tag_hour')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserLikeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество лайков')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_activity', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Лайки пользователя за час',
+                'verbose_name_plural': 'Лайки пользователей по часам',
+                'indexes': [models.Index(fields=['hour'], name='posts_userlikeactivity_hour')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'hour'), name='posts_userlikeactivity_unique_user_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 01:32
+
+import apps.posts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_activity_buckets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='posttag',
+            name='post_created_at',
+            field=apps.posts.models.PostCreatedAtField(verbose_name='Дата публикации поста'),
+        ),
+    ]
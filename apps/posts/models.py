@@ -9,12 +9,22 @@ class Post(TimeStampModel):
     body = models.TextField(verbose_name="Содержимое")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Автор", related_name='posts')
     country = models.ForeignKey('countries.Country', on_delete=models.SET_NULL, null=True, verbose_name="Страна")
-    tags = models.ManyToManyField('Tag', blank=True, verbose_name="Теги", related_name='posts')
+    tags = models.ManyToManyField('Tag', through='PostTag', blank=True, verbose_name="Теги", related_name='posts')
     likes = models.PositiveIntegerField(default=0, verbose_name="Количество лайков")
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="Количество комментариев")
+    score = models.FloatField(default=0, verbose_name="Рейтинг")
 
     class Meta:
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_post_created_id'),
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_created'),
+            models.Index(fields=['country', '-created_at', '-id'], name='posts_post_country_created'),
+            models.Index(fields=['-score', '-id'], name='posts_post_score'),
+            models.Index(fields=['author', '-score', '-id'], name='posts_post_author_score'),
+            models.Index(fields=['country', '-score', '-id'], name='posts_post_country_score'),
+        ]
 
     def __str__(self):
         return self.title
@@ -34,15 +44,56 @@ class PostImage(TimeStampModel):
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True, verbose_name="Имя тега")
+    post_count = models.PositiveIntegerField(default=0, verbose_name="Количество постов")
 
     class Meta:
         verbose_name = "Тег"
         verbose_name_plural = "Теги"
+        indexes = [
+            models.Index(fields=['-post_count'], name='posts_tag_post_count'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class PostCreatedAtField(models.DateTimeField):
+    """
+    Дата публикации поста в связующей таблице. Заполняется при каждой вставке,
+    в том числе через post.tags.add()/set(), админку и сериализаторы DRF
+    (bulk_create вызывает pre_save, но не save()).
+    """
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if value is None:
+            value = model_instance.post.created_at
+            setattr(model_instance, self.attname, value)
+        return value
+
+
+class PostTag(models.Model):
+    """
+    Связь поста с тегом. Дата публикации поста продублирована, чтобы посты
+    по тегу читались по индексу (tag, -post_created_at) без сортировки.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tag_links', verbose_name="Пост")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_links', verbose_name="Тег")
+    post_created_at = PostCreatedAtField(verbose_name="Дата публикации поста")
+
+    class Meta:
+        db_table = 'posts_post_tags'
+        verbose_name = "Тег поста"
+        verbose_name_plural = "Теги постов"
+        unique_together = ('post', 'tag')
+        indexes = [
+            models.Index(fields=['tag', '-post_created_at', '-post'], name='posts_posttag_tag_created'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag} for post {self.post_id}'
+
+
 class Comment(TimeStampModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', verbose_name="Пост")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Автор")
@@ -54,3 +105,94 @@ class Comment(TimeStampModel):
 
     def __str__(self):
         return f'Comment by {self.author} on {self.post}'
+
+
+class PostLike(models.Model):
+    """
+    Лайк пользователя. Одна запись на пару (пользователь, пост) делает лайк
+    идемпотентным; Post.likes - денормализованный счетчик этих записей.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='post_likes', verbose_name="Пользователь")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_likes', verbose_name="Пост")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата лайка")
+
+    class Meta:
+        verbose_name = "Лайк"
+        verbose_name_plural = "Лайки"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='posts_postlike_unique_user_post'),
+        ]
+
+    def __str__(self):
+        return f'Like of {self.user_id} for post {self.post_id}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Материализованная лента пользователя.
+
+    Запись создается при публикации поста (fan-out on write) для всех подписчиков
+    автора, страны и тегов поста, а также при подписке пользователя. Дата поста
+    продублирована, чтобы главная страница читалась по индексу без сортировки.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries', verbose_name="Пользователь")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries', verbose_name="Пост")
+    created_at = models.DateTimeField(verbose_name="Дата публикации поста")
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='posts_timeline_unique_user_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_timeline_user_created'),
+        ]
+
+    def __str__(self):
+        return f'Timeline entry of {self.user_id} for post {self.post_id}'
+
+
+class TagActivity(models.Model):
+    """
+    Количество постов с тегом по часу публикации поста. Облако тегов за окно
+    (24 часа, 7 дней) суммирует часы окна вместо просмотра постов.
+    """
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='activity', verbose_name="Тег")
+    hour = models.DateTimeField(verbose_name="Час")
+    count = models.IntegerField(default=0, verbose_name="Количество постов")
+
+    class Meta:
+        verbose_name = "Активность тега"
+        verbose_name_plural = "Активность тегов"
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'hour'], name='posts_tagactivity_unique_tag_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='posts_tagactivity_hour'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag_id} at {self.hour}: {self.count}'
+
+
+class UserLikeActivity(models.Model):
+    """
+    Количество лайков постов пользователя по часу лайка - для топа пользователей за окно.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='like_activity', verbose_name="Пользователь")
+    hour = models.DateTimeField(verbose_name="Час")
+    count = models.IntegerField(default=0, verbose_name="Количество лайков")
+
+    class Meta:
+        verbose_name = "Лайки пользователя за час"
+        verbose_name_plural = "Лайки пользователей по часам"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'hour'], name='posts_userlikeactivity_unique_user_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='posts_userlikeactivity_hour'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} at {self.hour}: {self.count}'
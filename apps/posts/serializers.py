@@ -1,4 +1,7 @@
+from django.db.models import F
 from rest_framework import serializers
+
+from services.base.serializers import ValuesSerializer
 from .models import Post, PostImage, Tag, Comment
 
 
@@ -34,6 +37,41 @@ class PostSerializer(serializers.ModelSerializer):
         return value
 
 
+class TagValuesSerializer(ValuesSerializer):
+    """Быстрое представление тегов для списков, совпадает с TagSerializer."""
+    fields = ('id', 'name')
+
+
+class PostValuesSerializer(ValuesSerializer):
+    """
+    Быстрое представление постов для списков, совпадает с PostSerializer.
+
+    Теги и изображения страницы читаются двумя запросами values(), поэтому
+    число запросов не зависит от размера страницы.
+    """
+    fields = ('title', 'body', 'country', 'tags', 'images')
+    source_columns = {'country': 'country_id'}
+    related_fields = ('tags', 'images')
+
+    def load_related(self, rows):
+        post_ids = [row['id'] for row in rows]
+        tags = self.group_by(
+            Tag.objects.filter(post_links__post_id__in=post_ids).values('id', 'name', post_id=F('post_links__post_id')),
+            'post_id',
+        )
+        storage = PostImage._meta.get_field('image').storage
+        images = self.group_by(
+            (
+                {'post_id': post_id, 'id': image_id, 'post': post_id, 'image': self.file_url(name, storage)}
+                for image_id, post_id, name in PostImage.objects.filter(post_id__in=post_ids).values_list('id', 'post_id', 'image')
+            ),
+            'post_id',
+        )
+        for row in rows:
+            row['tags'] = tags.get(row['id'], [])
+            row['images'] = images.get(row['id'], [])
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для представления информации о комментариях."""
 
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.countries.models import Country
+from apps.posts.models import Post, PostTag, Tag
+from apps.posts.services.leaderboard import LeaderboardService
+from apps.users.models import User
+from services.base.service import BaseService
+
+
+class PostCounterService(BaseService):
+    """
+    Денормализованные счетчики постов: Tag.post_count, Country.post_count,
+    User.post_count, User.country_count и User.total_likes.
+
+    Счетчики (и почасовые корзины LeaderboardService) меняются атомарными
+    F()-обновлениями вместе с постом (создание, смена страны и тегов, удаление,
+    запись буфера лайков), поэтому облако тегов, топ пользователей и списки
+    стран и пользователей читаются по индексу без агрегации. Изменения в обход
+    сервисов (админка, каскадное удаление пользователя или страны) исправляет
+    команда reconcile_counters.
+    """
+    model = Post
+
+    @staticmethod
+    def change(queryset: models.QuerySet, field: str, delta: int) -> None:
+        """
+        Сдвигает счетчик на delta; уменьшение не уводит счетчик ниже нуля.
+        """
+        if not delta:
+            return
+        value = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        queryset.update(**{field: value})
+
+    @classmethod
+    def post_created(cls, post: Post) -> None:
+        cls.change(User.objects.filter(pk=post.author_id), 'post_count', 1)
+        if post.country_id is not None:
+            cls.change(Country.objects.filter(pk=post.country_id), 'post_count', 1)
+            cls.refresh_country_count([post.author_id])
+
+    @classmethod
+    def post_deleted(cls, post: Post, tag_ids: Iterable[int]) -> None:
+        """
+        Вызывается после удаления поста: post и tag_ids загружены до удаления.
+        """
+        author = User.objects.filter(pk=post.author_id)
+        cls.change(author, 'post_count', -1)
+        cls.change(author, 'total_likes', -post.likes)
+        cls.tags_changed(post, removed_ids=tag_ids)
+        if post.country_id is not None:
+            cls.change(Country.objects.filter(pk=post.country_id), 'post_count', -1)
+            cls.refresh_country_count([post.author_id])
+
+    @classmethod
+    def country_changed(cls, post: Post, previous_country_id: Optional[int]) -> None:
+        if post.country_id == previous_country_id:
+            return
+        if previous_country_id is not None:
+            cls.change(Country.objects.filter(pk=previous_country_id), 'post_count', -1)
+        if post.country_id is not None:
+            cls.change(Country.objects.filter(pk=post.country_id), 'post_count', 1)
+        cls.refresh_country_count([post.author_id])
+
+    @classmethod
+    def tags_changed(cls, post: Post, added_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()) -> None:
+        added_ids, removed_ids = list(added_ids), list(removed_ids)
+        cls.change(Tag.objects.filter(id__in=added_ids), 'post_count', 1)
+        cls.change(Tag.objects.filter(id__in=removed_ids), 'post_count', -1)
+        LeaderboardService.tags_changed(post.created_at, added_ids, removed_ids)
+
+    @classmethod
+    def likes_changed(cls, deltas: Dict[int, int]) -> None:
+        """
+        Переносит изменения Post.likes ({id поста: разность}) в User.total_likes
+        авторов: по одному UPDATE на каждое значение суммарной разности.
+        """
+        likes_by_author = defaultdict(int)
+        post_authors = Post.objects.filter(id__in=list(deltas)).values_list('id', 'author_id')
+        for post_id, author_id in post_authors:
+            likes_by_author[author_id] += deltas[post_id]
+
+        author_ids_by_delta = defaultdict(list)
+        for author_id, delta in sorted(likes_by_author.items()):
+            author_ids_by_delta[delta].append(author_id)
+        for delta, author_ids in author_ids_by_delta.items():
+            cls.change(User.objects.filter(id__in=author_ids), 'total_likes', delta)
+        LeaderboardService.likes_changed(likes_by_author)
+
+    @staticmethod
+    def get_actual_counts() -> Dict[models.Model, Dict[str, Subquery]]:
+        """
+        Точные значения счетчиков - подзапросы по строкам модели.
+        """
+        author_posts = Post.objects.filter(author=OuterRef('pk')).order_by().values('author')
+        return {
+            Tag: {
+                'post_count': PostTag.objects.filter(tag=OuterRef('pk')).order_by().values('tag')
+                .annotate(count=Count('id')).values('count'),
+            },
+            Country: {
+                'post_count': Post.objects.filter(country=OuterRef('pk')).order_by().values('country')
+                .annotate(count=Count('id')).values('count'),
+            },
+            User: {
+                'post_count': author_posts.annotate(count=Count('id')).values('count'),
+                'country_count': author_posts.annotate(count=Count('country', distinct=True)).values('count'),
+                'total_likes': author_posts.annotate(total=Sum('likes')).values('total'),
+            },
+        }
+
+    @classmethod
+    def refresh_country_count(cls, user_ids: Iterable[int]) -> None:
+        cls.refresh(User, 'country_count', user_ids)
+
+    @classmethod
+    def refresh_total_likes(cls, user_ids: Iterable[int]) -> None:
+        cls.refresh(User, 'total_likes', user_ids)
+
+    @classmethod
+    def refresh(cls, model, field: str, ids: Iterable[int]) -> None:
+        actual = cls.get_actual_counts()[model][field]
+        model.objects.filter(id__in=list(ids)).update(**{field: Coalesce(Subquery(actual), 0)})
+
+    @classmethod
+    def reconcile(cls) -> Dict[str, int]:
+        """
+        Пересчитывает все счетчики и исправляет только разошедшиеся строки;
+        возвращает количество исправленных строк по каждому счетчику.
+        """
+        fixed = {}
+        for model, counters in cls.get_actual_counts().items():
+            for field, actual in counters.items():
+                stale = model.objects.annotate(actual=Coalesce(Subquery(actual), 0)).exclude(**{field: F('actual')})
+                stale_ids = list(stale.values_list('id', flat=True))
+                cls.refresh(model, field, stale_ids)
+                fixed[f'{model.__name__}.{field}'] = len(stale_ids)
+        return fixed
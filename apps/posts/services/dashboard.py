@@ -1,7 +1,21 @@
-from django.db.models import Sum, Count
+from typing import Optional
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from apps.posts.models import Post, Tag
+from apps.posts.serializers import PostValuesSerializer, TagValuesSerializer
+from apps.posts.services.leaderboard import LeaderboardService
+from apps.users.models import User
+from apps.users.serializers import TopUserValuesSerializer
+from services.base.cache import RefreshedPayload
+from services.base.renderers import MessagePackRenderer
 
 
 class DashboardService:
+    windows = tuple(LeaderboardService.windows)
+
     def __init__(self, post_model, user_model, tag_model):
         self.post_model = post_model
         self.user_model = user_model
@@ -11,14 +25,58 @@ class DashboardService:
         """Получить последние три поста."""
         return self.post_model.objects.order_by('-created_at')[:3]
 
-    def get_top_users(self):
-        """Получить топ-5 пользователей с наибольшим количеством лайков постов."""
-        return self.user_model.objects.annotate(
-            total_likes=Sum('posts__likes')
-        ).order_by('-total_likes')[:5]
-
-    def get_tag_cloud(self):
-        """Получить облако тегов (с их количеством)."""
-        return self.tag_model.objects.annotate(
-            post_count=Count('posts')
-        ).order_by('-post_count')
+    def get_top_users(self, window: Optional[str] = None):
+        """Получить топ-5 пользователей с наибольшим количеством лайков постов (за все время или за окно)."""
+        if window is not None:
+            return LeaderboardService.get_top_users(window, 5)
+        return self.user_model.objects.order_by('-total_likes')[:5]
+
+    def get_tag_cloud(self, window: Optional[str] = None):
+        """Получить облако тегов (DASHBOARD_TAG_CLOUD_SIZE самых популярных за все время или за окно)."""
+        if window is not None:
+            return LeaderboardService.get_top_tags(window, settings.DASHBOARD_TAG_CLOUD_SIZE)
+        return self.tag_model.objects.order_by('-post_count')[:settings.DASHBOARD_TAG_CLOUD_SIZE]
+
+    def get_data(self, window: Optional[str] = None) -> dict:
+        """Данные дашборда: последние посты, топ пользователей и облако тегов."""
+        return {
+            'latest_posts': PostValuesSerializer(self.get_latest_posts(), many=True).data,
+            'top_users': TopUserValuesSerializer(self.get_top_users(window), many=True).data,
+            'tag_cloud': TagValuesSerializer(self.get_tag_cloud(window), many=True).data,
+        }
+
+
+class DashboardSnapshotService:
+    """
+    Готовый (уже закодированный) ответ дашборда, общий для всех посетителей.
+
+    Ответы за все время и за каждое окно (?window=24h, ?window=7d) хранятся
+    отдельно. Ответ пересобирается периодически (команда refresh_dashboard) или первым
+    запросом после DASHBOARD_REFRESH_INTERVAL секунд - в фоне, пока остальные
+    получают предыдущую версию. С общим кешем (REDIS_URL) ответ собирает только
+    один процесс; без него каждый процесс хранит и пересобирает свою копию.
+    """
+    payload = RefreshedPayload('posts:dashboard', settings.DASHBOARD_REFRESH_INTERVAL, settings.DASHBOARD_STALE_TIMEOUT)
+    dashboard_service = DashboardService(Post, User, Tag)
+
+    @staticmethod
+    def is_supported(renderer) -> bool:
+        return isinstance(renderer, (JSONRenderer, MessagePackRenderer))
+
+    @classmethod
+    def get_payload(cls, renderer, window: Optional[str] = None) -> bytes:
+        return cls.payload.get(
+            f'{renderer.format}:{window or "all"}',
+            lambda: renderer.render(cls.dashboard_service.get_data(window)),
+        )
+
+    @classmethod
+    def refresh(cls) -> None:
+        """
+        Для каждого окна собирает данные один раз и сохраняет ответ для каждого формата (JSON, MessagePack).
+        """
+        renderers = [renderer_class() for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES]
+        for window in (None, *cls.dashboard_service.windows):
+            data = cls.dashboard_service.get_data(window)
+            for renderer in filter(cls.is_supported, renderers):
+                cls.payload.set(f'{renderer.format}:{window or "all"}', renderer.render(data))
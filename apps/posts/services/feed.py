@@ -0,0 +1,175 @@
+import heapq
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q, Value
+
+from apps.posts.models import Post
+from apps.users.models import User
+
+
+class MergedFeed:
+    """
+    Несколько querysets постов, отсортированных по (-created_at, -id), которые
+    пагинатор читает как одну ленту: страницы источников сливаются k-way merge,
+    а дубликаты, попавшие в несколько источников, отбрасываются.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    def count(self) -> int:
+        condition = Q()
+        for queryset in self.querysets:
+            condition |= Q(id__in=queryset.order_by().values('id'))
+        return Post.objects.filter(condition).count()
+
+    def latest(self, limit: int) -> List[Post]:
+        """
+        Последние limit постов ленты: из каждого источника читается не больше limit строк.
+        """
+        sources = [list(queryset[:limit]) for queryset in self.querysets]
+        merged = heapq.merge(*sources, key=lambda post: (post.created_at, post.id), reverse=True)
+        posts, seen = [], set()
+        for post in merged:
+            if post.id not in seen:
+                seen.add(post.id)
+                posts.append(post)
+            if len(posts) == limit:
+                break
+        return posts
+
+
+class SubscriptionFeed(MergedFeed):
+    """
+    Лента подписок пользователя, собранная из независимых веток:
+    по авторам, по странам и по каждому тегу.
+
+    Каждая ветка читается по своему составному индексу уже в нужном порядке
+    и ограничивается размером страницы + 1, а ветки сливаются и очищаются
+    от дубликатов по id. Это заменяет OR-запрос с JOIN по тегам и DISTINCT
+    по всей выборке. Внутри ветки посты не повторяются, а в ветки стран
+    и тегов не попадают посты авторов и стран из подписок, поэтому
+    дубликаты при слиянии возможны только между ветками разных тегов.
+    """
+
+    def __init__(self, user: User):
+        legs = []
+        author_ids = list(user.subscribed_users.values_list('id', flat=True))
+        if author_ids:
+            legs.append(self.author_leg(author_ids))
+        country_ids = list(user.subscribed_countries.values_list('id', flat=True))
+        if country_ids:
+            legs.append(self.country_leg(country_ids).exclude(author_id__in=author_ids))
+        for tag_id in user.subscribed_tags.values_list('id', flat=True):
+            legs.append(self.tag_leg(tag_id).exclude(author_id__in=author_ids).exclude(country_id__in=country_ids))
+        super().__init__(*legs)
+
+    @staticmethod
+    def author_leg(author_ids) -> models.QuerySet:
+        """Посты авторов, индекс (author, -created_at, -id)."""
+        return Post.objects.filter(author_id__in=author_ids).order_by('-created_at', '-id')
+
+    @staticmethod
+    def country_leg(country_ids) -> models.QuerySet:
+        """Посты стран, индекс (country, -created_at, -id)."""
+        return Post.objects.filter(country_id__in=country_ids).order_by('-created_at', '-id')
+
+    @staticmethod
+    def tag_leg(tag_id: int) -> models.QuerySet:
+        """
+        Посты одного тега, индекс (tag, -post_created_at, -post) связующей таблицы.
+        Ветка на каждый тег обходится без DISTINCT: пост связан с тегом один раз.
+        """
+        return Post.objects.filter(tag_links__tag_id=tag_id).annotate(
+            feed_created_at=F('tag_links__post_created_at'),
+            feed_post_id=F('tag_links__post_id'),
+        ).order_by('-feed_created_at', '-feed_post_id')
+
+
+class RankedFeed:
+    """
+    Лента, отсортированная по рейтингу поста с надбавкой за тип подписки.
+
+    Итоговый ранг = Post.score + вес ветки (автор, страна или тег). В ветку
+    стран не попадают посты авторов из подписок, в ветки тегов - посты авторов
+    и стран из подписок, поэтому каждый пост получает наибольшую надбавку.
+    Пост с несколькими тегами из подписок попадает в несколько веток тегов
+    с одинаковым рангом и отбрасывается при слиянии как дубликат.
+
+    Ветки авторов и стран читаются по индексам (..., -score, -id) как top-N.
+    На каждый тег - отдельная ветка без DISTINCT: связующая таблица не хранит
+    рейтинг, поэтому ветка тега идет по индексу (-score, -id) постов и проверяет
+    связь с тегом по уникальному индексу (post, tag). Для популярных тегов это
+    тот же top-N, а для редких тегов чтение страницы просматривает больше строк.
+    Пагинатор передает позицию курсора (ранг, id) через paginate_keyset.
+    Для анонимного пользователя лента - все посты по рейтингу без надбавок.
+    """
+
+    rank_epsilon = 1e-6
+    # Позиция курсора (ранг, id) проверяется пагинатором по типам этих полей
+    position_fields = (Post._meta.get_field('score'), Post._meta.get_field('id'))
+
+    def __init__(self, user: Optional[User] = None):
+        if user is None:
+            self.legs = [(Post.objects.all(), 0.0)]
+            return
+
+        self.legs = []
+        author_ids = list(user.subscribed_users.values_list('id', flat=True))
+        country_ids = list(user.subscribed_countries.values_list('id', flat=True))
+        tag_ids = list(user.subscribed_tags.values_list('id', flat=True))
+        if author_ids:
+            self.legs.append((
+                Post.objects.filter(author_id__in=author_ids),
+                settings.FEED_RANK_AUTHOR_WEIGHT,
+            ))
+        if country_ids:
+            self.legs.append((
+                Post.objects.filter(country_id__in=country_ids).exclude(author_id__in=author_ids),
+                settings.FEED_RANK_COUNTRY_WEIGHT,
+            ))
+        for tag_id in tag_ids:
+            self.legs.append((
+                Post.objects.filter(tag_links__tag_id=tag_id)
+                .exclude(author_id__in=author_ids)
+                .exclude(country_id__in=country_ids),
+                settings.FEED_RANK_TAG_WEIGHT,
+            ))
+
+    @property
+    def querysets(self) -> List[models.QuerySet]:
+        return [queryset for queryset, _ in self.legs]
+
+    def paginate_keyset(self, position: Optional[tuple], reverse: bool, limit: int) -> List[Tuple[tuple, Post]]:
+        """
+        Читает limit постов после позиции (ранг, id) в порядке убывания ранга
+        (или возрастания при reverse) и возвращает пары (позиция, пост).
+        """
+        sources = []
+        for queryset, weight in self.legs:
+            queryset = queryset.order_by('score', 'id') if reverse else queryset.order_by('-score', '-id')
+            if position is not None:
+                rank, post_id = position
+                # Граница по score использует индекс, точное сравнение ранга - только для соседних строк
+                queryset = queryset.annotate(feed_rank=F('score') + Value(weight))
+                if reverse:
+                    queryset = queryset.filter(score__gte=rank - weight - self.rank_epsilon).filter(
+                        Q(feed_rank__gt=rank) | Q(feed_rank=rank, id__gt=post_id)
+                    )
+                else:
+                    queryset = queryset.filter(score__lte=rank - weight + self.rank_epsilon).filter(
+                        Q(feed_rank__lt=rank) | Q(feed_rank=rank, id__lt=post_id)
+                    )
+            sources.append([((post.score + weight, post.id), post) for post in queryset[:limit]])
+
+        merged = heapq.merge(*sources, key=lambda row: row[0], reverse=not reverse)
+        rows, seen = [], set()
+        for row in merged:
+            if row[1].id not in seen:
+                seen.add(row[1].id)
+                rows.append(row)
+            if len(rows) == limit:
+                break
+        return rows
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from apps.posts.models import PostLike, PostTag, Tag, TagActivity, UserLikeActivity
+from apps.users.models import User
+from services.base.service import BaseService
+
+
+class LeaderboardService(BaseService):
+    """
+    Облако тегов и топ пользователей за окно времени (24 часа, 7 дней).
+
+    Счетчики ведутся почасовыми корзинами: TagActivity - посты с тегом по часу
+    публикации поста, UserLikeActivity - лайки постов пользователя по часу записи
+    лайка. Корзины меняются вместе с тегами постов и буфером лайков, поэтому
+    топ за окно суммирует не больше часов окна на объект вместо просмотра
+    постов и лайков. Топ за все время читается по индексам Tag.post_count
+    и User.total_likes.
+
+    Команда rebuild_leaderboards пересобирает корзины с нуля и удаляет часы
+    старше самого длинного окна.
+    """
+    model = TagActivity
+    windows = {
+        '24h': timedelta(hours=24),
+        '7d': timedelta(days=7),
+    }
+
+    @classmethod
+    def get_retention(cls) -> timedelta:
+        return max(cls.windows.values())
+
+    @staticmethod
+    def get_hour(moment: datetime) -> datetime:
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def get_cutoff(cls, window: str) -> datetime:
+        return cls.get_hour(timezone.now()) - cls.windows[window] + timedelta(hours=1)
+
+    @classmethod
+    def tags_changed(cls, created_at: datetime, added_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()) -> None:
+        """
+        Учитывает теги, добавленные к посту и снятые с него (или удаленного поста).
+        """
+        if created_at < timezone.now() - cls.get_retention():
+            return
+        hour = cls.get_hour(created_at)
+        cls.bump(TagActivity, 'tag_id', hour, {1: list(added_ids), -1: list(removed_ids)})
+
+    @classmethod
+    def likes_changed(cls, likes_by_user: Dict[int, int]) -> None:
+        """
+        Учитывает изменения лайков постов пользователей ({id автора: разность}) в текущем часе.
+        """
+        ids_by_delta = defaultdict(list)
+        for user_id, delta in sorted(likes_by_user.items()):
+            ids_by_delta[delta].append(user_id)
+        cls.bump(UserLikeActivity, 'user_id', cls.get_hour(timezone.now()), ids_by_delta)
+
+    @staticmethod
+    def bump(model, column: str, hour: datetime, ids_by_delta: Dict[int, List[int]]) -> None:
+        """
+        Прибавляет разность к корзинам часа: существующие корзины - одним UPDATE
+        на каждую разность, недостающие создаются по одной.
+        """
+        for delta, ids in ids_by_delta.items():
+            if not delta or not ids:
+                continue
+            buckets = model.objects.filter(hour=hour)
+            existing = set(buckets.filter(**{f'{column}__in': ids}).values_list(column, flat=True))
+            buckets.filter(**{f'{column}__in': existing}).update(count=F('count') + delta)
+            for object_id in set(ids) - existing:
+                lookup = {column: object_id, 'hour': hour}
+                try:
+                    with transaction.atomic():
+                        model.objects.create(count=delta, **lookup)
+                except IntegrityError:
+                    # Корзину только что создал параллельный запрос
+                    model.objects.filter(**lookup).update(count=F('count') + delta)
+
+    @classmethod
+    def get_top(cls, model, column: str, window: str, limit: int) -> List[int]:
+        return list(
+            model.objects.filter(hour__gte=cls.get_cutoff(window))
+            .values(column).annotate(total=Sum('count')).filter(total__gt=0)
+            .order_by('-total', column).values_list(column, flat=True)[:limit]
+        )
+
+    @staticmethod
+    def in_order(queryset: models.QuerySet, ids: List[int]) -> List[models.Model]:
+        objects = queryset.in_bulk(ids)
+        return [objects[object_id] for object_id in ids if object_id in objects]
+
+    @classmethod
+    def get_top_tags(cls, window: str, limit: int) -> List[Tag]:
+        return cls.in_order(Tag.objects.all(), cls.get_top(TagActivity, 'tag_id', window, limit))
+
+    @classmethod
+    def get_top_users(cls, window: str, limit: int) -> List[User]:
+        return cls.in_order(User.objects.all(), cls.get_top(UserLikeActivity, 'user_id', window, limit))
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, since: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Пересобирает корзины по тегам постов и лайкам; возвращает количество корзин.
+        """
+        since = since or cls.get_hour(timezone.now()) - cls.get_retention()
+        tag_rows = (
+            PostTag.objects.filter(post_created_at__gte=since).order_by()
+            .values('tag_id', hour=TruncHour('post_created_at')).annotate(count=Count('id'))
+        )
+        like_rows = (
+            PostLike.objects.filter(created_at__gte=since).order_by()
+            .values('post__author_id', hour=TruncHour('created_at')).annotate(count=Count('id'))
+        )
+        rebuilt = {}
+        for model, buckets in (
+            (TagActivity, (TagActivity(**row) for row in tag_rows)),
+            (UserLikeActivity, (
+                UserLikeActivity(user_id=row['post__author_id'], hour=row['hour'], count=row['count'])
+                for row in like_rows
+            )),
+        ):
+            model.objects.all().delete()
+            rebuilt[model.__name__] = len(model.objects.bulk_create(buckets, batch_size=1000))
+        return rebuilt
@@ -0,0 +1,153 @@
+import atexit
+import threading
+from collections import defaultdict
+from typing import Dict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.posts.models import Post, PostLike
+from apps.posts.services.counters import PostCounterService
+from apps.posts.services.ranking import PostScoreService
+from apps.users.models import User
+from services.base.service import BaseService
+
+
+class LikeCounterBuffer:
+    """
+    Буфер изменений Post.likes в памяти процесса.
+
+    Лайки и отмены копятся как разность по посту и записываются пачкой
+    UPDATE ... SET likes = likes + delta (по одному запросу на каждое значение
+    разности) раз в LIKE_COUNTER_FLUSH_INTERVAL секунд или при накоплении
+    LIKE_COUNTER_FLUSH_SIZE постов. Тысячи лайков популярного поста становятся
+    одним обновлением строки вместо очереди за блокировкой.
+
+    Вместе с постами обновляется User.total_likes их авторов.
+
+    Источник истины - таблица PostLike: изменения, потерянные при аварийной
+    остановке процесса, восстанавливает команда recount_likes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._timer = None
+
+    def add(self, post_id: int, delta: int) -> None:
+        with self._lock:
+            self._pending[post_id] = self._pending.get(post_id, 0) + delta
+            interval = settings.LIKE_COUNTER_FLUSH_INTERVAL
+            due = interval <= 0 or len(self._pending) >= settings.LIKE_COUNTER_FLUSH_SIZE
+            if not due and self._timer is None:
+                self._timer = threading.Timer(interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def get_pending(self, post_id: int) -> int:
+        """
+        Еще не записанная в базу разность лайков поста в этом процессе.
+        """
+        return self._pending.get(post_id, 0)
+
+    def flush(self) -> int:
+        """
+        Записывает накопленные изменения; возвращает количество обновленных постов.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        post_ids_by_delta = defaultdict(list)
+        for post_id, delta in sorted(pending.items()):
+            if delta:
+                post_ids_by_delta[delta].append(post_id)
+        if not post_ids_by_delta:
+            return 0
+
+        try:
+            with transaction.atomic():
+                for delta, post_ids in post_ids_by_delta.items():
+                    # Отмена, записанная раньше лайка из другого процесса, не уводит счетчик ниже нуля
+                    likes = F('likes') + delta if delta > 0 else Greatest(F('likes') + delta, 0)
+                    Post.objects.filter(id__in=post_ids).update(likes=likes)
+                PostCounterService.likes_changed(pending)
+        except Exception:
+            # Не теряем изменения: вернем их в буфер до следующей записи
+            with self._lock:
+                for post_id, delta in pending.items():
+                    self._pending[post_id] = self._pending.get(post_id, 0) + delta
+            raise
+
+        post_ids = [post_id for post_ids in post_ids_by_delta.values() for post_id in post_ids]
+        PostScoreService.refresh(post_ids)
+        return len(post_ids)
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+like_counter_buffer = LikeCounterBuffer()
+atexit.register(like_counter_buffer.flush)
+
+
+class LikePostService(BaseService):
+    """
+    Лайки постов. Лайк и отмена идемпотентны: повторный запрос не меняет счетчик.
+    """
+    model = PostLike
+    counter_buffer = like_counter_buffer
+
+    @classmethod
+    def like(cls, user: User, post_id: int) -> bool:
+        """
+        Ставит лайк; возвращает True, если лайка еще не было.
+        """
+        _, created = cls.model.objects.get_or_create(user=user, post_id=post_id)
+        if created:
+            cls.counter_buffer.add(post_id, 1)
+        return created
+
+    @classmethod
+    def unlike(cls, user: User, post_id: int) -> bool:
+        """
+        Снимает лайк; возвращает True, если лайк был.
+        """
+        deleted, _ = cls.model.objects.filter(user=user, post_id=post_id).delete()
+        if deleted:
+            cls.counter_buffer.add(post_id, -1)
+        return bool(deleted)
+
+    @classmethod
+    def get_likes(cls, post: Post) -> int:
+        """
+        Счетчик лайков с учетом еще не записанных изменений этого процесса.
+        """
+        return max(post.likes + cls.counter_buffer.get_pending(post.id), 0)
+
+    @classmethod
+    def recount(cls, post_ids=None) -> int:
+        """
+        Пересчитывает Post.likes (и User.total_likes авторов) по таблице лайков;
+        возвращает количество исправленных постов.
+        """
+        cls.counter_buffer.flush()
+        posts = Post.objects.all() if post_ids is None else Post.objects.filter(id__in=post_ids)
+        likes = cls.model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(count=Count('id')).values('count')
+        stale = posts.annotate(actual=Coalesce(Subquery(likes), 0)).exclude(likes=F('actual'))
+        stale_ids = list(stale.values_list('id', flat=True))
+        Post.objects.filter(id__in=stale_ids).update(likes=Coalesce(Subquery(likes), 0))
+        PostCounterService.refresh_total_likes(
+            Post.objects.filter(id__in=stale_ids).values_list('author_id', flat=True).distinct()
+        )
+        PostScoreService.refresh(stale_ids)
+        return len(stale_ids)
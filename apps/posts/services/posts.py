@@ -1,8 +1,20 @@
-from django.db.models import Q
+from typing import Callable, Iterable, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
 from django.http import JsonResponse
 
-from apps.posts.models import Post
+from apps.countries.models import Country
+from apps.posts.models import Post, PostImage, PostTag, Tag
+from apps.posts.services.counters import PostCounterService
+from apps.posts.services.feed import MergedFeed, RankedFeed, SubscriptionFeed
+from apps.posts.services.likes import LikePostService
+from apps.posts.services.ranking import PostScoreService
+from apps.posts.services.timeline import TimelineService
 from apps.users.models import User
+from services.base.cache import CachedPayload
 from services.base.service import BaseService
 
 
@@ -18,6 +30,51 @@ class UpdatePostService(BaseService):
     Service for updating posts.
     """
     model = Post
+    # Счетчики меняются только атомарными F()-обновлениями (лайки, комментарии, рейтинг)
+    counter_fields = ('likes', 'comment_count', 'score')
+
+    @classmethod
+    def update(cls, object_id: int, **kwargs):
+        """
+        Обновляет пост, сохраняя только переданные поля: сохранение всей строки
+        перезаписало бы счетчики, измененные параллельно. Ключи, не являющиеся
+        редактируемыми полями поста, отбрасываются.
+        """
+        editable_fields = cls.get_editable_fields()
+        kwargs = {field: value for field, value in kwargs.items() if field in editable_fields}
+        # Страна приходит из тела запроса как ID
+        if 'country' in kwargs and not isinstance(kwargs['country'], Country):
+            kwargs['country_id'] = kwargs.pop('country')
+        obj = cls.get_by_id(object_id)
+        for attr, value in kwargs.items():
+            setattr(obj, attr, value)
+        obj.save(update_fields=[*kwargs, 'updated_at'])
+        return obj
+
+    @classmethod
+    def get_editable_fields(cls) -> Set[str]:
+        """
+        Поля поста, которые можно изменить запросом: собственные столбцы таблицы
+        без первичного ключа, служебных дат и счетчиков.
+        """
+        return {
+            field.name for field in cls.model._meta.concrete_fields
+            if field.editable and not field.primary_key and field.name not in cls.counter_fields
+        }
+
+    @staticmethod
+    def set_tags(post: Post, tag_ids: Iterable[int]) -> Tuple[Set[int], Set[int]]:
+        """
+        Заменяет теги поста; возвращает ID добавленных и удаленных тегов.
+        """
+        current = set(post.tag_links.values_list('tag_id', flat=True))
+        requested = set(Tag.objects.filter(id__in=list(tag_ids)).values_list('id', flat=True))
+        added, removed = requested - current, current - requested
+        PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+        PostTag.objects.bulk_create(
+            PostTag(post=post, tag_id=tag_id, post_created_at=post.created_at) for tag_id in sorted(added)
+        )
+        return added, removed
 
 
 class DeletePostService(BaseService):
@@ -37,25 +94,101 @@ class ListPostService(BaseService):
     def get_main_page_posts_for_authenticated_user(user):
         """
         Получить посты для авторизованного пользователя, основываясь на его подписках.
-        """
-        subscribed_users = user.subscribed_users.all()
-        subscribed_countries = user.subscribed_countries.all()
-        subscribed_tags = user.subscribed_tags.all()
 
-        posts = Post.objects.filter(
-            Q(author__in=subscribed_users) |
-            Q(country__in=subscribed_countries) |
-            Q(tags__in=subscribed_tags)
-        ).distinct().order_by('-created_at')
+        Лента материализуется при публикации поста и при изменении подписок,
+        поэтому здесь читается готовый отсортированный срез TimelineEntry.
+        Посты популярных авторов в ленты не раскладываются и подмешиваются здесь.
 
-        return posts
+        Если материализованная лента отключена (FEED_MATERIALIZED_TIMELINE),
+        лента собирается из индексных веток по подпискам.
+        """
+        if not settings.FEED_MATERIALIZED_TIMELINE:
+            return SubscriptionFeed(user)
+
+        timeline_posts = TimelineService.get_posts(user)
+        pulled_posts = TimelineService.get_pulled_posts(user)
+        if pulled_posts is None:
+            return timeline_posts
+        return MergedFeed(timeline_posts, pulled_posts)
 
     @staticmethod
     def get_main_page_posts_for_unauthenticated_user():
         """
         Получить последние 10 постов для неавторизованного пользователя.
         """
-        return Post.objects.all().order_by('-created_at')[:10]
+        return Post.objects.all().order_by('-created_at', '-id')[:10]
+
+    @staticmethod
+    def get_ranked_main_page_posts(user: Optional[User] = None) -> RankedFeed:
+        """
+        Получить посты главной страницы, отсортированные по рейтингу
+        с учетом подписок пользователя (для анонимного - по рейтингу).
+        """
+        return RankedFeed(user)
+
+    @staticmethod
+    def get_author_posts(author_id: int, country_id: Optional[int] = None, without_country: bool = False) -> models.QuerySet:
+        """
+        Посты автора (при необходимости - в одной стране или без страны), от новых к старым.
+        """
+        posts = Post.objects.filter(author_id=author_id)
+        if without_country:
+            posts = posts.filter(country__isnull=True)
+        elif country_id is not None:
+            posts = posts.filter(country_id=country_id)
+        return posts.order_by('-created_at', '-id')
+
+    @staticmethod
+    def get_country_posts(country_id: int) -> models.QuerySet:
+        """
+        Посты страны, от новых к старым (индекс posts_post_country_created).
+        """
+        return Post.objects.filter(country_id=country_id).order_by('-created_at', '-id')
+
+    @staticmethod
+    def get_latest_posts_by_country(author_ids: Sequence[int], limit: int) -> models.QuerySet:
+        """
+        Не более limit последних постов каждого автора в каждой стране одним запросом:
+        посты нумеруются оконной функцией внутри пары (автор, страна).
+        """
+        return Post.objects.filter(author_id__in=author_ids).annotate(
+            country_rank=Window(
+                RowNumber(),
+                partition_by=[F('author_id'), F('country_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(country_rank__lte=limit).order_by('-created_at', '-id')
+
+    @staticmethod
+    def count_posts_by_country(author_ids: Sequence[int]) -> models.QuerySet:
+        """
+        Количество постов каждого автора по странам; страны по алфавиту, посты без страны в конце.
+        """
+        return Post.objects.filter(author_id__in=author_ids).values(
+            'author_id', 'country_id', 'country__name'
+        ).annotate(count=Count('id')).order_by(F('country__name').asc(nulls_last=True))
+
+
+class HomePageSnapshotService:
+    """
+    Готовый (уже закодированный) ответ главной страницы для анонимных пользователей.
+
+    Все анонимные посетители получают одни и те же последние посты, поэтому ответ
+    строится один раз, хранится в общем кеше и сбрасывается при создании,
+    изменении и удалении постов. Без общего кеша (HOME_PAGE_SNAPSHOT_ENABLED
+    выключен без REDIS_URL) ответ собирается на каждый запрос.
+    """
+    payload = CachedPayload('posts:home_page:anonymous', settings.HOME_PAGE_SNAPSHOT_TIMEOUT)
+
+    @classmethod
+    def get_payload(cls, variant: str, build: Callable[[], bytes]) -> bytes:
+        if not settings.HOME_PAGE_SNAPSHOT_ENABLED:
+            return build()
+        return cls.payload.get_or_build(variant, build)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls.payload.invalidate()
 
 
 class RetrievePostService(BaseService):
@@ -72,21 +205,65 @@ class PostService:
                  delete_service: DeletePostService,
                  list_service: ListPostService,
                  retrieve_service: RetrievePostService,
+                 timeline_service: TimelineService,
+                 like_service: LikePostService,
                  ):
         self.create_service = create_service
         self.update_service = update_service
         self.delete_service = delete_service
         self.list_service = list_service
         self.retrieve_service = retrieve_service
+        self.timeline_service = timeline_service
+        self.like_service = like_service
 
-    def create_post(self, **kwargs) -> Post:
-        return self.create_service.create(**kwargs)
+    def create_post(self, images: Iterable = (), **kwargs) -> Post:
+        with transaction.atomic():
+            post = self.create_service.create(**kwargs)
+            for image in images:
+                PostImage.objects.create(post=post, image=image)
+            PostCounterService.post_created(post)
+            # Раскладка по лентам выполняется после коммита, вне транзакции создания поста
+            transaction.on_commit(lambda: self.timeline_service.fan_out_post(post))
+        PostScoreService.refresh_post(post)
+        HomePageSnapshotService.invalidate()
+        return post
 
-    def update_post(self, post_id: int, **kwargs) -> Post:
-        return self.update_service.update(post_id, **kwargs)
+    def update_post(self, post_id: int, tags: Optional[Iterable[int]] = None, **kwargs) -> Post:
+        with transaction.atomic():
+            previous_country_id = self.retrieve_service.get_by_id(post_id).country_id
+            post = self.update_service.update(post_id, **kwargs)
+            PostCounterService.country_changed(post, previous_country_id)
+            if tags is not None:
+                added, removed = self.update_service.set_tags(post, tags)
+                PostCounterService.tags_changed(post, added, removed)
+        PostScoreService.refresh_post(post)
+        self.timeline_service.refresh_post(post)
+        HomePageSnapshotService.invalidate()
+        return post
 
     def delete_post(self, post_id: int) -> JsonResponse:
-        return self.delete_service.delete(post_id)
+        with transaction.atomic():
+            post = self.retrieve_service.get_by_id(post_id)
+            tag_ids = list(post.tag_links.values_list('tag_id', flat=True))
+            response = self.delete_service.delete(post_id)
+            PostCounterService.post_deleted(post, tag_ids)
+        HomePageSnapshotService.invalidate()
+        return response
+
+    def like_post(self, user: User, post_id: int) -> Post:
+        post = self.retrieve_service.get_by_id(post_id)
+        self.like_service.like(user, post.id)
+        post.refresh_from_db(fields=['likes'])
+        return post
+
+    def unlike_post(self, user: User, post_id: int) -> Post:
+        post = self.retrieve_service.get_by_id(post_id)
+        self.like_service.unlike(user, post.id)
+        post.refresh_from_db(fields=['likes'])
+        return post
+
+    def get_likes(self, post: Post) -> int:
+        return self.like_service.get_likes(post)
 
     def list_posts(self):
         return self.list_service.get_all()
@@ -100,3 +277,6 @@ class PostService:
     def get_posts_for_unauthenticated_user(self):
         return self.list_service.get_main_page_posts_for_unauthenticated_user()
 
+    def get_ranked_posts(self, user: Optional[User] = None):
+        return self.list_service.get_ranked_main_page_posts(user)
+
@@ -0,0 +1,70 @@
+import math
+from datetime import datetime
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from apps.posts.models import Post
+from services.base.service import BaseService
+
+
+class PostScoreService(BaseService):
+    """
+    Сервис рейтинга постов для ранжированной ленты.
+
+    Рейтинг хранится в Post.score: log10 от вовлеченности (лайки и комментарии)
+    плюс время публикации, деленное на FEED_RANK_DECAY_SECONDS. Время входит
+    в рейтинг линейно, поэтому затухание не требует пересчета старых постов:
+    рейтинг меняется только вместе с лайками и комментариями, и лента читается
+    по индексу как top-N.
+    """
+    model = Post
+    batch_size = 1000
+
+    @staticmethod
+    def compute_score(likes: int, comment_count: int, created_at: datetime) -> float:
+        engagement = likes * settings.FEED_RANK_LIKE_WEIGHT + comment_count * settings.FEED_RANK_COMMENT_WEIGHT
+        return math.log10(max(engagement, 1)) + created_at.timestamp() / settings.FEED_RANK_DECAY_SECONDS
+
+    @classmethod
+    def refresh_post(cls, post: Post) -> None:
+        """
+        Обновляет рейтинг поста, загруженного из базы.
+        """
+        post.score = cls.compute_score(post.likes, post.comment_count, post.created_at)
+        cls.model.objects.filter(pk=post.pk).update(score=post.score)
+
+    @classmethod
+    def refresh(cls, post_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает рейтинг постов по актуальным счетчикам.
+        """
+        posts = cls.model.objects.filter(pk__in=list(post_ids)).only('id', 'likes', 'comment_count', 'created_at')
+        for post in posts:
+            post.score = cls.compute_score(post.likes, post.comment_count, post.created_at)
+        cls.model.objects.bulk_update(posts, ['score'], batch_size=cls.batch_size)
+
+    @classmethod
+    def change_comment_count(cls, post_id: int, delta: int) -> None:
+        comment_count = F('comment_count') + delta if delta > 0 else Greatest(F('comment_count') + delta, 0)
+        cls.model.objects.filter(pk=post_id).update(comment_count=comment_count)
+        cls.refresh([post_id])
+
+    @classmethod
+    def refresh_all(cls) -> int:
+        """
+        Полный пересчет рейтинга, например после изменения весов.
+        """
+        refreshed = 0
+        post_ids = cls.model.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for post_id in post_ids.iterator(chunk_size=cls.batch_size):
+            batch.append(post_id)
+            if len(batch) == cls.batch_size:
+                cls.refresh(batch)
+                refreshed += len(batch)
+                batch = []
+        cls.refresh(batch)
+        return refreshed + len(batch)
@@ -0,0 +1,189 @@
+from typing import Iterable, Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F
+
+from apps.posts.models import Post, TimelineEntry
+from apps.posts.services.feed import SubscriptionFeed
+from apps.users.models import User
+from services.base.service import BaseService
+
+
+class TimelineService(BaseService):
+    """
+    Сервис материализованной ленты (fan-out on write).
+
+    Лента пользователя хранится в TimelineEntry и пополняется при публикации поста,
+    а при подписке и отписке дополняется или очищается, поэтому главная страница
+    читает готовый отсортированный срез вместо OR-запроса по всем подпискам.
+
+    Посты авторов, у которых не меньше FEED_PULL_FOLLOWER_THRESHOLD подписчиков,
+    по лентам подписчиков не раскладываются: они подмешиваются при чтении.
+    Такой автор остается в этом режиме (User.feed_pulled) и после того, как число
+    подписчиков снова опустится ниже порога: посты, опубликованные без fan-out,
+    иначе пропали бы из лент его подписчиков.
+    """
+    model = TimelineEntry
+    batch_size = 1000
+    pulled_authors_cache_key = 'posts:timeline:pulled_author_ids'
+
+    @classmethod
+    def get_pulled_author_ids(cls) -> Set[int]:
+        """
+        Авторы, посты которых читаются при запросе ленты (User.feed_pulled).
+        """
+        pulled_author_ids = cache.get(cls.pulled_authors_cache_key)
+        if pulled_author_ids is None:
+            pulled_author_ids = set(User.objects.filter(feed_pulled=True).values_list('id', flat=True))
+            cache.set(cls.pulled_authors_cache_key, pulled_author_ids, settings.FEED_PULL_AUTHORS_CACHE_TIMEOUT)
+        return pulled_author_ids
+
+    @classmethod
+    def promote_pulled_authors(cls, author_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Помечает feed_pulled авторов, достигших порога FEED_PULL_FOLLOWER_THRESHOLD
+        (всех или только author_ids); возвращает количество помеченных.
+
+        Вызывается при подписке, пересчете подписчиков и командой promote_pulled_authors.
+        Пометка не снимается: однажды попавший в набор автор из него не выпадает.
+        """
+        authors = User.objects.filter(followers_count__gte=settings.FEED_PULL_FOLLOWER_THRESHOLD, feed_pulled=False)
+        if author_ids is not None:
+            authors = authors.filter(id__in=list(author_ids))
+        promoted = authors.update(feed_pulled=True)
+        if promoted:
+            transaction.on_commit(lambda: cache.delete(cls.pulled_authors_cache_key))
+        return promoted
+
+    @classmethod
+    def is_pulled_author(cls, author_id: int) -> bool:
+        return author_id in cls.get_pulled_author_ids()
+
+    @classmethod
+    def get_follower_ids(cls, post: Post) -> Set[int]:
+        """
+        Собирает пользователей, подписанных на автора, страну или теги поста.
+
+        Каждая подписка читается отдельным запросом по индексу связующей таблицы,
+        чтобы не строить OR-join с DISTINCT на пути записи. Подписчики популярного
+        автора пропускаются: его посты они получат при чтении ленты.
+        """
+        follower_ids = set()
+        if not cls.is_pulled_author(post.author_id):
+            follower_ids.update(
+                User.subscribed_users.through.objects
+                .filter(to_user_id=post.author_id)
+                .values_list('from_user_id', flat=True)
+            )
+        if post.country_id:
+            follower_ids.update(
+                User.subscribed_countries.through.objects
+                .filter(country_id=post.country_id)
+                .values_list('user_id', flat=True)
+            )
+        tag_ids = list(post.tags.values_list('id', flat=True))
+        if tag_ids:
+            follower_ids.update(
+                User.subscribed_tags.through.objects
+                .filter(tag_id__in=tag_ids)
+                .values_list('user_id', flat=True)
+            )
+        return follower_ids
+
+    @classmethod
+    def _insert(cls, user_ids: Iterable[int], post_id: int, created_at) -> None:
+        """
+        Вставляет записи ленты пачками по batch_size: вне транзакции каждая пачка
+        фиксируется отдельно, и в памяти не держится весь список записей.
+        """
+        user_ids = sorted(user_ids)
+        for start in range(0, len(user_ids), cls.batch_size):
+            entries = [
+                cls.model(user_id=user_id, post_id=post_id, created_at=created_at)
+                for user_id in user_ids[start:start + cls.batch_size]
+            ]
+            cls.model.objects.bulk_create(entries, ignore_conflicts=True)
+
+    @classmethod
+    def fan_out_post(cls, post: Post) -> None:
+        """
+        Добавляет новый пост в ленты всех его подписчиков.
+        Вызывается после коммита транзакции, в которой пост создан.
+        """
+        cls._insert(cls.get_follower_ids(post), post.id, post.created_at)
+
+    @classmethod
+    def refresh_post(cls, post: Post) -> None:
+        """
+        Пересчитывает получателей поста после изменения страны или тегов.
+        """
+        follower_ids = cls.get_follower_ids(post)
+        with transaction.atomic():
+            cls.model.objects.filter(post_id=post.id).exclude(user_id__in=follower_ids).delete()
+            cls._insert(follower_ids, post.id, post.created_at)
+
+    @classmethod
+    def backfill(cls, user: User, posts: models.QuerySet) -> None:
+        """
+        Переносит в ленту пользователя последние посты из новой подписки.
+        """
+        recent_posts = posts.order_by('-created_at').values_list('id', 'created_at')
+        entries = [
+            cls.model(user_id=user.id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts[:settings.TIMELINE_BACKFILL_LIMIT]
+        ]
+        cls.model.objects.bulk_create(entries, batch_size=cls.batch_size, ignore_conflicts=True)
+
+    @classmethod
+    def prune(cls, user: User, posts: models.QuerySet) -> None:
+        """
+        Убирает из ленты посты отмененной подписки, если они не попадают
+        в ленту через оставшиеся подписки пользователя.
+        """
+        cls.model.objects.filter(user=user, post__in=posts.values('id')).exclude(
+            post__author__in=user.subscribed_users.all()
+        ).exclude(
+            post__country__in=user.subscribed_countries.all()
+        ).exclude(
+            post__tags__in=user.subscribed_tags.all()
+        ).delete()
+
+    @classmethod
+    def rebuild_for_user(cls, user: User) -> None:
+        """
+        Полностью перестраивает ленту пользователя по его текущим подпискам.
+        """
+        posts = SubscriptionFeed(user).latest(settings.TIMELINE_BACKFILL_LIMIT)
+        entries = [cls.model(user_id=user.id, post_id=post.id, created_at=post.created_at) for post in posts]
+        with transaction.atomic():
+            cls.model.objects.filter(user=user).delete()
+            cls.model.objects.bulk_create(entries, batch_size=cls.batch_size)
+
+    @staticmethod
+    def get_posts(user: User) -> models.QuerySet:
+        """
+        Посты из ленты пользователя, от новых к старым.
+
+        Ключ сортировки берется из TimelineEntry через аннотации, чтобы курсорная
+        пагинация фильтровала по тому же соединению и индексу ленты.
+        """
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_created_at=F('timeline_entries__created_at'),
+            feed_post_id=F('timeline_entries__post_id'),
+        ).order_by('-feed_created_at', '-feed_post_id')
+
+    @classmethod
+    def get_pulled_posts(cls, user: User) -> Optional[models.QuerySet]:
+        """
+        Посты популярных авторов из подписок пользователя, от новых к старым.
+        Возвращает None, если пользователь на таких авторов не подписан.
+        """
+        pulled_author_ids = cls.get_pulled_author_ids()
+        if not pulled_author_ids:
+            return None
+        author_ids = pulled_author_ids.intersection(user.subscribed_users.values_list('id', flat=True))
+        if not author_ids:
+            return None
+        return SubscriptionFeed.author_leg(author_ids)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.posts.models import Comment
+from apps.posts.services.ranking import PostScoreService
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance: Comment, created: bool, **kwargs):
+    """Учитываем новый комментарий в счетчике и рейтинге поста."""
+    if created:
+        PostScoreService.change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance: Comment, **kwargs):
+    """Учитываем удаленный комментарий в счетчике и рейтинге поста."""
+    PostScoreService.change_comment_count(instance.post_id, -1)
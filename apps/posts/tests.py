@@ -1,3 +1,816 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.countries.models import Country
+from apps.posts.models import Comment, Post, PostImage, PostLike, PostTag, Tag, TagActivity, TimelineEntry, UserLikeActivity
+from apps.posts.serializers import PostSerializer, PostValuesSerializer, TagSerializer, TagValuesSerializer
+from apps.posts.services.counters import PostCounterService
+from apps.posts.services.dashboard import DashboardSnapshotService
+from apps.posts.services.feed import RankedFeed, SubscriptionFeed
+from apps.posts.services.leaderboard import LeaderboardService
+from apps.posts.services.likes import LikePostService, like_counter_buffer
+from apps.posts.services.posts import ListPostService
+from apps.posts.services.timeline import TimelineService
+from apps.posts.views import create_post_service
+from apps.users.models import User
+from apps.users.services.user import SubscriptionService
+
+
+class PostListQueryCountTests(TestCase):
+    """
+    Списки постов выполняют постоянное число запросов независимо от размера страницы:
+    PostValuesSerializer читает страницу постов, затем теги и изображения всей страницы
+    в load_related.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.reader = User.objects.create_user(email='reader@example.com', password='password123', username='reader')
+        cls.country = Country.objects.create(name='Kazakhstan')
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+        cls.reader.subscribed_users.add(cls.author)
+        for i in range(15):
+            post = Post.objects.create(title=f'Post {i}', body='Body', author=cls.author, country=cls.country)
+            post.tags.add(*cls.tags)
+            PostImage.objects.create(post=post, image=f'post_images/{i}-1.jpg')
+            PostImage.objects.create(post=post, image=f'post_images/{i}-2.jpg')
+            TimelineService.fan_out_post(post)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_post_list(self):
+        # страница постов + теги и изображения страницы (PostValuesSerializer.load_related)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/posts/?limit=10')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_home_page(self):
+        # список популярных авторов уже в кеше: страница ленты + теги и изображения страницы
+        TimelineService.get_pulled_author_ids()
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/home_page/?limit=10')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_ranked_home_page(self):
+        # подписки на авторов, страны и теги, ветка авторов + теги и изображения страницы
+        for limit in (2, 10):
+            with self.subTest(limit=limit), self.assertNumQueries(6):
+                response = self.client.get(f'/api/home_page/?order=ranked&limit={limit}')
+            self.assertEqual(len(response.json()['results']), limit)
+
+    def test_anonymous_home_page(self):
+        # страница постов + теги и изображения страницы
+        with self.assertNumQueries(3):
+            response = APIClient().get('/api/home_page/?limit=10')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_dashboard(self):
+        # сборка ответа: последние посты + их теги и изображения, топ пользователей, облако тегов
+        cache.clear()
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(len(response.json()['latest_posts'][0]['tags']), 3)
+
+    def test_country_posts(self):
+        # страна, страница постов + теги и изображения страницы
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/countries/{self.country.id}/posts/?limit=10')
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertEqual(len(response.json()['results'][0]['images']), 2)
+        self.assertEqual(len(response.json()['results'][0]['tags']), 3)
+
+
+class TimelineServiceTests(TestCase):
+    """Материализованная лента пополняется при публикации и меняется вместе с подписками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.other = User.objects.create_user(email='other@example.com', password='password123', username='other')
+        cls.reader = User.objects.create_user(email='reader@example.com', password='password123', username='reader')
+        cls.japan = Country.objects.create(name='Japan')
+        cls.peru = Country.objects.create(name='Peru')
+        cls.travel = Tag.objects.create(name='travel')
+
+    def setUp(self):
+        cache.clear()
+
+    def timeline(self, user):
+        return list(TimelineEntry.objects.filter(user=user).order_by('-created_at', '-post_id').values_list('post__title', flat=True))
+
+    def test_fan_out_after_commit(self):
+        SubscriptionService(self.reader).subscribe_to_user(self.author.id)
+        country_reader = User.objects.create_user(email='country@example.com', password='password123', username='country')
+        SubscriptionService(country_reader).subscribe_to_country(self.japan)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            create_post_service().create_post(title='Post', body='Body', author=self.author, country=self.japan)
+            self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.timeline(self.reader), ['Post'])
+        self.assertEqual(self.timeline(country_reader), ['Post'])
+        self.assertEqual(self.timeline(self.other), [])
+
+    def test_fan_out_in_batches(self):
+        readers = [
+            User.objects.create_user(email=f'reader{i}@example.com', password='password123', username=f'reader{i}')
+            for i in range(5)
+        ]
+        for reader in readers:
+            SubscriptionService(reader).subscribe_to_user(self.author.id)
+        post = Post.objects.create(title='Post', body='Body', author=self.author)
+
+        with mock.patch.object(TimelineService, 'batch_size', 2), \
+                mock.patch.object(TimelineEntry.objects, 'bulk_create', wraps=TimelineEntry.objects.bulk_create) as bulk_create:
+            TimelineService.fan_out_post(post)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(TimelineEntry.objects.filter(post=post).count(), 5)
+
+    def test_backfill_and_prune(self):
+        Post.objects.create(title='Author in Japan', body='Body', author=self.author, country=self.japan)
+        Post.objects.create(title='Author in Peru', body='Body', author=self.author, country=self.peru)
+        Post.objects.create(title='Other in Japan', body='Body', author=self.other, country=self.japan)
+        service = SubscriptionService(self.reader)
+
+        service.subscribe_to_user(self.author.id)
+        self.assertEqual(self.timeline(self.reader), ['Author in Peru', 'Author in Japan'])
+        service.subscribe_to_country(self.japan)
+        self.assertEqual(self.timeline(self.reader), ['Other in Japan', 'Author in Peru', 'Author in Japan'])
+
+        # пост автора в Японии остается в ленте через подписку на страну
+        service.unsubscribe_from_user(self.author.id)
+        self.assertEqual(self.timeline(self.reader), ['Other in Japan', 'Author in Japan'])
+        service.unsubscribe_from_country(self.japan)
+        self.assertEqual(self.timeline(self.reader), [])
+
+    def test_rebuild_for_user(self):
+        posts = [
+            Post.objects.create(title='Tagged', body='Body', author=self.other),
+            Post.objects.create(title='Author', body='Body', author=self.author),
+            Post.objects.create(title='Unrelated', body='Body', author=self.other),
+        ]
+        posts[0].tags.add(self.travel)
+        self.reader.subscribed_users.add(self.author)
+        self.reader.subscribed_tags.add(self.travel)
+        TimelineEntry.objects.create(user=self.reader, post=posts[2], created_at=posts[2].created_at)
+
+        TimelineService.rebuild_for_user(self.reader)
+        self.assertEqual(self.timeline(self.reader), ['Author', 'Tagged'])
+
+    @override_settings(FEED_PULL_FOLLOWER_THRESHOLD=1)
+    def test_pulled_posts_are_merged(self):
+        SubscriptionService(self.reader).subscribe_to_user(self.author.id)
+        SubscriptionService(self.reader).subscribe_to_country(self.japan)
+        cache.clear()
+        for title, author, country in (
+            ('Japan 1', self.other, self.japan),
+            ('Author 1', self.author, None),
+            ('Author in Japan', self.author, self.japan),
+            ('Japan 2', self.other, self.japan),
+        ):
+            TimelineService.fan_out_post(Post.objects.create(title=title, body='Body', author=author, country=country))
+
+        # посты популярного автора в ленту не раскладываются, кроме попавших туда через страну
+        self.assertEqual(self.timeline(self.reader), ['Japan 2', 'Author in Japan', 'Japan 1'])
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        first_page = client.get('/api/home_page/?limit=2').json()
+        second_page = client.get(first_page['next']).json()
+        self.assertEqual(
+            [post['title'] for post in first_page['results'] + second_page['results']],
+            ['Japan 2', 'Author in Japan', 'Author 1', 'Japan 1'],
+        )
+        self.assertIsNone(second_page['next'])
+
+
+class KeysetPaginationTests(TestCase):
+    """Курсоры ведут по страницам в обе стороны и не сдвигаются при вставке новых постов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        for i in range(5):
+            Post.objects.create(title=f'Post {i}', body='Body', author=cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def titles(self, page):
+        return [post['title'] for post in page['results']]
+
+    def test_next_and_previous_links(self):
+        first_page = self.client.get('/api/posts/?limit=2').json()
+        self.assertEqual(self.titles(first_page), ['Post 4', 'Post 3'])
+        self.assertIsNone(first_page['previous'])
+        self.assertIsNone(first_page['count'])
+
+        second_page = self.client.get(first_page['next']).json()
+        self.assertEqual(self.titles(second_page), ['Post 2', 'Post 1'])
+        last_page = self.client.get(second_page['next']).json()
+        self.assertEqual(self.titles(last_page), ['Post 0'])
+        self.assertIsNone(last_page['next'])
+
+        self.assertEqual(self.titles(self.client.get(last_page['previous']).json()), ['Post 2', 'Post 1'])
+        previous_page = self.client.get(second_page['previous']).json()
+        self.assertEqual(self.titles(previous_page), ['Post 4', 'Post 3'])
+        self.assertIsNone(previous_page['previous'])
+
+    def test_count_is_optional(self):
+        self.assertEqual(self.client.get('/api/posts/?limit=2&count=true').json()['count'], 5)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'eyJyIjowfQ==', 'eyJyIjowLCJwIjpbeyJkdCI6Im5vIn0sMV19'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/posts/?cursor={cursor}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Invalid cursor'})
+
+    def assertCursorRejected(self, url, payload, **params):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        response = self.client.get(url, {'cursor': cursor, **params})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'cursor': 'Invalid cursor'})
+
+    def test_cursor_with_wrong_arity(self):
+        self.assertCursorRejected('/api/posts/', {'r': 0, 'p': [1]})
+
+    def test_cursor_with_wrong_value_types(self):
+        for position in (['x', 1], [1, 1], [{'dt': '2024-01-01T00:00:00'}, 1], [None, 1]):
+            with self.subTest(position=position):
+                self.assertCursorRejected('/api/posts/', {'r': 0, 'p': position})
+        self.assertCursorRejected('/api/home_page/', {'r': 0, 'p': [{'dt': '2024-01-01T00:00:00+00:00'}, 'x']})
+
+    def test_ranked_cursor_with_wrong_arity(self):
+        for position in ([1.5, 1, 1], [1.5], ['x', 1]):
+            with self.subTest(position=position):
+                self.assertCursorRejected('/api/home_page/', {'r': 0, 'p': position}, order='ranked')
+
+    def test_pages_are_stable_under_inserts(self):
+        first_page = self.client.get('/api/posts/?limit=2').json()
+        Post.objects.create(title='Post 5', body='Body', author=self.author)
+        second_page = self.client.get(first_page['next']).json()
+        self.assertEqual(self.titles(second_page), ['Post 2', 'Post 1'])
+        self.assertEqual(self.titles(self.client.get(second_page['previous']).json()), ['Post 4', 'Post 3'])
+
+
+@override_settings(FEED_MATERIALIZED_TIMELINE=False)
+class SubscriptionFeedTests(TestCase):
+    """Лента без материализации собирается из веток авторов, стран и тегов без дубликатов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.other = User.objects.create_user(email='other@example.com', password='password123', username='other')
+        cls.reader = User.objects.create_user(email='reader@example.com', password='password123', username='reader')
+        japan, peru = Country.objects.create(name='Japan'), Country.objects.create(name='Peru')
+        travel, food, sea = (Tag.objects.create(name=name) for name in ('travel', 'food', 'sea'))
+        cls.reader.subscribed_users.add(cls.author)
+        cls.reader.subscribed_countries.add(japan)
+        cls.reader.subscribed_tags.add(travel, food)
+        for title, author, country, tags in (
+            ('Author', cls.author, None, []),
+            ('Country', cls.other, japan, []),
+            ('Two tags', cls.other, None, [travel, food]),
+            ('Unrelated', cls.other, peru, [sea]),
+            ('All legs', cls.author, japan, [travel, food]),
+            ('Tag', cls.other, peru, [food]),
+        ):
+            post = Post.objects.create(title=title, body='Body', author=author, country=country)
+            post.tags.add(*tags)
+
+    def test_latest(self):
+        self.assertEqual(
+            [post.title for post in SubscriptionFeed(self.reader).latest(10)],
+            ['Tag', 'All legs', 'Two tags', 'Country', 'Author'],
+        )
+
+    def test_single_leg(self):
+        user = User.objects.create_user(email='tags@example.com', password='password123', username='tags')
+        user.subscribed_tags.add(*Tag.objects.filter(name__in=['travel', 'food']))
+        self.assertEqual([post.title for post in SubscriptionFeed(user).latest(10)], ['Tag', 'All legs', 'Two tags'])
+        self.assertEqual(SubscriptionFeed(self.other).latest(10), [])
+
+    def test_home_page_pages(self):
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        for limit in (1, 2, 10):
+            with self.subTest(limit=limit):
+                titles, url = [], f'/api/home_page/?limit={limit}'
+                while url:
+                    page = client.get(url).json()
+                    titles += [post['title'] for post in page['results']]
+                    url = page['next']
+                self.assertEqual(titles, ['Tag', 'All legs', 'Two tags', 'Country', 'Author'])
+
+    def test_legs_do_not_use_distinct(self):
+        for leg in SubscriptionFeed(self.reader).querysets:
+            self.assertFalse(leg.query.distinct)
+
+
+class RankedFeedTests(TestCase):
+    """Ранжированная лента упорядочена по рейтингу поста с надбавкой за тип подписки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.other = User.objects.create_user(email='other@example.com', password='password123', username='other')
+        cls.reader = User.objects.create_user(email='reader@example.com', password='password123', username='reader')
+        japan, peru = Country.objects.create(name='Japan'), Country.objects.create(name='Peru')
+        travel, food = Tag.objects.create(name='travel'), Tag.objects.create(name='food')
+        cls.reader.subscribed_users.add(cls.author)
+        cls.reader.subscribed_countries.add(japan)
+        cls.reader.subscribed_tags.add(travel, food)
+        # рейтинг + надбавка: автор 1, страна 0.5, тег 0.25
+        for title, author, country, tagged, score in (
+            ('Author', cls.author, None, False, 10.0),              # 11.0
+            ('Country', cls.other, japan, False, 10.8),             # 11.3
+            ('Tag', cls.other, peru, True, 10.9),                   # 11.15
+            ('Author in Japan', cls.author, japan, True, 9.0),       # 10.0
+            ('Unrelated', cls.other, peru, False, 20.0),
+        ):
+            post = Post.objects.create(title=title, body='Body', author=author, country=country, score=score)
+            if tagged:
+                post.tags.add(travel, food)
+
+    def titles(self, user, limit):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        titles, url = [], f'/api/home_page/?order=ranked&limit={limit}'
+        while url:
+            page = client.get(url).json()
+            titles += [post['title'] for post in page['results']]
+            url = page['next']
+        return titles
+
+    @override_settings(FEED_RANK_AUTHOR_WEIGHT=1, FEED_RANK_COUNTRY_WEIGHT=0.5, FEED_RANK_TAG_WEIGHT=0.25)
+    def test_subscription_weights(self):
+        expected = ['Country', 'Tag', 'Author', 'Author in Japan']
+        self.assertEqual([post.title for _, post in RankedFeed(self.reader).paginate_keyset(None, False, 10)], expected)
+        for limit in (1, 2, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.titles(self.reader, limit), expected)
+
+    def test_anonymous(self):
+        self.assertEqual(self.titles(None, 2), ['Unrelated', 'Tag', 'Country', 'Author', 'Author in Japan'])
+
+    def test_tag_legs_do_not_use_distinct(self):
+        for queryset in RankedFeed(self.reader).querysets:
+            self.assertFalse(queryset.query.distinct)
+
+
+class CommentCountTests(TestCase):
+    """Счетчик комментариев поста не уходит ниже нуля, даже если он разошелся с таблицей."""
+
+    def test_delete_with_drifted_count(self):
+        author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        post = Post.objects.create(title='Post', body='Body', author=author)
+        comment = Comment.objects.create(post=post, author=author, body='Comment')
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
+
+        Post.objects.filter(pk=post.pk).update(comment_count=0)
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 0)
+
+
+@override_settings(HOME_PAGE_SNAPSHOT_ENABLED=True)
+class HomePageSnapshotTests(TestCase):
+    """Готовая анонимная главная страница сбрасывается при создании, изменении и удалении постов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        Post.objects.create(title='Old', body='Body', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def titles(self):
+        return [post['title'] for post in self.anonymous.get('/api/home_page/').json()['results']]
+
+    def test_invalidation(self):
+        self.assertEqual(self.titles(), ['Old'])
+        Post.objects.create(title='Hidden', body='Body', author=self.author)
+        self.assertEqual(self.titles(), ['Old'])
+
+        post_id = create_post_service().create_post(title='New', body='Body', author=self.author).id
+        self.assertEqual(self.titles(), ['New', 'Hidden', 'Old'])
+        self.client.put(f'/api/posts/{post_id}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(self.titles(), ['Renamed', 'Hidden', 'Old'])
+        self.client.delete(f'/api/posts/{post_id}/')
+        self.assertEqual(self.titles(), ['Hidden', 'Old'])
+
+    @override_settings(HOME_PAGE_SNAPSHOT_ENABLED=False)
+    def test_disabled_without_shared_cache(self):
+        self.assertEqual(self.titles(), ['Old'])
+        Post.objects.create(title='Visible', body='Body', author=self.author)
+        self.assertEqual(self.titles(), ['Visible', 'Old'])
+
+
+@override_settings(FEED_PULL_FOLLOWER_THRESHOLD=2)
+class PulledAuthorTests(TestCase):
+    """
+    Автор переходит в режим чтения при запросе, когда подписка доводит число подписчиков
+    до порога, и остается в нем после потери подписчиков; чтение ленты ничего не пишет.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        self.readers = [
+            User.objects.create_user(email=f'reader{i}@example.com', password='password123', username=f'reader{i}')
+            for i in range(2)
+        ]
+
+    def subscribe_readers(self):
+        for reader in self.readers:
+            with self.captureOnCommitCallbacks(execute=True):
+                SubscriptionService(reader).subscribe_to_user(self.author.id)
+
+    def test_subscription_promotes_author(self):
+        self.assertNotIn(self.author.id, TimelineService.get_pulled_author_ids())
+        self.subscribe_readers()
+        self.assertIn(self.author.id, TimelineService.get_pulled_author_ids())
+        self.assertTrue(User.objects.get(pk=self.author.pk).feed_pulled)
+
+    def test_demoted_author_stays_pulled(self):
+        self.subscribe_readers()
+        post = Post.objects.create(title='Post', body='Body', author=self.author)
+        TimelineService.fan_out_post(post)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+        SubscriptionService(self.readers[0]).unsubscribe_from_user(self.author.id)
+        cache.clear()
+        self.assertIn(self.author.id, TimelineService.get_pulled_author_ids())
+        self.assertEqual(list(ListPostService.get_main_page_posts_for_authenticated_user(self.readers[1]).latest(10)), [post])
+
+    def test_read_path_only_selects(self):
+        User.objects.filter(pk=self.author.pk).update(followers_count=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(TimelineService.get_pulled_author_ids(), set())
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+    def test_command_and_recount_promote_authors(self):
+        User.objects.filter(pk=self.author.pk).update(followers_count=2)
+        call_command('promote_pulled_authors', stdout=io.StringIO())
+        self.assertIn(self.author.id, TimelineService.get_pulled_author_ids())
+
+        other = User.objects.create_user(email='other@example.com', password='password123', username='other')
+        for reader in self.readers:
+            reader.subscribed_users.add(other)
+        SubscriptionService.recount_followers([other.id])
+        cache.clear()
+        self.assertIn(other.id, TimelineService.get_pulled_author_ids())
+
+
+class PostTagTests(TestCase):
+    """Дата публикации поста заполняется в связи с тегом при любом способе добавления."""
+
+    def test_related_managers_fill_post_created_at(self):
+        author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        post = Post.objects.create(title='Post', body='Body', author=author)
+        travel, food, sea = (Tag.objects.create(name=name) for name in ('travel', 'food', 'sea'))
+
+        post.tags.add(travel)
+        post.tags.set([travel, food])
+        sea.posts.add(post)
+        self.assertEqual(
+            sorted(PostTag.objects.filter(post=post).values_list('tag__name', 'post_created_at')),
+            [(name, post.created_at) for name in ('food', 'sea', 'travel')],
+        )
+
+
+class PostValuesSerializerTests(TestCase):
+    """Быстрые сериализаторы возвращают то же, что и сериализаторы DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        country = Country.objects.create(name='Japan')
+        tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+        for i in range(4):
+            post = Post.objects.create(
+                title=f'Post {i}', body='Body', author=author, country=country if i % 2 else None
+            )
+            post.tags.add(*tags[:i])
+            for j in range(i % 3):
+                PostImage.objects.create(post=post, image=f'post_images/{i}-{j}.jpg')
+
+    def setUp(self):
+        self.request = APIRequestFactory().get('/api/posts/')
+        self.posts = Post.objects.order_by('-created_at', '-id')
+
+    def test_post_queryset(self):
+        for context in ({}, {'request': self.request}):
+            with self.subTest(context=context):
+                self.assertEqual(
+                    PostValuesSerializer(self.posts, many=True, context=context).data,
+                    PostSerializer(self.posts, many=True, context=context).data,
+                )
+
+    def test_post_page_of_instances(self):
+        page = list(self.posts[:3])
+        self.assertEqual(
+            PostValuesSerializer(page, many=True, context={'request': self.request}).data,
+            PostSerializer(page, many=True, context={'request': self.request}).data,
+        )
+
+    def test_single_post(self):
+        post = self.posts.last()
+        self.assertEqual(PostValuesSerializer(post).data, PostSerializer(post).data)
+
+    def test_tags(self):
+        tags = Tag.objects.order_by('-post_count', 'id')
+        self.assertEqual(TagValuesSerializer(tags, many=True).data, TagSerializer(tags, many=True).data)
+
+    def test_empty(self):
+        self.assertEqual(PostValuesSerializer(Post.objects.none(), many=True).data, [])
+
+
+class MessagePackNegotiationTests(TestCase):
+    """Клиент выбирает MessagePack заголовком Accept; данные те же, что и в JSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.country = Country.objects.create(name='Japan')
+        for i in range(3):
+            post = Post.objects.create(title=f'Post {i}', body='Body', author=cls.author, country=cls.country)
+            PostImage.objects.create(post=post, image=f'post_images/{i}.jpg')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_endpoints(self):
+        self.client.force_authenticate(self.author)
+        for url in ('/api/posts/', '/api/home_page/', '/api/dashboard/', '/api/countries/with-posts/', '/api/users/'):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+                self.assertEqual(response['Content-Type'], 'application/msgpack')
+                self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+
+    @override_settings(HOME_PAGE_SNAPSHOT_ENABLED=True)
+    def test_anonymous_home_page_snapshot(self):
+        json_body = self.client.get('/api/home_page/').content
+        response = self.client.get('/api/home_page/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(json_body))
+        self.assertEqual(self.client.get('/api/home_page/').content, json_body)
+
+    def test_msgpack_request_body(self):
+        self.client.force_authenticate(self.author)
+        body = msgpack.packb({'title': 'Packed', 'body': 'Packed body', 'country': self.country.id, 'images': []})
+        response = self.client.post('/api/posts/', body, content_type='application/msgpack',
+                                    HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)['title'], 'Packed')
+
+
+@override_settings(LIKE_COUNTER_FLUSH_INTERVAL=0)
+class PostLikeTests(TestCase):
+    """Лайк идемпотентен, счетчик меняется атомарно и пачками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.readers = [
+            User.objects.create_user(email=f'reader{i}@example.com', password='password123', username=f'reader{i}')
+            for i in range(3)
+        ]
+        cls.post = Post.objects.create(title='Post', body='Body', author=cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/posts/{self.post.id}/like/'
+
+    def test_like_and_unlike_are_idempotent(self):
+        self.client.force_authenticate(self.readers[0])
+        self.assertEqual(self.client.post(self.url).json(), {'liked': True, 'likes': 1})
+        self.assertEqual(self.client.post(self.url).json(), {'liked': True, 'likes': 1})
+        self.client.force_authenticate(self.readers[1])
+        self.assertEqual(self.client.post(self.url).json(), {'liked': True, 'likes': 2})
+        self.assertEqual(self.client.delete(self.url).json(), {'liked': False, 'likes': 1})
+        self.assertEqual(self.client.delete(self.url).json(), {'liked': False, 'likes': 1})
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes, 1)
+        self.assertEqual(PostLike.objects.get().user, self.readers[0])
+        self.assertGreater(self.post.score, 0)
+
+    def test_update_does_not_overwrite_likes(self):
+        self.client.force_authenticate(self.author)
+        stale_post = Post.objects.get(pk=self.post.pk)
+        LikePostService.like(self.readers[0], self.post.id)
+        self.client.put(f'/api/posts/{stale_post.id}/', {'title': 'Renamed', 'likes': 100}, format='json')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.likes), ('Renamed', 1))
+
+    def test_update_ignores_unknown_fields(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.put(
+            f'/api/posts/{self.post.id}/',
+            {'title': 'Renamed', 'unknown': 1, 'id': 0, 'created_at': '2000-01-01T00:00:00Z'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.title, post.created_at), ('Renamed', self.post.created_at))
+
+    def test_missing_post(self):
+        self.client.force_authenticate(self.readers[0])
+        self.assertEqual(self.client.post('/api/posts/0/like/').status_code, 400)
+
+    @override_settings(LIKE_COUNTER_FLUSH_INTERVAL=3600)
+    def test_buffered_flush(self):
+        other_post = Post.objects.create(title='Other', body='Body', author=self.author)
+        for reader in self.readers:
+            LikePostService.like(reader, self.post.id)
+            LikePostService.like(reader, other_post.id)
+        LikePostService.unlike(self.readers[0], other_post.id)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes, 0)
+        self.assertEqual(LikePostService.get_likes(self.post), 3)
+
+        # одно обновление на каждое значение разности (+3 и +2), авторы постов, их total_likes
+        # и почасовая корзина лайков в транзакции, затем пересчет рейтинга
+        with self.assertNumQueries(12):
+            self.assertEqual(like_counter_buffer.flush(), 2)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes, 3)
+        self.assertEqual(Post.objects.get(pk=other_post.pk).likes, 2)
+        self.assertEqual(User.objects.get(pk=self.author.pk).total_likes, 5)
+
+    def test_recount(self):
+        LikePostService.like(self.readers[0], self.post.id)
+        Post.objects.filter(pk=self.post.pk).update(likes=7)
+        self.assertEqual(LikePostService.recount(), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).likes, 1)
+
+
+class PostCounterTests(TestCase):
+    """Счетчики постов тегов, стран и пользователей меняются вместе с постами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.japan = Country.objects.create(name='Japan')
+        cls.peru = Country.objects.create(name='Peru')
+        cls.travel = Tag.objects.create(name='travel')
+        cls.food = Tag.objects.create(name='food')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def assertCounters(self, user, countries, tags):
+        author = User.objects.get(pk=self.author.pk)
+        self.assertEqual((author.post_count, author.country_count, author.total_likes), user)
+        self.assertEqual(list(Country.objects.order_by('name').values_list('post_count', flat=True)), countries)
+        self.assertEqual(list(Tag.objects.order_by('name').values_list('post_count', flat=True)), tags)
+
+    def test_create_update_delete(self):
+        post_id = create_post_service().create_post(
+            title='Post', body='Body', author=self.author, country=self.japan
+        ).id
+        self.assertCounters((1, 1, 0), [1, 0], [0, 0])
+
+        self.client.put(
+            f'/api/posts/{post_id}/', {'country': self.peru.id, 'tags': [self.travel.id, self.food.id]}, format='json'
+        )
+        self.assertCounters((1, 1, 0), [0, 1], [1, 1])
+        self.client.put(f'/api/posts/{post_id}/', {'tags': [self.food.id]}, format='json')
+        self.assertCounters((1, 1, 0), [0, 1], [1, 0])
+
+        with override_settings(LIKE_COUNTER_FLUSH_INTERVAL=0):
+            LikePostService.like(self.author, post_id)
+        self.assertCounters((1, 1, 1), [0, 1], [1, 0])
+
+        self.client.delete(f'/api/posts/{post_id}/')
+        self.assertCounters((0, 0, 0), [0, 0], [0, 0])
+
+    def test_read_paths_use_counters(self):
+        create_post_service().create_post(title='Post', body='Body', author=self.author, country=self.japan)
+        response = self.client.get('/api/countries/with-posts/')
+        self.assertEqual(response.json()['results'], [{'id': self.japan.id, 'name': 'Japan', 'post_count': 1}])
+
+    def test_reconcile(self):
+        post = Post.objects.create(title='Post', body='Body', author=self.author, country=self.japan, likes=4)
+        post.tags.add(self.travel)
+        fixed = PostCounterService.reconcile()
+        self.assertEqual(fixed, {
+            'Tag.post_count': 1, 'Country.post_count': 1,
+            'User.post_count': 1, 'User.country_count': 1, 'User.total_likes': 1,
+        })
+        self.assertCounters((1, 1, 4), [1, 0], [0, 1])
+        self.assertEqual(set(PostCounterService.reconcile().values()), {0})
+
+
+class DashboardSnapshotTests(TestCase):
+    """Дашборд отдается готовым ответом, собранным один раз на все запросы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        tag = Tag.objects.create(name='travel', post_count=1)
+        for i in range(4):
+            post = Post.objects.create(title=f'Post {i}', body='Body', author=cls.author)
+        post.tags.add(tag)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_payload_is_built_once(self):
+        response = self.client.get('/api/dashboard/')
+        data = response.json()
+        self.assertEqual([post['title'] for post in data['latest_posts']], ['Post 3', 'Post 2', 'Post 1'])
+        self.assertEqual(data['tag_cloud'], [{'id': Tag.objects.get().id, 'name': 'travel'}])
+        self.assertEqual(data['top_users'], [{
+            'id': self.author.id, 'username': 'author', 'profile_picture': None,
+            'followers_count': 0, 'post_count': 0, 'country_count': 0, 'total_likes': 0,
+        }])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/dashboard/').content, response.content)
+
+    def test_refresh(self):
+        self.client.get('/api/dashboard/')
+        Post.objects.create(title='Fresh', body='Body', author=self.author)
+        DashboardSnapshotService.refresh()
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/dashboard/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['latest_posts'][0]['title'], 'Fresh')
+        self.assertEqual(self.client.get('/api/dashboard/').json()['latest_posts'][0]['title'], 'Fresh')
+
+    @override_settings(REDIS_URL=None)
+    def test_refresher_requires_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('refresh_dashboard', '--once', stdout=io.StringIO())
+
+
+@override_settings(LIKE_COUNTER_FLUSH_INTERVAL=0)
+class LeaderboardTests(TestCase):
+    """Облако тегов и топ пользователей за окно считаются по почасовым корзинам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(email=f'author{i}@example.com', password='password123', username=f'author{i}')
+            for i in range(2)
+        ]
+        cls.travel = Tag.objects.create(name='travel')
+        cls.food = Tag.objects.create(name='food')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.post_service = create_post_service()
+
+    def create_post(self, author, tags, days_ago=0):
+        post = self.post_service.create_post(title='Post', body='Body', author=author)
+        Post.objects.filter(pk=post.pk).update(created_at=post.created_at - datetime.timedelta(days=days_ago))
+        return self.post_service.update_post(post.id, tags=[tag.id for tag in tags])
+
+    def test_windows(self):
+        self.create_post(self.authors[0], [self.travel])
+        self.create_post(self.authors[0], [self.food])
+        old_post = self.create_post(self.authors[1], [self.food], days_ago=3)
+        LikePostService.like(self.authors[0], old_post.id)
+
+        day = self.client.get('/api/dashboard/', {'window': '24h'}).json()
+        week = self.client.get('/api/dashboard/', {'window': '7d'}).json()
+        self.assertEqual([tag['name'] for tag in day['tag_cloud']], ['travel', 'food'])
+        self.assertEqual([tag['name'] for tag in week['tag_cloud']], ['food', 'travel'])
+        self.assertEqual([user['username'] for user in week['top_users']], ['author1'])
+
+        self.post_service.delete_post(old_post.id)
+        self.assertEqual(LeaderboardService.get_top_tags('7d', 10), [self.travel, self.food])
+        self.assertEqual(self.client.get('/api/dashboard/', {'window': 'year'}).status_code, 400)
+
+    def test_rebuild_matches_incremental_counters(self):
+        post = self.create_post(self.authors[0], [self.travel, self.food])
+        LikePostService.like(self.authors[1], post.id)
+        incremental = {
+            model: set(model.objects.filter(count__gt=0).values_list('hour', 'count'))
+            for model in (TagActivity, UserLikeActivity)
+        }
+        self.assertEqual(LeaderboardService.rebuild(), {'TagActivity': 2, 'UserLikeActivity': 1})
+        for model, buckets in incremental.items():
+            self.assertEqual(set(model.objects.values_list('hour', 'count')), buckets)
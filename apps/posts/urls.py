@@ -1,4 +1,5 @@
 from django.urls import path
+from rest_framework.permissions import AllowAny
 from rest_framework.routers import DefaultRouter
 from .views import PostViewSet, DashboardViewSet
 
@@ -9,7 +10,8 @@ router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 urlpatterns = [
     path('posts/', PostViewSet.as_view({'get': 'list', 'post': 'create'}), name='post-list'),  # Получить все посты или создать новый
     path('posts/<int:pk>/', PostViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='post-detail'),  # Получить, обновить или удалить пост
-    path('home_page/', PostViewSet.as_view({'get': 'main_page'}), name='home-page'),  # Главная страница
+    path('posts/<int:pk>/like/', PostViewSet.as_view({'post': 'like', 'delete': 'like'}), name='post-like'),  # Поставить или снять лайк
+    path('home_page/', PostViewSet.as_view({'get': 'main_page'}, permission_classes=[AllowAny]), name='home-page'),  # Главная страница
 
     path('dashboard/', DashboardViewSet.as_view({'get': 'list'}), name='dashboard-list'),  # Получить данные для блока с постами, тегами и топ пользователями
 ]
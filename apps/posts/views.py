@@ -1,18 +1,22 @@
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
 
-from services.base.pagination import ProductPagination
-from .models import PostImage, Post, Tag
-from .serializers import PostSerializer, TagSerializer
-from .services.dashboard import DashboardService
-from .services.posts import PostService
+from services.base.pagination import KeysetPagination
+from services.base.renderers import MessagePackRenderer
+from .models import Post, Tag
+from .serializers import PostSerializer, PostValuesSerializer
+from .services.dashboard import DashboardService, DashboardSnapshotService
+from .services.posts import PostService, HomePageSnapshotService
 from .services.posts import CreatePostService, UpdatePostService, DeletePostService, ListPostService, RetrievePostService
+from .services.likes import LikePostService
+from .services.timeline import TimelineService
 from ..users.models import User
-from ..users.serializers import UserDetailSerializer
 
 
 def create_post_service() -> PostService:
@@ -21,13 +25,17 @@ def create_post_service() -> PostService:
     delete_service = DeletePostService()
     list_service = ListPostService()
     retrieve_service = RetrievePostService()
-    return PostService(create_service, update_service, delete_service, list_service, retrieve_service)
+    timeline_service = TimelineService()
+    like_service = LikePostService()
+    return PostService(
+        create_service, update_service, delete_service, list_service, retrieve_service, timeline_service, like_service
+    )
 
 
 class PostViewSet(viewsets.GenericViewSet):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = ProductPagination
+    pagination_class = KeysetPagination
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -43,16 +51,11 @@ class PostViewSet(viewsets.GenericViewSet):
         serializer.is_valid(raise_exception=True)
 
         post_data = serializer.validated_data
-        images = post_data.pop('images', [])
         post_data['author'] = request.user
 
-        # Создаем пост с использованием сервиса
+        # Создаем пост вместе с изображениями с использованием сервиса
         post = self.post_service.create_post(**post_data)
 
-        # Обрабатываем изображения
-        for image in images:
-            PostImage.objects.create(post=post, image=image)
-
         return Response(self.serializer_class(post).data, status=status.HTTP_201_CREATED)
 
     @swagger_auto_schema(
@@ -86,6 +89,27 @@ class PostViewSet(viewsets.GenericViewSet):
         self.post_service.delete_post(pk)
         return Response({"message": "Пост успешно удален"}, status=status.HTTP_204_NO_CONTENT)
 
+    @swagger_auto_schema(
+        method='post',
+        request_body=no_body,
+        responses={200: openapi.Response("Лайк поставлен")},
+        operation_description="Поставить лайк посту (повторный лайк ничего не меняет)."
+    )
+    @swagger_auto_schema(
+        method='delete',
+        responses={200: openapi.Response("Лайк снят")},
+        operation_description="Снять лайк с поста."
+    )
+    @action(detail=True, methods=['post', 'delete'], url_path='like')
+    def like(self, request, pk=None):
+        if request.method == 'DELETE':
+            post = self.post_service.unlike_post(request.user, pk)
+            liked = False
+        else:
+            post = self.post_service.like_post(request.user, pk)
+            liked = True
+        return Response({'liked': liked, 'likes': self.post_service.get_likes(post)}, status=status.HTTP_200_OK)
+
     @swagger_auto_schema(
         responses={200: PostSerializer(many=True)},
         operation_description="Получить список всех постов с пагинацией."
@@ -94,30 +118,47 @@ class PostViewSet(viewsets.GenericViewSet):
         """
         Получить список всех постов с пагинацией.
         """
-        paginator = self.pagination_class()
-        posts = self.post_service.list_posts()
-
-        paginated_posts = paginator.paginate_queryset(posts, request)
-        serializer = self.get_serializer(paginated_posts, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return self._paginated_posts_response(self.post_service.list_posts())
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     @swagger_auto_schema(
         responses={200: PostSerializer(many=True)},
-        operation_description="Получить посты для главной страницы."
+        operation_description="Получить посты для главной страницы.",
+        manual_parameters=[
+            openapi.Parameter(
+                'order', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['recent', 'ranked'],
+                description="Порядок постов: по дате (по умолчанию) или по рейтингу с учетом подписок",
+            ),
+        ]
     )
     def main_page(self, request):
-        paginator = self.pagination_class()
+        if request.query_params.get('order') == 'ranked':
+            user = request.user if request.user.is_authenticated else None
+            return self._paginated_posts_response(self.post_service.get_ranked_posts(user))
 
         if request.user.is_authenticated:
             posts = self.post_service.get_posts_for_authenticated_user(request.user)
-        else:
-            posts = self.post_service.get_posts_for_unauthenticated_user()
+            return self._paginated_posts_response(posts)
+
+        if request.query_params or not isinstance(request.accepted_renderer, (JSONRenderer, MessagePackRenderer)):
+            return self._paginated_posts_response(self.post_service.get_posts_for_unauthenticated_user())
 
-        paginated_posts = paginator.paginate_queryset(posts, request)
-        serializer = self.get_serializer(paginated_posts, many=True)
+        # Анонимная главная страница одинакова для всех: отдаем готовый ответ из кеша (JSON или MessagePack)
+        variant = f'{request.accepted_renderer.format}:{request.build_absolute_uri("/")}'
+        payload = HomePageSnapshotService.get_payload(variant, self._render_anonymous_page)
+        return HttpResponse(payload, content_type=request.accepted_renderer.media_type)
+
+    def _paginated_posts_response(self, posts):
+        paginator = self.pagination_class()
+        paginated_posts = paginator.paginate_queryset(posts, self.request)
+        # Только чтение: теги и изображения страницы читаются строками values() без DRF-полей
+        serializer = PostValuesSerializer(paginated_posts, many=True, context=self.get_serializer_context())
         return paginator.get_paginated_response(serializer.data)
 
+    def _render_anonymous_page(self) -> bytes:
+        response = self._paginated_posts_response(self.post_service.get_posts_for_unauthenticated_user())
+        return self.request.accepted_renderer.render(response.data)
+
 
 class DashboardViewSet(viewsets.ViewSet):
     """
@@ -130,23 +171,27 @@ class DashboardViewSet(viewsets.ViewSet):
         self.dashboard_service = DashboardService(Post, User, Tag)
 
     @swagger_auto_schema(
-        operation_description="Возвращает последние посты, облако тегов и топ пользователей."
+        operation_description="Возвращает последние посты, облако тегов и топ пользователей.",
+        manual_parameters=[
+            openapi.Parameter(
+                'window', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(DashboardService.windows),
+                description="Облако тегов и топ пользователей за последние 24 часа или 7 дней (по умолчанию - за все время)",
+            ),
+        ]
     )
     def list(self, request):
         """
         Возвращает последние посты, облако тегов и топ пользователей.
         """
-        latest_posts = self.dashboard_service.get_latest_posts()
-        top_users = self.dashboard_service.get_top_users()
-        tag_cloud = self.dashboard_service.get_tag_cloud()
-
-        latest_posts_serializer = PostSerializer(latest_posts, many=True)
-        top_users_serializer = UserDetailSerializer(top_users, many=True)
-        tag_cloud_serializer = TagSerializer(tag_cloud, many=True)
-
-        # Формируем ответ
-        return Response({
-            'latest_posts': latest_posts_serializer.data,
-            'top_users': top_users_serializer.data,
-            'tag_cloud': tag_cloud_serializer.data,
-        })
+        window = request.query_params.get('window')
+        if window is not None and window not in self.dashboard_service.windows:
+            return Response(
+                {'window': [f"Допустимые значения: {', '.join(self.dashboard_service.windows)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not DashboardSnapshotService.is_supported(request.accepted_renderer):
+            return Response(self.dashboard_service.get_data(window))
+
+        # Дашборд одинаков для всех: отдаем готовый ответ, пересобираемый в фоне
+        payload = DashboardSnapshotService.get_payload(request.accepted_renderer, window)
+        return HttpResponse(payload, content_type=request.accepted_renderer.media_type)
@@ -1,9 +1,16 @@
 from django.contrib import admin
 
 from apps.users.models import User
+from apps.users.services.user import UserUpdateService
 
 
 # Register your models here.
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    ...
+    actions = ['deactivate_users']
+
+    @admin.action(description="Деактивировать выбранных пользователей")
+    def deactivate_users(self, request, queryset):
+        # Через сервис, а не queryset.update(): сохранение сбрасывает пользователя в кеше аутентификации
+        for user_id in queryset.filter(is_active=True).values_list('id', flat=True):
+            UserUpdateService.deactivate(user_id)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.services.user import SubscriptionService
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает User.followers_count по таблице подписок."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='+', dest='user_ids', help="ID пользователей (по умолчанию все).")
+
+    def handle(self, *args, user_ids=None, **options):
+        fixed = SubscriptionService.recount_followers(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Исправлено пользователей: {fixed}"))
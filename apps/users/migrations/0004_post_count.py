@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 00:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_post_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Post = apps.get_model('posts', 'Post')
+    author_posts = Post.objects.filter(author_id=models.OuterRef('pk')).values('author_id')
+    User.objects.update(
+        post_count=Coalesce(models.Subquery(author_posts.annotate(total=models.Count('pk')).values('total')), 0),
+        country_count=Coalesce(
+            models.Subquery(author_posts.annotate(total=models.Count('country', distinct=True)).values('total')), 0
+        ),
+        total_likes=Coalesce(models.Subquery(author_posts.annotate(total=models.Sum('likes')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('countries', '0002_post_count'),
+        ('posts', '0010_post_count'),
+        ('users', '0003_remove_user_blocked_users_user_bblocked_users_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='country_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество стран с постами'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество постов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='total_likes',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество лайков постов'),
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-total_likes'], name='users_user_total_likes'),
+        ),
+    ]
@@ -67,7 +67,11 @@ class User(AbstractUser, TimeStampModel):
     travel_preferences = models.TextField(blank=True, null=True, verbose_name="Предпочтения в путешествиях")
     languages_spoken = models.CharField(max_length=100, blank=True, null=True, verbose_name="Языки")
     followers_count = models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")
+    post_count = models.PositiveIntegerField(default=0, verbose_name="Количество постов")
+    country_count = models.PositiveIntegerField(default=0, verbose_name="Количество стран с постами")
+    total_likes = models.PositiveIntegerField(default=0, verbose_name="Количество лайков постов")
     notifications_enabled = models.BooleanField(default=True, verbose_name="Включены уведомления")
+    feed_pulled = models.BooleanField(default=False, verbose_name="Посты подмешиваются в ленты при чтении")
     bblocked_users = models.ManyToManyField(
         'self',
         symmetrical=False,
@@ -106,6 +110,9 @@ class User(AbstractUser, TimeStampModel):
     class Meta:
         verbose_name = "пользователь"
         verbose_name_plural = "пользователи"
+        indexes = [
+            models.Index(fields=['-total_likes'], name='users_user_total_likes'),
+        ]
 
     def __str__(self) -> str:
         return self.email
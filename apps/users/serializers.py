@@ -1,7 +1,10 @@
+from django.conf import settings
+from django.db import models
 from rest_framework import serializers
+from services.base.serializers import ValuesSerializer
 from .models import User
-from ..posts.models import Post
-from ..posts.serializers import PostSerializer
+from ..posts.serializers import PostValuesSerializer
+from ..posts.services.posts import ListPostService
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -27,14 +30,43 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username']
 
 
+class UserValuesSerializer(ValuesSerializer):
+    """Быстрое представление пользователей для списков, совпадает с UserSerializer."""
+    fields = ('id', 'username')
+
+
+class TopUserValuesSerializer(ValuesSerializer):
+    """
+    Пользователь в топе дашборда: профиль и хранимые счетчики без постов.
+    """
+    fields = ('id', 'username', 'profile_picture', 'followers_count', 'post_count', 'country_count', 'total_likes')
+
+    def to_representation(self, row):
+        data = super().to_representation(row)
+        picture = row['profile_picture']
+        data['profile_picture'] = self.file_url(getattr(picture, 'name', picture), User._meta.get_field('profile_picture').storage)
+        return data
+
+
+class UserDetailListSerializer(serializers.ListSerializer):
+    """Собирает посты по странам сразу для всех пользователей списка."""
+
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.preloaded_posts_by_country = self.child.load_posts_by_country([user.id for user in users])
+        return super().to_representation(users)
+
+
 class UserDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для получения информации о пользователе."""
 
-    # Добавляем новое поле для постов
+    # Последние посты пользователя, сгруппированные по странам
     posts_by_country = serializers.SerializerMethodField()
+    no_country_name = "Без страны"
 
     class Meta:
         model = User
+        list_serializer_class = UserDetailListSerializer
         fields = (
             'id',
             'username',
@@ -51,41 +83,38 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'languages_spoken',
             'followers_count',
             'notifications_enabled',
-            'posts_by_country',  # Добавлено новое поле
+            'posts_by_country',
         )
 
     def get_posts_by_country(self, user):
         """
         Получаем посты пользователя, сгруппированные по странам.
-        """
-        # Получаем посты пользователя, используя обратную связь
-        print(f"Получаем посты для пользователя: {user.username} (ID: {user.id})")  # Отладка
-        posts = user.posts.select_related('country').all()  # Извлекаем все посты
-        print(f"Посты получены: {list(posts)}")  # Отладка, показываем все посты
-
-        grouped_posts = {}
-
-        # Если нет постов, возвращаем пустой словарь
-        if not posts.exists():
-            print("Нет постов у пользователя. Возвращаем пустой словарь.")  # Отладка
-            return grouped_posts
-
-        for post in posts:
-            print(f"Обрабатываем пост: {post.title} (ID: {post.id})")  # Отладка
-            country_name = post.country.name if post.country else "Без страны"
-            print(f"Страна поста: {country_name}")  # Отладка
-
-            if country_name not in grouped_posts:
-                grouped_posts[country_name] = []
 
-            # Сериализуем пост и добавляем в группу
-            serialized_post = PostSerializer(post).data
-            print(f"Сериализованный пост: {serialized_post}")  # Отладка
-            grouped_posts[country_name].append(serialized_post)
-
-        print(f"Группировка постов по странам завершена: {grouped_posts}")  # Отладка
-        return grouped_posts
+        В каждой стране - общее количество постов и не более USER_POSTS_PER_COUNTRY
+        последних из них; остальные доступны через /api/users/<id>/posts/?country=<id>.
+        """
+        posts_by_country = getattr(self, 'preloaded_posts_by_country', None)
+        if posts_by_country is None or user.id not in posts_by_country:
+            posts_by_country = self.load_posts_by_country([user.id])
+        return posts_by_country.get(user.id, {})
 
+    def load_posts_by_country(self, user_ids):
+        """
+        Группы постов по странам для нескольких пользователей: запрос количества,
+        запрос последних постов (оконная функция) и по запросу на теги и изображения.
+        """
+        grouped, groups = {}, {}
+        for row in ListPostService.count_posts_by_country(user_ids):
+            group = {'country': row['country_id'], 'count': row['count'], 'posts': []}
+            grouped.setdefault(row['author_id'], {})[row['country__name'] or self.no_country_name] = group
+            groups[row['author_id'], row['country_id']] = group
+        if not groups:
+            return grouped
+
+        posts = list(ListPostService.get_latest_posts_by_country(user_ids, settings.USER_POSTS_PER_COUNTRY))
+        for post, serialized_post in zip(posts, PostValuesSerializer(posts, many=True).data):
+            groups[post.author_id, post.country_id]['posts'].append(serialized_post)
+        return grouped
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -1,3 +1,11 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 
@@ -19,3 +27,77 @@ class AuthService:
             return True
         except TokenError:
             return False
+
+
+class AuthUserCache:
+    """
+    Кеш пользователей для аутентификации по JWT в памяти процесса.
+
+    Хранятся только колонки, нужные аутентификации и проверке прав (fields),
+    не дольше AUTH_USER_CACHE_TIMEOUT секунд и не больше AUTH_USER_CACHE_SIZE
+    пользователей. Запись действительна для версии пользователя из кеша default:
+    invalidate (изменение или деактивация пользователя) увеличивает версию,
+    и все процессы перечитывают строку при следующем запросе. Это верно только
+    для общего кеша (Redis), поэтому CachedJWTAuthentication подключается
+    в настройках лишь при заданном REDIS_URL.
+
+    Каждый запрос получает новый экземпляр User; остальные поля загружаются
+    из базы при обращении к ним.
+    """
+    fields = ('id', 'email', 'username', 'is_active', 'is_staff', 'is_superuser')
+    version_key_prefix = 'auth_user_version'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_fields(self) -> tuple:
+        # Проверка отзыва токена сравнивает хеш пароля
+        fields = self.fields + ('password',) if api_settings.CHECK_REVOKE_TOKEN else self.fields
+        # Model.from_db ожидает значения в порядке полей модели
+        return tuple(field.attname for field in User._meta.concrete_fields if field.attname in fields)
+
+    def get_version_key(self, user_id) -> str:
+        return f'{self.version_key_prefix}:{user_id}'
+
+    def get(self, user_id) -> User:
+        """
+        Пользователь с колонками аутентификации.
+
+        Raises:
+            User.DoesNotExist: Если пользователя нет.
+        """
+        fields = self.get_fields()
+        key = (str(user_id), fields)
+        version = cache.get(self.get_version_key(user_id), 0)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                return User.from_db(DEFAULT_DB_ALIAS, fields, entry[2])
+
+        values = User.objects.filter(pk=user_id).values_list(*fields).first()
+        if values is None:
+            raise User.DoesNotExist
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return User.from_db(DEFAULT_DB_ALIAS, fields, values)
+
+    def invalidate(self, user_id) -> None:
+        try:
+            cache.incr(self.get_version_key(user_id))
+        except ValueError:
+            cache.set(self.get_version_key(user_id), 1, None)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == str(user_id)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+auth_user_cache = AuthUserCache()
@@ -1,6 +1,10 @@
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
+from apps.posts.models import Post
+from apps.posts.services.timeline import TimelineService
 from apps.users.models import User
 from services.base.service import BaseService
 from .jwt import AuthService
@@ -43,8 +47,19 @@ class UserCreatService(BaseService):
 
 
 class UserUpdateService(BaseService):
+    """
+    Сервис изменения пользователей. Сохранение пользователя сбрасывает его
+    в кеше аутентификации (AuthUserCache, см. apps.users.signals).
+    """
     model = User
 
+    @classmethod
+    def deactivate(cls, user_id: int) -> User:
+        """
+        Отключает учетную запись: токены пользователя перестают проходить аутентификацию.
+        """
+        return cls.update(user_id, is_active=False)
+
 
 class UserLoginService(BaseService):
     """
@@ -110,45 +125,81 @@ class ListUserService(BaseService):
     def get_users_with_post_and_country_count(self):
         """
         Возвращает пользователей с количеством постов и количеством стран,
-        к которым пользователь создал посты.
+        к которым пользователь создал посты (хранятся в User.post_count и User.country_count).
         """
-        return self.model.objects.annotate(
-            post_count=Count('posts'),
-            country_count=Count('posts__country', distinct=True)
-        )
+        return self.model.objects.all()
 
 
 class SubscriptionService(BaseService):
+    """
+    Сервис подписок. При изменении подписок лента пользователя
+    дополняется постами новой подписки или очищается от постов отмененной,
+    а User.followers_count автора меняется атомарно в той же транзакции.
+    """
     model = User
 
     def __init__(self, user: User):
         self.user = user
 
+    @transaction.atomic
     def subscribe_to_user(self, target_user_id: int):
         target_user = get_object_or_404(self.model, id=target_user_id)
-        self.user.subscribed_users.add(target_user)
-        self.user.save()
-
+        _, created = self.model.subscribed_users.through.objects.get_or_create(
+            from_user_id=self.user.id, to_user_id=target_user.id
+        )
+        if not created:
+            return
+        self.model.objects.filter(id=target_user.id).update(followers_count=F('followers_count') + 1)
+        TimelineService.promote_pulled_authors([target_user.id])
+        if not TimelineService.is_pulled_author(target_user.id):
+            TimelineService.backfill(self.user, Post.objects.filter(author=target_user))
+
+    @transaction.atomic
     def unsubscribe_from_user(self, target_user_id: int):
         target_user = get_object_or_404(self.model, id=target_user_id)
-        self.user.subscribed_users.remove(target_user)
-        self.user.save()
-
+        deleted, _ = self.model.subscribed_users.through.objects.filter(
+            from_user_id=self.user.id, to_user_id=target_user.id
+        ).delete()
+        if not deleted:
+            return
+        self.model.objects.filter(id=target_user.id).update(followers_count=Greatest(F('followers_count') - 1, 0))
+        TimelineService.prune(self.user, Post.objects.filter(author=target_user))
+
+    @transaction.atomic
     def subscribe_to_country(self, country):
         self.user.subscribed_countries.add(country)
-        self.user.save()
+        TimelineService.backfill(self.user, Post.objects.filter(country=country))
 
+    @transaction.atomic
     def unsubscribe_from_country(self, country):
         self.user.subscribed_countries.remove(country)
-        self.user.save()
+        TimelineService.prune(self.user, Post.objects.filter(country=country))
 
+    @transaction.atomic
     def subscribe_to_tag(self, tag):
         self.user.subscribed_tags.add(tag)
-        self.user.save()
+        TimelineService.backfill(self.user, Post.objects.filter(tags=tag))
 
+    @transaction.atomic
     def unsubscribe_from_tag(self, tag):
         self.user.subscribed_tags.remove(tag)
-        self.user.save()
+        TimelineService.prune(self.user, Post.objects.filter(tags=tag))
+
+    @classmethod
+    def recount_followers(cls, user_ids=None) -> int:
+        """
+        Пересчитывает User.followers_count по таблице подписок; возвращает количество исправленных пользователей.
+        """
+        users = cls.model.objects.all() if user_ids is None else cls.model.objects.filter(id__in=user_ids)
+        followers = (
+            cls.model.subscribed_users.through.objects.filter(to_user_id=OuterRef('pk'))
+            .order_by().values('to_user_id').annotate(count=Count('id')).values('count')
+        )
+        stale = users.annotate(actual=Coalesce(Subquery(followers), 0)).exclude(followers_count=F('actual'))
+        stale_ids = list(stale.values_list('id', flat=True))
+        cls.model.objects.filter(id__in=stale_ids).update(followers_count=Coalesce(Subquery(followers), 0))
+        TimelineService.promote_pulled_authors(stale_ids)
+        return len(stale_ids)
 
 
 class UserService:
@@ -171,6 +222,9 @@ class UserService:
     def sign_in(self, email: str, password: str) -> dict:
         return self.user_login_service.execute(email, password)
 
+    def get_user(self, user_id: int) -> User:
+        return self.user_update_service.get_by_id(user_id)
+
     def update_user(self, user_id: int, **kwargs) -> User:
         return self.user_update_service.update(user_id, **kwargs)
 
@@ -179,11 +233,11 @@ class UserService:
 
     def subscribe_to_user(self, user: User, target_user: User):
         subscription_service = self.subscription_service_class(user)
-        subscription_service.subscribe_to_user(target_user)
+        subscription_service.subscribe_to_user(target_user.id)
 
     def unsubscribe_from_user(self, user: User, target_user: User):
         subscription_service = self.subscription_service_class(user)
-        subscription_service.unsubscribe_from_user(target_user)
+        subscription_service.unsubscribe_from_user(target_user.id)
 
     def subscribe_to_country(self, user: User, country):
         subscription_service = self.subscription_service_class(user)
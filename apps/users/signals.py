@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.models import User
+from apps.users.services.jwt import auth_user_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance: User, **kwargs):
+    """Сбрасываем пользователя в кеше аутентификации после фиксации транзакции."""
+    transaction.on_commit(lambda: auth_user_cache.invalidate(instance.pk))
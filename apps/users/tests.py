@@ -1,3 +1,209 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
-# Create your tests here.
+from apps.countries.models import Country
+from apps.posts.models import Post, PostImage, Tag
+from apps.posts.serializers import PostSerializer
+from apps.users.authentication import CachedJWTAuthentication
+from apps.users.models import User
+from apps.users.serializers import UserDetailSerializer, UserSerializer, UserValuesSerializer
+from apps.users.services.jwt import AuthService, auth_user_cache
+from apps.users.services.user import SubscriptionService, UserUpdateService
+from services.base.streaming import stream_json_array
+
+
+class UserValuesSerializerTests(TestCase):
+    """Быстрый сериализатор пользователей возвращает то же, что и UserSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            User.objects.create_user(email=f'user{i}@example.com', password='password123', username=f'user{i}')
+
+    def test_queryset_and_page(self):
+        users = User.objects.order_by('-id')
+        self.assertEqual(UserValuesSerializer(users, many=True).data, UserSerializer(users, many=True).data)
+        self.assertEqual(UserValuesSerializer(list(users), many=True).data, UserSerializer(users, many=True).data)
+
+
+@override_settings(USER_POSTS_PER_COUNTRY=2)
+class PostsByCountryTests(TestCase):
+    """Посты пользователя по странам: ограничение на страну, количество и постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.japan = Country.objects.create(name='Japan')
+        cls.peru = Country.objects.create(name='Peru')
+        cls.authors = [
+            User.objects.create_user(email=f'author{i}@example.com', password='password123', username=f'author{i}')
+            for i in range(3)
+        ]
+        tag = Tag.objects.create(name='travel')
+        cls.japan_posts = []
+        for author in cls.authors:
+            for i in range(4):
+                post = Post.objects.create(title=f'Japan {i}', body='Body', author=author, country=cls.japan)
+                post.tags.add(tag)
+                PostImage.objects.create(post=post, image=f'post_images/{post.id}.jpg')
+                if author == cls.authors[0]:
+                    cls.japan_posts.append(post)
+            Post.objects.create(title='Peru', body='Body', author=author, country=cls.peru)
+            Post.objects.create(title='Nowhere', body='Body', author=author)
+
+    def test_groups_are_capped_and_counted(self):
+        data = UserDetailSerializer(self.authors[0]).data['posts_by_country']
+        self.assertEqual(list(data), ['Japan', 'Peru', 'Без страны'])
+        self.assertEqual(data['Japan']['country'], self.japan.id)
+        self.assertEqual(data['Japan']['count'], 4)
+        self.assertEqual(data['Japan']['posts'], PostSerializer(self.japan_posts[:1:-1], many=True).data)
+        self.assertEqual(data['Без страны']['country'], None)
+        self.assertEqual(data['Без страны']['count'], 1)
+
+    def test_user_without_posts(self):
+        user = User.objects.create_user(email='reader@example.com', password='password123', username='reader')
+        with self.assertNumQueries(1):
+            self.assertEqual(UserDetailSerializer(user).data['posts_by_country'], {})
+
+    def test_many_users_in_constant_queries(self):
+        users = User.objects.order_by('id')
+        # пользователи, количество по странам, последние посты, теги, изображения
+        with self.assertNumQueries(5):
+            data = UserDetailSerializer(users, many=True).data
+        self.assertEqual([len(user['posts_by_country']) for user in data], [3, 3, 3])
+        self.assertEqual(data[1], UserDetailSerializer(self.authors[1]).data)
+
+    def test_posts_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.authors[1])
+        url = f'/api/users/{self.authors[0].id}/posts/'
+
+        response = client.get(url, {'country': self.japan.id, 'limit': 3})
+        self.assertEqual([post['title'] for post in response.json()['results']], ['Japan 3', 'Japan 2', 'Japan 1'])
+        response = client.get(response.json()['next'])
+        self.assertEqual([post['title'] for post in response.json()['results']], ['Japan 0'])
+
+        response = client.get(url, {'country': 'none'})
+        self.assertEqual([post['title'] for post in response.json()['results']], ['Nowhere'])
+        self.assertEqual(len(client.get(url).json()['results']), 6)
+        self.assertEqual(client.get(url, {'country': 'abc'}).status_code, 400)
+
+
+@override_settings(STREAMING_CHUNK_SIZE=2)
+class UserListStreamingTests(TestCase):
+    """?stream=true отдает весь список потоком, байт в байт как обычный JSONRenderer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'user{i}@example.com', password='password123', username=f'пользователь{i}')
+            for i in range(5)
+        ]
+
+    def test_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        response = client.get('/api/users/', {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        expected = JSONRenderer().render(UserSerializer(User.objects.order_by('id'), many=True).data)
+        self.assertEqual(b''.join(response.streaming_content), expected)
+
+    def test_empty_stream(self):
+        self.assertEqual(b''.join(stream_json_array(iter(()))), JSONRenderer().render([]))
+
+
+class FollowersCountTests(TestCase):
+    """Подписка и отписка меняют followers_count автора ровно один раз."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='password123', username='author')
+        cls.readers = [
+            User.objects.create_user(email=f'reader{i}@example.com', password='password123', username=f'reader{i}')
+            for i in range(2)
+        ]
+
+    def followers_count(self):
+        return User.objects.get(pk=self.author.pk).followers_count
+
+    def test_subscribe_and_unsubscribe_are_idempotent(self):
+        client = APIClient()
+        subscribe = f'/api/subscriptions/subscribe/user/{self.author.id}/'
+        unsubscribe = f'/api/subscriptions/unsubscribe/user/{self.author.id}/'
+        for reader in self.readers:
+            client.force_authenticate(reader)
+            self.assertEqual(client.post(subscribe).status_code, 200)
+            client.post(subscribe)
+        self.assertEqual(self.followers_count(), 2)
+
+        client.post(unsubscribe)
+        client.post(unsubscribe)
+        self.assertEqual(self.followers_count(), 1)
+        self.assertEqual(list(self.author.subscribers.all()), [self.readers[0]])
+
+    def test_recount(self):
+        self.readers[0].subscribed_users.add(self.author)
+        User.objects.filter(pk=self.readers[1].pk).update(followers_count=3)
+        self.assertEqual(SubscriptionService.recount_followers(), 2)
+        self.assertEqual(self.followers_count(), 1)
+        self.assertEqual(User.objects.get(pk=self.readers[1].pk).followers_count, 0)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Пользователь для JWT берется из кеша процесса и сбрасывается при изменении или деактивации."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='author@example.com', password='password123', username='author')
+
+    def setUp(self):
+        auth_user_cache.clear()
+        cache.clear()
+        token = AuthService().get_tokens_for_user(self.user)['access']
+        self.request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(self.request)[0]
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.email, user.is_active), (self.user.pk, 'author@example.com', True))
+        self.assertIn('travel_preferences', user.get_deferred_fields())
+
+    def test_update_invalidates(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserUpdateService.update(self.user.id, username='renamed')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().username, 'renamed')
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserUpdateService.deactivate(self.user.id)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_admin_deactivation_invalidates(self):
+        admin_user = User.objects.create_superuser(email='admin@example.com', password='password123', username='admin')
+        self.client.force_login(admin_user)
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/admin/users/user/', {'action': 'deactivate_users', '_selected_action': [self.user.id]}
+            )
+        self.assertEqual(response.status_code, 302)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_entries_expire(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
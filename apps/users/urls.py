@@ -11,6 +11,7 @@ urlpatterns = [
     path('users/sign_up/', UserViewSet.as_view({'post': 'sign_up'}), name='user-sign-up'),  # Регистрация пользователя
     path('users/sign_in/', UserViewSet.as_view({'post': 'sign_in'}), name='user-sign-in'),  # Вход пользователя
     path('users/', UserViewSet.as_view({'get': 'list'}), name='user-list'),  # Получить список всех пользователей
+    path('users/<int:pk>/posts/', UserViewSet.as_view({'get': 'posts'}), name='user-posts'),  # Посты пользователя (по стране)
 
     path('subscriptions/subscribe/user/<int:pk>/', SubscriptionViewSet.as_view({'post': 'subscribe_to_user'}), name='subscribe-to-user'),
     path('subscriptions/unsubscribe/user/<int:pk>/', SubscriptionViewSet.as_view({'post': 'unsubscribe_from_user'}), name='unsubscribe-from-user'),
@@ -1,20 +1,28 @@
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
+from django.conf import settings
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 from apps.countries.models import Country
 from apps.posts.models import Tag
+from apps.posts.serializers import PostSerializer, PostValuesSerializer
+from apps.posts.services.posts import ListPostService
 from apps.users.models import User
 from apps.users.serializers import (
     UserDetailSerializer,
     UserRegistrationSerializer,
     UserLoginSerializer,
-    UserLoginResponseSerializer, UserSerializer,
+    UserLoginResponseSerializer, UserSerializer, UserValuesSerializer,
 )
 from apps.users.services.jwt import AuthService
+from services.base.pagination import KeysetPagination
+from services.base.streaming import StreamingJSONResponse
 from apps.users.services.user import (
     UserService,
     UserCreatService,
@@ -44,6 +52,7 @@ def create_user_service() -> UserService:
 class UserViewSet(viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
+    pagination_class = KeysetPagination
     swagger_tags = ["User"]
 
     def __init__(self, **kwargs):
@@ -56,6 +65,7 @@ class UserViewSet(viewsets.GenericViewSet):
             'sign_in': UserLoginSerializer,
             'user': UserDetailSerializer,
             'list': UserSerializer,
+            'posts': PostSerializer,
         }
         return serializer_map.get(self.action, self.serializer_class)
 
@@ -108,7 +118,8 @@ class UserViewSet(viewsets.GenericViewSet):
     )
     @action(detail=False, methods=['get', 'patch'], permission_classes=[IsAuthenticated], url_path='')
     def user(self, request):
-        user = request.user
+        # request.user содержит только колонки аутентификации: профиль читается целиком
+        user = self.user_service.get_user(request.user.id)
         if request.method == 'PATCH':
             serializer = self.get_serializer(data=request.data, instance=user)
             serializer.is_valid(raise_exception=True)
@@ -116,13 +127,69 @@ class UserViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(
+        operation_description="Список пользователей с пагинацией; ?stream=true - весь список потоком JSON.",
+        manual_parameters=[
+            openapi.Parameter('stream', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                              description="Отдать весь список одним потоковым JSON-массивом"),
+        ],
+        responses={200: UserSerializer(many=True)}
+    )
     def list(self, request):
         """
-        Получить список всех пользователей с количеством постов и стран.
+        Получить список всех пользователей с количеством постов и стран (с пагинацией).
         """
         users = self.user_service.list_users_with_post_and_country_count()
-        serializer = self.get_serializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if self.is_stream_requested(request):
+            # Весь список: строки читаются курсором порциями и сразу пишутся в ответ
+            serializer = UserValuesSerializer(context=self.get_serializer_context())
+            return StreamingJSONResponse(
+                serializer.iter_data(users.order_by('id'), settings.STREAMING_CHUNK_SIZE),
+                renderer=request.accepted_renderer,
+            )
+
+        paginator = self.pagination_class()
+        paginated_users = paginator.paginate_queryset(users, request)
+        serializer = UserValuesSerializer(paginated_users, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_description="Посты пользователя с пагинацией, при необходимости - в одной стране.",
+        manual_parameters=[
+            openapi.Parameter(
+                'country', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="ID страны или none - посты без страны",
+            ),
+        ],
+        responses={200: PostSerializer(many=True)}
+    )
+    @action(detail=True, methods=['get'], url_path='posts')
+    def posts(self, request, pk=None):
+        """
+        Получить посты пользователя (все или в одной стране) с пагинацией.
+        """
+        user = get_object_or_404(User, pk=pk)
+        country = request.query_params.get('country')
+        if country is None:
+            posts = ListPostService.get_author_posts(user.id)
+        elif country.lower() == 'none':
+            posts = ListPostService.get_author_posts(user.id, without_country=True)
+        elif country.isdigit():
+            posts = ListPostService.get_author_posts(user.id, country_id=int(country))
+        else:
+            raise ValidationError({'country': "Ожидается ID страны или none."})
+
+        paginator = self.pagination_class()
+        paginated_posts = paginator.paginate_queryset(posts, request)
+        serializer = PostValuesSerializer(paginated_posts, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @staticmethod
+    def is_stream_requested(request) -> bool:
+        return (
+            request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+            and isinstance(request.accepted_renderer, JSONRenderer)
+        )
 
 
 class SubscriptionViewSet(viewsets.ViewSet):
@@ -0,0 +1,317 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Tuple, Type
+from uuid import uuid4
+
+from django.core.cache import cache, caches
+from django.db import connections
+
+
+class CachedPayload:
+    """Pre-encoded response body kept in the shared cache.
+
+    A payload may have several variants (e.g. per host, since serializers build
+    absolute media URLs). Invalidation replaces a generation stamp that is part of
+    every variant key, so all variants are dropped at once without tracking them.
+
+    Attributes:
+        key_prefix: Cache key prefix of the payload.
+        timeout: Lifetime of a built payload in seconds.
+    """
+
+    def __init__(self, key_prefix: str, timeout: int):
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+
+    @property
+    def generation_key(self) -> str:
+        return f'{self.key_prefix}:generation'
+
+    def _get_generation(self) -> str:
+        generation = cache.get(self.generation_key)
+        if generation is None:
+            cache.add(self.generation_key, uuid4().hex, None)
+            generation = cache.get(self.generation_key)
+        return generation
+
+    def get_key(self, variant: str) -> str:
+        return f'{self.key_prefix}:{self._get_generation()}:{variant}'
+
+    def get_or_build(self, variant: str, build: Callable[[], bytes]) -> bytes:
+        """Returns the cached payload, building and storing it on a miss.
+
+        Args:
+            variant: Distinguishes payloads that differ for the same data.
+            build: Callable producing the encoded payload.
+
+        Returns:
+            bytes: The encoded payload.
+        """
+        key = self.get_key(variant)
+        payload = cache.get(key)
+        if payload is None:
+            payload = build()
+            cache.set(key, payload, self.timeout)
+        return payload
+
+    def invalidate(self) -> None:
+        """Drops every variant of the payload."""
+        cache.set(self.generation_key, uuid4().hex, None)
+
+
+class RefreshedPayload:
+    """Pre-encoded payload served stale-while-revalidate.
+
+    A payload older than ``refresh_interval`` is still served while one
+    background thread rebuilds it. A builder must first take a lock with
+    ``cache.add``. When there is no payload at all, requests without the lock
+    wait for the builder instead of building it themselves. A periodic
+    refresher (see ``refresh``) keeps the payload fresh, so requests normally
+    never build it.
+
+    The payload and the lock live in the ``default`` cache. Regeneration is
+    single-flight across processes, and a separate refresher process is
+    visible to the web workers, only when that cache is shared (Redis). With
+    the local-memory fallback every process keeps and rebuilds its own copy.
+
+    Attributes:
+        key_prefix: Cache key prefix of the payload.
+        refresh_interval: Age in seconds after which the payload is rebuilt.
+        stale_timeout: Lifetime of a built payload in the cache, in seconds.
+        lock_timeout: How long a builder may hold the lock, in seconds.
+        poll_interval: Pause between checks while waiting for another builder.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, key_prefix: str, refresh_interval: float, stale_timeout: int, lock_timeout: int = 30):
+        self.key_prefix = key_prefix
+        self.refresh_interval = refresh_interval
+        self.stale_timeout = stale_timeout
+        self.lock_timeout = lock_timeout
+
+    def get_key(self, variant: str) -> str:
+        return f'{self.key_prefix}:{variant}'
+
+    def get_lock_key(self, variant: str) -> str:
+        return f'{self.key_prefix}:{variant}:lock'
+
+    def get(self, variant: str, build: Callable[[], bytes]) -> bytes:
+        """Returns the payload, rebuilding it in the background when stale.
+
+        Args:
+            variant: Distinguishes payloads that differ for the same data.
+            build: Callable producing the encoded payload.
+
+        Returns:
+            bytes: The encoded payload, possibly stale.
+        """
+        entry = cache.get(self.get_key(variant))
+        if entry is None:
+            return self._build_single_flight(variant, build)
+
+        built_at, payload = entry
+        if time.time() - built_at >= self.refresh_interval and self._acquire(variant):
+            threading.Thread(target=self._refresh_in_background, args=(variant, build), daemon=True).start()
+        return payload
+
+    def set(self, variant: str, payload: bytes) -> None:
+        cache.set(self.get_key(variant), (time.time(), payload), self.stale_timeout)
+
+    def refresh(self, variant: str, build: Callable[[], bytes]) -> bytes:
+        """Builds and stores the payload unconditionally."""
+        payload = build()
+        self.set(variant, payload)
+        return payload
+
+    def _acquire(self, variant: str) -> bool:
+        return cache.add(self.get_lock_key(variant), 1, self.lock_timeout)
+
+    def _release(self, variant: str) -> None:
+        cache.delete(self.get_lock_key(variant))
+
+    def _build_single_flight(self, variant: str, build: Callable[[], bytes]) -> bytes:
+        deadline = time.monotonic() + self.lock_timeout
+        while not self._acquire(variant):
+            time.sleep(self.poll_interval)
+            entry = cache.get(self.get_key(variant))
+            if entry is not None:
+                return entry[1]
+            if time.monotonic() >= deadline:
+                # The builder is stuck or gone: build without the lock
+                return self.refresh(variant, build)
+        try:
+            return self.refresh(variant, build)
+        finally:
+            self._release(variant)
+
+    def _refresh_in_background(self, variant: str, build: Callable[[], bytes]) -> None:
+        try:
+            self.refresh(variant, build)
+        finally:
+            self._release(variant)
+            connections.close_all()
+
+
+class ReadThroughCache:
+    """Read-through cache for slow lookups such as external API calls.
+
+    Found values are kept for ``timeout`` seconds. Lookups that fail with one of
+    the ``not_found`` exceptions are remembered for ``negative_timeout`` seconds
+    and raise the same exception again without a new lookup. A miss is loaded
+    by one caller at a time: the others wait for its result instead of
+    repeating the lookup. Threads of a process are serialized by a local lock,
+    processes by a lock taken with ``cache.add`` (best effort with the
+    file-based backend, whose ``add`` is not atomic).
+
+    Attributes:
+        key_prefix: Cache key prefix of the entries.
+        timeout: Lifetime of a found value in seconds.
+        negative_timeout: Lifetime of a "not found" result in seconds.
+        alias: Cache alias; a persistent backend keeps entries across restarts.
+        lock_timeout: How long a loader may hold the lock, in seconds.
+        poll_interval: Pause between checks while waiting for another loader.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, key_prefix: str, timeout: int, negative_timeout: int,
+                 alias: str = 'default', lock_timeout: int = 30):
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self.negative_timeout = negative_timeout
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self._local_locks = {}
+        self._local_locks_lock = threading.Lock()
+        self._async_locks = weakref.WeakKeyDictionary()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_key(self, key: str) -> str:
+        return f'{self.key_prefix}:{key}'
+
+    def get_or_load(self, key: str, load: Callable[[], Any],
+                    not_found: Tuple[Type[Exception], ...] = ()) -> Any:
+        """Returns the cached value, loading it on a miss.
+
+        Args:
+            key: Lookup key; must be a valid cache key once prefixed.
+            load: Callable performing the lookup.
+            not_found: Exceptions of ``load`` meaning "no such value". They are
+                re-created from their class and ``detail`` (or message), so they
+                must accept it as the first argument.
+
+        Returns:
+            The loaded value.
+
+        Raises:
+            One of ``not_found`` when the value does not exist.
+        """
+        cache_key = self.get_key(key)
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            entry = self._load_single_flight(cache_key, load, not_found)
+        return self._unpack(entry)
+
+    async def aget_or_load(self, key: str, load: Callable[[], Awaitable[Any]],
+                           not_found: Tuple[Type[Exception], ...] = ()) -> Any:
+        """Async variant of ``get_or_load`` for a coroutine ``load``.
+
+        Coroutines of an event loop are serialized by a local ``asyncio.Lock``,
+        other threads and processes by the same ``cache.add`` lock.
+        """
+        cache_key = self.get_key(key)
+        entry = await self.cache.aget(cache_key)
+        if entry is None:
+            entry = await self._aload_single_flight(cache_key, load, not_found)
+        return self._unpack(entry)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(self.get_key(key))
+
+    @staticmethod
+    def _unpack(entry):
+        found, value = entry
+        if not found:
+            exception_class, detail = value
+            raise exception_class(detail)
+        return value
+
+    def _make_entry(self, load: Callable[[], Any], not_found: Tuple[Type[Exception], ...]):
+        try:
+            return (True, load()), self.timeout
+        except not_found as exc:
+            return self._make_not_found_entry(exc)
+
+    def _make_not_found_entry(self, exc: Exception):
+        return (False, (type(exc), getattr(exc, 'detail', str(exc)))), self.negative_timeout
+
+    def _load(self, cache_key: str, load: Callable[[], Any], not_found: Tuple[Type[Exception], ...]):
+        entry, timeout = self._make_entry(load, not_found)
+        self.cache.set(cache_key, entry, timeout)
+        return entry
+
+    async def _aload(self, cache_key: str, load: Callable[[], Awaitable[Any]],
+                     not_found: Tuple[Type[Exception], ...]):
+        try:
+            entry, timeout = (True, await load()), self.timeout
+        except not_found as exc:
+            entry, timeout = self._make_not_found_entry(exc)
+        await self.cache.aset(cache_key, entry, timeout)
+        return entry
+
+    def _load_single_flight(self, cache_key: str, load: Callable[[], Any], not_found: Tuple[Type[Exception], ...]):
+        with self._local_locks_lock:
+            local_lock = self._local_locks.setdefault(cache_key, threading.Lock())
+        with local_lock:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return entry
+            return self._load_with_cache_lock(cache_key, load, not_found)
+
+    def _load_with_cache_lock(self, cache_key: str, load: Callable[[], Any], not_found: Tuple[Type[Exception], ...]):
+        lock_key = f'{cache_key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, 1, self.lock_timeout):
+            time.sleep(self.poll_interval)
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return entry
+            if time.monotonic() >= deadline:
+                # The loader is stuck or gone: load without the lock
+                return self._load(cache_key, load, not_found)
+        try:
+            return self._load(cache_key, load, not_found)
+        finally:
+            self.cache.delete(lock_key)
+
+    async def _aload_single_flight(self, cache_key: str, load: Callable[[], Awaitable[Any]],
+                                   not_found: Tuple[Type[Exception], ...]):
+        # asyncio locks belong to their event loop
+        loop_locks = self._async_locks.setdefault(asyncio.get_running_loop(), {})
+        async with loop_locks.setdefault(cache_key, asyncio.Lock()):
+            entry = await self.cache.aget(cache_key)
+            if entry is not None:
+                return entry
+            return await self._aload_with_cache_lock(cache_key, load, not_found)
+
+    async def _aload_with_cache_lock(self, cache_key: str, load: Callable[[], Awaitable[Any]],
+                                     not_found: Tuple[Type[Exception], ...]):
+        lock_key = f'{cache_key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not await self.cache.aadd(lock_key, 1, self.lock_timeout):
+            await asyncio.sleep(self.poll_interval)
+            entry = await self.cache.aget(cache_key)
+            if entry is not None:
+                return entry
+            if time.monotonic() >= deadline:
+                return await self._aload(cache_key, load, not_found)
+        try:
+            return await self._aload(cache_key, load, not_found)
+        finally:
+            await self.cache.adelete(lock_key)
@@ -1,16 +1,262 @@
-from rest_framework.pagination import LimitOffsetPagination
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor (keyset) pagination ordered by ``(created_at, id)`` descending.
+
+    A page is selected with ``WHERE (created_at, id) < (last seen)`` instead of an
+    OFFSET, so deep pages cost the same as the first one, rows inserted between
+    requests never shift items across pages, and no ``COUNT(*)`` is executed unless
+    the client asks for an estimate with ``?count=true``.
 
+    The paginated object may be:
+        * a queryset (ordered by two descending fields, or unordered);
+        * a sliced queryset or a list already sorted by ``(created_at, id)``;
+        * an object exposing ``querysets`` - several ordered querysets whose pages
+          are merged with a k-way merge and deduplicated by primary key;
+        * an object exposing ``paginate_keyset(position, reverse, limit)`` that
+          reads its own ``(position, object)`` rows, for orderings other than
+          ``(created_at, id)``, and ``position_fields`` - the model fields of
+          that ordering.
 
-class ProductPagination(LimitOffsetPagination):
+    A decoded cursor position is checked against the ordering fields of every
+    source (arity, value types, no nulls), so a tampered cursor is rejected with
+    the same 400 as a malformed one.
+
+    Cursor tokens are opaque to the client: base64 encoded direction and position.
+    Links point to the current request URL unless ``base_url`` is set, e.g. when
+    the first page is embedded into another resource.
+    """
+
+    default_ordering = ('-created_at', '-id')
     default_limit = 10
     max_limit = 100
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    base_url = None
+
+    def paginate_queryset(self, queryset, request, view=None) -> List[Any]:
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.reverse, self.position = self.decode_cursor(request)
+        sources = [queryset] if hasattr(queryset, 'paginate_keyset') else getattr(queryset, 'querysets', None) or [queryset]
+        if self.position is not None:
+            for source in sources:
+                self.position = self.clean_position(self.position, self.get_position_fields(source))
+        self.count = self.get_count(queryset) if self.is_count_requested(request) else None
+
+        if hasattr(queryset, 'paginate_keyset'):
+            rows = queryset.paginate_keyset(self.position, self.reverse, self.limit + 1)
+        else:
+            rows = heapq.merge(
+                *(self.fetch(source) for source in sources),
+                key=itemgetter(0),
+                reverse=not self.reverse,
+            )
+
+        page, seen = [], set()
+        for key, obj in rows:
+            if obj.pk in seen:
+                continue
+            seen.add(obj.pk)
+            page.append((key, obj))
+            if len(page) > self.limit:
+                break
+
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.first_position = page[0][0] if page else self.position
+        self.last_position = page[-1][0] if page else self.position
+        return [obj for _, obj in page]
+
+    def fetch(self, source) -> List[Tuple[tuple, Any]]:
+        """Reads at most ``limit + 1`` rows of one source after the current position."""
+        if isinstance(source, models.QuerySet) and not source.query.is_sliced:
+            ordering = self.get_ordering(source)
+            fields = [field.lstrip('-') for field in ordering]
+            if self.reverse:
+                source = source.order_by(*fields)
+            else:
+                source = source.order_by(*ordering)
+            if self.position is not None:
+                source = source.filter(self.keyset_filter(fields, self.position, self.reverse))
+            objects = source[:self.limit + 1]
+        else:
+            fields = [field.lstrip('-') for field in self.default_ordering]
+            objects = sorted(source, key=lambda obj: self.get_position(obj, fields), reverse=not self.reverse)
+            if self.position is not None:
+                if self.reverse:
+                    objects = [obj for obj in objects if self.get_position(obj, fields) > self.position]
+                else:
+                    objects = [obj for obj in objects if self.get_position(obj, fields) < self.position]
+            objects = objects[:self.limit + 1]
+        return [(self.get_position(obj, fields), obj) for obj in objects]
+
+    def get_ordering(self, queryset: models.QuerySet) -> Sequence[str]:
+        ordering = queryset.query.order_by
+        if len(ordering) == 2 and all(isinstance(field, str) and field.startswith('-') for field in ordering):
+            return ordering
+        return self.default_ordering
+
+    def get_position_fields(self, source) -> Optional[Sequence[models.Field]]:
+        """Model fields a source is ordered by, or ``None`` for an empty in-memory source."""
+        if hasattr(source, 'paginate_keyset'):
+            return source.position_fields
+        if isinstance(source, models.QuerySet) and not source.query.is_sliced:
+            names = [field.lstrip('-') for field in self.get_ordering(source)]
+            annotations = source.query.annotations
+            return [
+                annotations[name].output_field if name in annotations else source.model._meta.get_field(name)
+                for name in names
+            ]
+        if isinstance(source, models.QuerySet):
+            model = source.model
+        elif len(source):
+            model = type(source[0])
+        else:
+            return None
+        return [model._meta.get_field(field.lstrip('-')) for field in self.default_ordering]
+
+    def clean_position(self, position: tuple, fields: Optional[Sequence[models.Field]]) -> tuple:
+        """Converts a decoded position to the types of ``fields``; raises the invalid cursor error."""
+        if fields is None:
+            return position
+        if len(position) != len(fields) or any(value is None for value in position):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        try:
+            cleaned = tuple(field.to_python(value) for field, value in zip(fields, position))
+        except (DjangoValidationError, TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        if settings.USE_TZ and any(isinstance(value, datetime) and timezone.is_naive(value) for value in cleaned):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        return cleaned
+
+    @staticmethod
+    def get_position(obj, fields: Sequence[str]) -> tuple:
+        return tuple(getattr(obj, field) for field in fields)
+
+    @staticmethod
+    def keyset_filter(fields: Sequence[str], position: tuple, reverse: bool) -> Q:
+        """Builds ``(f1, f2, ...) < (v1, v2, ...)`` (or ``>`` for the reverse direction)."""
+        lookup = 'gt' if reverse else 'lt'
+        condition = Q()
+        for index, field in enumerate(fields):
+            equal = {name: value for name, value in zip(fields[:index], position[:index])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': position[index]})
+        return condition
+
+    def get_limit(self, request) -> int:
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def is_count_requested(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_count(self, queryset) -> Optional[int]:
+        """Approximate number of items; exact for in-memory sources."""
+        sources = getattr(queryset, 'querysets', None) or [queryset]
+        return sum(self.estimate_count(source) for source in sources)
+
+    @staticmethod
+    def estimate_count(source) -> int:
+        if not isinstance(source, models.QuerySet) or source.query.is_sliced:
+            return len(source)
+        connection = connections[source.db]
+        if connection.vendor != 'postgresql':
+            return source.count()
+        sql, params = source.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def decode_cursor(self, request) -> Tuple[bool, Optional[tuple]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = tuple(self._decode_value(value) for value in payload['p'])
+            return bool(payload['r']), position
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def encode_cursor(self, reverse: bool, position: tuple) -> str:
+        payload = {'r': int(reverse), 'p': [self._encode_value(value) for value in position]}
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri(self.base_url)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        return value
+
+    @staticmethod
+    def _decode_value(value):
+        if isinstance(value, dict):
+            parsed = parse_datetime(value['dt'])
+            if parsed is None:
+                raise ValueError(value)
+            return parsed
+        return value
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(False, self.last_position)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(True, self.first_position)
 
     def get_paginated_response(self, data):
-        """Override the method to customize the paginated response."""
+        """Keeps the response shape of the former limit/offset pagination."""
         return Response({
             'count': self.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
         })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,56 @@
+import codecs
+import io
+import re
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from services.base.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """Drop-in ``JSONParser`` that decodes with orjson.
+
+    orjson accepts a subset of what the standard ``json`` module accepts, so a
+    body it rejects is parsed again by the stock parser: valid input gives the
+    same data, invalid input the same ``ParseError``. Bodies in an encoding
+    other than UTF-8 go to the stock parser directly, and so do bodies with
+    20+ digit runs: orjson reads integers beyond 64 bits as floats.
+    """
+
+    renderer_class = ORJSONRenderer
+    long_number = re.compile(rb'\d{20}')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if self.long_number.search(body):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies (``Content-Type: application/msgpack``).
+
+    Timestamp extensions are decoded to timezone-aware datetimes, which DRF
+    ``DateTimeField`` accepts as is.
+    """
+
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
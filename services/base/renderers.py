@@ -0,0 +1,82 @@
+import datetime
+import re
+
+import msgpack
+import orjson
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` that encodes with orjson.
+
+    The output is byte-for-byte the output of DRF ``JSONRenderer`` with the
+    default settings (``UNICODE_JSON``, ``COMPACT_JSON``):
+
+        * datetime, date and time objects are passed through to DRF
+          ``JSONEncoder.default``, as are Decimal, lazy strings, querysets,
+          bytes and other non-native types;
+        * ``\\u2028`` and ``\\u2029`` are escaped exactly as DRF does;
+        * ``ReturnDict``/``ReturnList`` and other dict/list subclasses are
+          encoded natively.
+
+    Anything orjson refuses (non-string keys, integers beyond 64 bits) and every
+    non-default mode (``?indent=``, ``ensure_ascii``, long separators) falls back
+    to the stock renderer. So does output that may contain a float outside
+    ``[1e-4, 1e16)``: orjson formats those differently (``0.00001``, ``2.5e-7``,
+    and ``1e16`` in some versions) from ``repr`` (``1e-05``, ``2.5e-07``,
+    ``1e+16``). The check is a scan of the encoded bytes, so a string that merely
+    looks like such a number also takes the slow path. Known difference:
+    NaN/Infinity become ``null`` instead of raising under ``STRICT_JSON``.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    # Exponent notation or a positional float below 1e-4
+    float_format_pattern = re.compile(rb'\d[eE]|0\.0000')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.float_format_pattern.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as JSONRenderer: keep the output a strict JavaScript subset
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders the same data as ``JSONRenderer`` as MessagePack.
+
+    Selected with ``Accept: application/msgpack`` (or ``?format=msgpack``).
+    Timezone-aware datetimes are packed as the 8-12 byte Timestamp extension
+    instead of an ISO string; every other non-native type is converted exactly
+    as for JSON by DRF ``JSONEncoder.default``.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.default, use_bin_type=True)
+
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime) and timezone.is_aware(obj):
+            return msgpack.Timestamp.from_datetime(obj)
+        return self.encoder_class().default(obj)
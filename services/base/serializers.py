@@ -0,0 +1,292 @@
+import re
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union
+
+from django.core.files.storage import Storage
+from django.core.validators import (
+    MaxLengthValidator, MaxValueValidator, MinLengthValidator, MinValueValidator, ProhibitNullCharactersValidator,
+)
+from django.db import models
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+
+class ValuesSerializer:
+    """Read-only serializer that renders rows of ``QuerySet.values()``.
+
+    A drop-in replacement for the ``data`` of a read-only ``ModelSerializer`` on
+    hot list endpoints: a queryset is read with ``values()`` (no model instances),
+    an already evaluated page of instances is read attribute by attribute, and
+    nested relations are loaded as ``values()`` rows with one query per relation.
+    The DRF field pipeline is skipped entirely, so subclasses must reproduce the
+    output of the serializer they stand in for.
+
+    ``related_fields`` declares the relations a serializer renders and ``data``
+    loads them for the whole page, so a list endpoint runs the same number of
+    queries for any page size without the view prefetching anything.
+
+    Attributes:
+        fields: Output keys, in the order of the replaced serializer.
+        source_columns: ``values()`` column of an output key when it differs from
+            the key (e.g. ``{'country': 'country_id'}`` for a primary key field).
+        related_fields: Output keys filled by ``load_related`` instead of a column.
+    """
+
+    fields: Sequence[str] = ()
+    source_columns: Dict[str, str] = {}
+    related_fields: Sequence[str] = ()
+    pk_column = 'id'
+
+    def __init__(self, instance: Union[models.QuerySet, Iterable[models.Model], models.Model, None] = None,
+                 many: bool = False, context: Optional[Dict[str, Any]] = None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        rows = self.get_rows(self.instance if self.many else [self.instance])
+        if rows:
+            self.load_related(rows)
+        representation = [self.to_representation(row) for row in rows]
+        return representation if self.many else representation[0]
+
+    def iter_data(self, queryset: models.QuerySet, chunk_size: int) -> Iterator[Dict[str, Any]]:
+        """Yields representations chunk by chunk, reading the queryset with
+        ``.iterator(chunk_size)``, so memory stays bounded by one chunk.
+
+        Args:
+            queryset: Objects to serialize.
+            chunk_size: Rows fetched from the database cursor (and related
+                objects loaded) at a time.
+
+        Yields:
+            dict: Representation of every object, in queryset order.
+        """
+        columns = self.get_columns()
+        annotated = [field for field in self.related_fields if field in queryset.query.annotations]
+        chunk = []
+        for row in queryset.values(*columns, *annotated).iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield from self._render_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._render_chunk(chunk)
+
+    def _render_chunk(self, rows: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        self.load_related(rows)
+        return map(self.to_representation, rows)
+
+    def get_columns(self) -> List[str]:
+        columns = [self.source_columns.get(field, field) for field in self.fields if field not in self.related_fields]
+        if self.pk_column not in columns:
+            columns.append(self.pk_column)
+        return columns
+
+    def get_rows(self, objects) -> List[Dict[str, Any]]:
+        """Reads the columns; related fields the objects already carry as
+        annotations are read as columns too."""
+        columns = self.get_columns()
+        if isinstance(objects, models.QuerySet):
+            annotated = [field for field in self.related_fields if field in objects.query.annotations]
+            return list(objects.values(*columns, *annotated))
+        rows = []
+        for obj in objects:
+            row = {column: getattr(obj, column) for column in columns}
+            row.update((field, obj.__dict__[field]) for field in self.related_fields if field in obj.__dict__)
+            rows.append(row)
+        return rows
+
+    def load_related(self, rows: List[Dict[str, Any]]) -> None:
+        """Fills the ``related_fields`` missing from the rows; rows are non-empty."""
+
+    def to_representation(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: row[self.source_columns.get(field, field)] for field in self.fields}
+
+    @staticmethod
+    def group_by(rows: Iterable[Dict[str, Any]], column: str) -> Dict[Any, List[Dict[str, Any]]]:
+        """Groups related rows by the parent key, keeping their order."""
+        groups = {}
+        for row in rows:
+            groups.setdefault(row.pop(column), []).append(row)
+        return groups
+
+    def file_url(self, name: str, storage: Storage) -> Optional[str]:
+        """Same output as ``serializers.FileField`` for the stored file name."""
+        if not name:
+            return None
+        if not api_settings.UPLOADED_FILES_USE_URL:
+            return name
+        url = storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class _Rejected(Exception):
+    """The fast path cannot accept the value; the serializer decides."""
+
+
+_SURROGATES = re.compile('[\ud800-\udfff]')
+# Validators the compiled checks reproduce (by their limit values)
+_LIMIT_VALIDATORS = {
+    MaxLengthValidator: 'max_length',
+    MinLengthValidator: 'min_length',
+    MaxValueValidator: 'max_value',
+    MinValueValidator: 'min_value',
+}
+_BUILTIN_VALIDATORS = (ProhibitNullCharactersValidator, ProhibitSurrogateCharactersValidator)
+
+
+class CompiledValidator:
+    """Fast input validator equivalent to a plain DRF serializer.
+
+    Meant for hot integration paths such as validating every upstream response
+    of a ``ServiceRequest`` subclass. The serializer's fields are compiled once
+    into plain checks, so valid data is validated without building field
+    objects, running validators or collecting errors per element. The output
+    is the serializer's ``validated_data``.
+
+    The fast path only accepts data the serializer accepts unchanged. Anything
+    else (wrong types, values the serializer would coerce, limit violations)
+    is handed to the serializer itself, which returns its own result or raises
+    ``ValidationError`` with its own errors. Invalid data therefore gets exactly
+    the serializer's behaviour, only at the serializer's cost.
+
+    Supported fields: ``CharField``, ``IntegerField``, ``BooleanField``,
+    ``ListField`` and nested plain serializers (``many`` or not) without
+    ``source``, defaults, field-level validators or ``validate`` methods.
+
+    Attributes:
+        serializer_class: Serializer whose behaviour is reproduced.
+    """
+
+    def __init__(self, serializer_class: Type[serializers.Serializer]):
+        self.serializer_class = serializer_class
+        self._check = self._compile_serializer(serializer_class())
+
+    def validate(self, data: Any) -> Dict[str, Any]:
+        """Returns the validated data.
+
+        Raises:
+            ValidationError: The serializer's errors for invalid data.
+        """
+        try:
+            return self._check(data)
+        except _Rejected:
+            serializer = self.serializer_class(data=data)
+            if serializer.is_valid():
+                return serializer.validated_data
+            raise ValidationError(serializer.errors)
+
+    def _compile_field(self, field: serializers.Field) -> Callable[[Any], Any]:
+        if field.read_only or field.default is not empty or (field.source and field.source != field.field_name):
+            raise TypeError(f'{type(field).__name__} {field.field_name!r}: only plain writable fields are supported.')
+        if isinstance(field, serializers.ListSerializer):
+            check = self._compile_list(field, self._compile_serializer(field.child), list)
+        elif isinstance(field, serializers.Serializer):
+            check = self._compile_serializer(field)
+        elif type(field) is serializers.ListField:
+            check = self._compile_list(field, self._compile_field(field.child), (list, tuple))
+        elif type(field) is serializers.CharField:
+            check = self._compile_char(field)
+        elif type(field) is serializers.IntegerField:
+            check = self._compile_typed(field, int)
+        elif type(field) is serializers.BooleanField:
+            check = self._compile_typed(field, bool)
+        else:
+            raise TypeError(f'{type(field).__name__} {field.field_name!r} is not supported.')
+
+        if not field.allow_null:
+            return check
+
+        def check_nullable(value):
+            return None if value is None else check(value)
+        return check_nullable
+
+    def _compile_serializer(self, serializer: serializers.Serializer) -> Callable[[Any], Dict[str, Any]]:
+        serializer_class = type(serializer)
+        if (serializer_class.validate is not serializers.Serializer.validate or serializer.validators
+                or any(hasattr(serializer, f'validate_{name}') for name in serializer.fields)):
+            raise TypeError(f'{serializer_class.__name__}: validate methods and validators are not supported.')
+        fields = [
+            (field.field_name, self._compile_field(field), field.required)
+            for field in serializer._writable_fields
+        ]
+
+        def check(data):
+            # HTML form input (QueryDict) is parsed by the serializer
+            if not isinstance(data, Mapping) or hasattr(data, 'getlist'):
+                raise _Rejected
+            validated = {}
+            for name, check_field, required in fields:
+                if name in data:
+                    validated[name] = check_field(data[name])
+                elif required:
+                    raise _Rejected
+            return validated
+        return check
+
+    def _compile_list(self, field: serializers.Field, check_child: Callable[[Any], Any],
+                      types) -> Callable[[Any], List[Any]]:
+        # ListSerializer keeps its length limits as attributes, ListField as validators too
+        limits = self._get_limits(field)
+        min_length = max(limits.get('min_length', 0), field.min_length or 0, 0 if field.allow_empty else 1)
+        max_lengths = [length for length in (limits.get('max_length'), field.max_length) if length is not None]
+        max_length = min(max_lengths) if max_lengths else None
+
+        def check(data):
+            if not isinstance(data, types) or len(data) < min_length or (max_length is not None and len(data) > max_length):
+                raise _Rejected
+            return [check_child(item) for item in data]
+        return check
+
+    def _compile_char(self, field: serializers.CharField) -> Callable[[Any], str]:
+        limits = self._get_limits(field)
+        min_length = max(limits.get('min_length', 0), 0 if field.allow_blank else 1)
+        max_length = limits.get('max_length')
+        trim_whitespace = field.trim_whitespace
+
+        def check(value):
+            # Numbers are coerced to strings by the serializer
+            if type(value) is not str:
+                raise _Rejected
+            if trim_whitespace:
+                value = value.strip()
+            if (len(value) < min_length or (max_length is not None and len(value) > max_length)
+                    or '\x00' in value or _SURROGATES.search(value)):
+                raise _Rejected
+            return value
+        return check
+
+    def _compile_typed(self, field: serializers.Field, value_type: type) -> Callable[[Any], Any]:
+        limits = self._get_limits(field)
+        min_value, max_value = limits.get('min_value'), limits.get('max_value')
+
+        def check(value):
+            # Strings such as "1" or "true" are parsed by the serializer
+            if type(value) is not value_type:
+                raise _Rejected
+            if (min_value is not None and value < min_value) or (max_value is not None and value > max_value):
+                raise _Rejected
+            return value
+        return check
+
+    @staticmethod
+    def _get_limits(field: serializers.Field) -> Dict[str, Any]:
+        """Limit values of the field's validators (the tightest per kind)."""
+        limits = {}
+        for validator in field.validators:
+            if isinstance(validator, _BUILTIN_VALIDATORS):
+                continue
+            kind = _LIMIT_VALIDATORS.get(type(validator))
+            if kind is None or callable(validator.limit_value):
+                raise TypeError(f'{field.field_name!r}: validator {type(validator).__name__} is not supported.')
+            tighter = min if kind.startswith('max') else max
+            limits[kind] = tighter(limits[kind], validator.limit_value) if kind in limits else validator.limit_value
+        return limits
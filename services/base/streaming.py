@@ -0,0 +1,35 @@
+from typing import Any, Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+def stream_json_array(items: Iterable[Any], renderer: JSONRenderer = None) -> Iterator[bytes]:
+    """Encodes a JSON array element by element.
+
+    The concatenated output is byte-identical to rendering the whole list with
+    the same renderer, but only one element is held in memory at a time.
+
+    Args:
+        items: Array elements, typically a generator of serialized objects.
+        renderer: Renderer encoding every element; DRF ``JSONRenderer`` by default.
+
+    Yields:
+        bytes: Chunks of the encoded array.
+    """
+    renderer = renderer or JSONRenderer()
+    separator = b''
+    yield b'['
+    for item in items:
+        yield separator + renderer.render(item)
+        separator = b','
+    yield b']'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """Streams an iterable as a JSON array without building it in memory."""
+
+    def __init__(self, items: Iterable[Any], renderer: JSONRenderer = None, **kwargs):
+        renderer = renderer or JSONRenderer()
+        kwargs.setdefault('content_type', renderer.media_type)
+        super().__init__(stream_json_array(items, renderer), **kwargs)
@@ -0,0 +1,277 @@
+import datetime
+import io
+import json
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from services.base.cache import RefreshedPayload
+from services.base.parsers import MessagePackParser, ORJSONParser
+from services.base.renderers import MessagePackRenderer, ORJSONRenderer
+from services.base.serializers import CompiledValidator
+
+
+class _EventSerializer(serializers.Serializer):
+    title = serializers.CharField()
+    starts_at = serializers.DateTimeField()
+    day = serializers.DateField()
+    price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    ratio = serializers.DecimalField(max_digits=6, decimal_places=2, coerce_to_string=False)
+    key = serializers.UUIDField()
+
+
+class _PlaceSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=10)
+    code = serializers.CharField(max_length=2, min_length=2, trim_whitespace=False)
+    note = serializers.CharField(allow_blank=True, required=False)
+    codes = serializers.ListField(child=serializers.CharField(max_length=3), allow_empty=False)
+    rank = serializers.IntegerField(min_value=1, allow_null=True)
+    visible = serializers.BooleanField(required=False)
+
+
+class _PlaceListSerializer(serializers.Serializer):
+    places = _PlaceSerializer(many=True, max_length=3)
+
+
+class ORJSONRendererCompatibilityTests(SimpleTestCase):
+    """ORJSONRenderer выдает те же байты, что и JSONRenderer."""
+
+    payloads = [
+        None,
+        {},
+        [],
+        {'a': 1, 'b': [1, 2.5, -0.0, 0.1, 1e16, 1e300, True, False, None]},
+        [1e-4, 1e-5, 2.5e-7, 5e-324, -1e-10, 9999999999999998.0, 1e16, -1.5e17, 1e22],
+        {'text': '1e16 0.00001'},
+        [2 ** 63 - 1, -2 ** 63, 2 ** 64, -2 ** 70],
+        {'text': 'Привет, мир! 😀     \x00 \x1f \x7f "quoted" \\ / \t\n\r\b\f'},
+        {1: 'int key', 'nested': {None: 'none key', True: 'bool key'}},
+        ('tuple', ('nested',)),
+        {'naive': datetime.datetime(2024, 5, 17, 10, 30, 15)},
+        {'aware': datetime.datetime(2024, 5, 17, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc)},
+        {'offset': datetime.datetime(2024, 5, 17, 10, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5)))},
+        {'date': datetime.date(2024, 5, 17), 'time': datetime.time(10, 30, 15, 500)},
+        {'duration': datetime.timedelta(days=1, seconds=5)},
+        {'decimal': Decimal('12.50'), 'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+        {'lazy': gettext_lazy('Lazy string')},
+        {'bytes': b'raw bytes', 'set': {3}, 'frozenset': frozenset(['x'])},
+    ]
+
+    def assertSameBytes(self, data, accepted_media_type=None, renderer_context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type, renderer_context), expected)
+
+    def test_payloads(self):
+        for data in self.payloads:
+            with self.subTest(data=data):
+                self.assertSameBytes(data)
+
+    def test_serializer_output(self):
+        event = {
+            'title': 'Фестиваль',
+            'starts_at': timezone.now(),
+            'day': datetime.date(2024, 5, 17),
+            'price': Decimal('9.90'),
+            'ratio': Decimal('0.25'),
+            'key': uuid.uuid4(),
+        }
+        self.assertSameBytes(_EventSerializer(event).data)
+        self.assertSameBytes(_EventSerializer([event, event], many=True).data)
+
+    def test_indent(self):
+        data = {'a': [1, {'b': 'c'}]}
+        self.assertSameBytes(data, 'application/json; indent=4')
+        self.assertSameBytes(data, None, {'indent': 2})
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            JSONRenderer().render({'object': object()})
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({'object': object()})
+
+
+class ORJSONParserCompatibilityTests(SimpleTestCase):
+    """ORJSONParser принимает и отклоняет те же тела запросов, что и JSONParser."""
+
+    bodies = [
+        b'{"title": "Post", "tags": [1, 2], "country": null}',
+        '{"текст": "Привет 😀"}'.encode(),
+        b'[1, 2.5, -0.0, 1e16, true, false]',
+        b'123456789012345678901234567890',
+        b'"\\ud83d\\ude00 \\u2028"',
+        b'"\\ud800"',
+        b'{"a": 1, "a": 2}',
+        b' \n {"spaces": true} \n ',
+        b'',
+        b'{',
+        b'[1, 2,]',
+        b'{"a": NaN}',
+        b'Infinity',
+        b'\xef\xbb\xbf{}',
+        b'{"a": "\xff"}',
+        b"{'single': 'quotes'}",
+    ]
+
+    @staticmethod
+    def parse(parser, body, parser_context=None):
+        try:
+            return 'ok', parser.parse(io.BytesIO(body), 'application/json', parser_context)
+        except ParseError:
+            return 'error', None
+
+    def test_bodies(self):
+        for body in self.bodies:
+            with self.subTest(body=body):
+                self.assertEqual(self.parse(ORJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_other_encoding(self):
+        body = '{"name": "Ünïcode"}'.encode('latin-1')
+        context = {'encoding': 'latin-1'}
+        self.assertEqual(self.parse(ORJSONParser(), body, context), ('ok', {'name': 'Ünïcode'}))
+
+
+class MessagePackTests(SimpleTestCase):
+    """MessagePack: те же данные, что и в JSON, datetime с часовым поясом - расширением Timestamp."""
+
+    def test_round_trip(self):
+        starts_at = datetime.datetime(2024, 5, 17, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+        data = serializers.ReturnDict({
+            'title': 'Фестиваль',
+            'tags': serializers.ReturnList([{'id': 1, 'name': 'travel'}], serializer=None),
+            'starts_at': starts_at,
+            'naive': datetime.datetime(2024, 5, 17, 10, 30),
+            'day': datetime.date(2024, 5, 17),
+            'price': Decimal('9.90'),
+            'key': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Lazy string'),
+            'empty': None,
+        }, serializer=None)
+        body = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(parsed.pop('starts_at'), starts_at)
+        expected = json.loads(JSONRenderer().render(data))
+        expected.pop('starts_at')
+        self.assertEqual(parsed, expected)
+        self.assertLess(len(body), len(JSONRenderer().render(data)))
+
+    def test_invalid_body(self):
+        for body in (b'', b'\xc1', b'\x92\x01'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                MessagePackParser().parse(io.BytesIO(body))
+
+
+class RefreshedPayloadTests(SimpleTestCase):
+    """Устаревший ответ отдается сразу, а пересобирается одним потоком."""
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+        self.release = threading.Event()
+
+    def build(self):
+        self.builds += 1
+        self.release.wait(5)
+        return f'payload {self.builds}'.encode()
+
+    def test_cold_start_is_single_flight(self):
+        payload = RefreshedPayload('test:payload', refresh_interval=60, stale_timeout=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(payload.get('json', self.build))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(results, [b'payload 1'] * 5)
+
+    def test_stale_payload_is_served_while_rebuilt(self):
+        payload = RefreshedPayload('test:payload', refresh_interval=0, stale_timeout=60)
+        payload.set('json', b'stale')
+        self.assertEqual(payload.get('json', self.build), b'stale')
+        # Пересборка уже идет: второй запрос ее не запускает
+        self.assertEqual(payload.get('json', self.build), b'stale')
+        self.release.set()
+        for _ in range(100):
+            if cache.get(payload.get_lock_key('json')) is None:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(cache.get(payload.get_key('json'))[1], b'payload 1')
+
+
+class CompiledValidatorTests(SimpleTestCase):
+    """CompiledValidator принимает и отклоняет то же, что и сериализатор, с тем же результатом."""
+
+    place = {'name': ' Lima ', 'code': 'PE', 'codes': ['51'], 'rank': 1, 'visible': True, 'extra': 1}
+    payloads = [
+        {'places': [place]},
+        {'places': [place, dict(place, note='', rank=None), {k: v for k, v in place.items() if k != 'visible'}]},
+        {'places': []},
+        {'places': [dict(place, name='   ')]},
+        {'places': [dict(place, name='x' * 11)]},
+        {'places': [dict(place, name=51)]},
+        {'places': [dict(place, name=True)]},
+        {'places': [dict(place, name='a\x00b')]},
+        {'places': [dict(place, code=' P')]},
+        {'places': [dict(place, code='PER')]},
+        {'places': [dict(place, codes=[])]},
+        {'places': [dict(place, codes='51')]},
+        {'places': [dict(place, codes=['5100'])]},
+        {'places': [dict(place, rank='2')]},
+        {'places': [dict(place, rank=0)]},
+        {'places': [dict(place, rank=True)]},
+        {'places': [dict(place, visible='true')]},
+        {'places': [{k: v for k, v in place.items() if k != 'rank'}]},
+        {'places': [place] * 4},
+        {'places': place},
+        {'places': ['Lima']},
+        {'places': None},
+        {},
+        [],
+    ]
+
+    def test_same_behaviour_as_serializer(self):
+        validator = CompiledValidator(_PlaceListSerializer)
+        for data in self.payloads:
+            with self.subTest(data=data):
+                serializer = _PlaceListSerializer(data=data)
+                if serializer.is_valid():
+                    self.assertEqual(validator.validate(data), serializer.validated_data)
+                else:
+                    with self.assertRaises(ValidationError) as error:
+                        validator.validate(data)
+                    self.assertEqual(error.exception.detail, serializer.errors)
+
+    def test_valid_data_skips_serializer(self):
+        validator = CompiledValidator(_PlaceListSerializer)
+        with mock.patch.object(_PlaceListSerializer, 'is_valid') as is_valid:
+            validator.validate({'places': [self.place]})
+        is_valid.assert_not_called()
+
+    def test_unsupported_serializer(self):
+        class EmailSerializer(serializers.Serializer):
+            email = serializers.EmailField()
+
+        class ValidatedSerializer(serializers.Serializer):
+            name = serializers.CharField()
+
+            def validate_name(self, value):
+                return value.title()
+
+        for serializer_class in (EmailSerializer, ValidatedSerializer):
+            with self.subTest(serializer=serializer_class.__name__), self.assertRaises(TypeError):
+                CompiledValidator(serializer_class)
@@ -1,13 +1,24 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
+from urllib.parse import quote
 
 from rest_framework.exceptions import ValidationError
 
+from services.base.cache import ReadThroughCache
+from services.base.serializers import CompiledValidator
 from services.country_layer.serializers import CountryLayerListSerializer
-from services.request_service.request_service import ServiceRequest
-from travel_verse.settings import COUNTRY_LAYER_BASE_URL, COUNTRY_LAYER_API_KEY
+from services.request_service.exceptions import ResourceNotFoundError
+from services.request_service.async_request_service import AsyncServiceRequest
+from travel_verse.settings import (
+    COUNTRY_LAYER_BASE_URL, COUNTRY_LAYER_API_KEY, COUNTRY_LAYER_CACHE_TIMEOUT, COUNTRY_LAYER_NEGATIVE_CACHE_TIMEOUT,
+)
 
 
-class CountryLayerService(ServiceRequest):
+class CountryNotFoundError(ValidationError):
+    """CountryLayer вернул пустой список стран."""
+    default_detail = "Страна не найдена."
+
+
+class CountryLayerService(AsyncServiceRequest):
     BASE_URL: str = COUNTRY_LAYER_BASE_URL
     API_KEY: str = COUNTRY_LAYER_API_KEY
     HEADERS: dict = {
@@ -16,33 +27,91 @@ class CountryLayerService(ServiceRequest):
 
     @classmethod
     def _make_request(cls, endpoint: str, method: str, **kwargs):
+        return super()._make_request(endpoint, method, **cls._with_access_key(kwargs))
+
+    @classmethod
+    async def _amake_request(cls, endpoint: str, method: str, **kwargs):
+        return await super()._amake_request(endpoint, method, **cls._with_access_key(kwargs))
+
+    @classmethod
+    def _with_access_key(cls, kwargs: dict) -> dict:
         params = kwargs.get('params', {})
         params['access_key'] = cls.API_KEY
         kwargs['params'] = params
-        return super()._make_request(endpoint, method, **kwargs)
+        return kwargs
+
+    country_validator = CompiledValidator(CountryLayerListSerializer)
+
+    # Данные стран почти не меняются: ответы (и "страна не найдена") кешируются по названию
+    # в постоянном кеше 'country_layer', переживающем перезапуск процессов. Ответ, не прошедший
+    # проверку схемы (ValidationError), и остальные ошибки клиента (неверный ключ, лимит запросов)
+    # не кешируются: страна отсутствует только при ответе 404 или пустом списке
+    country_cache = ReadThroughCache(
+        'country_layer:country', COUNTRY_LAYER_CACHE_TIMEOUT, COUNTRY_LAYER_NEGATIVE_CACHE_TIMEOUT, alias='country_layer',
+    )
 
     @classmethod
     def get_country_by_name(cls, country_name: str) -> Dict[str, Any]:
         """
-        Найти страну по названию.
+        Найти страну по названию (через кеш; одновременные промахи по одной стране
+        выполняют один запрос к CountryLayer).
         """
-        endpoint = f'name/{country_name}'
-        response = cls._make_request(endpoint, cls.GET, headers=cls.HEADERS)
-        country_data = response.json()
+        return cls.country_cache.get_or_load(
+            cls._get_cache_key(country_name),
+            lambda: cls.fetch_country_by_name(country_name),
+            not_found=(ResourceNotFoundError, CountryNotFoundError),
+        )
 
-        if country_data:
-            return cls._validate_country_data(country_data)
-        else:
-            raise ValidationError("Страна не найдена.")
+    @classmethod
+    async def aget_country_by_name(cls, country_name: str) -> Dict[str, Any]:
+        """
+        Асинхронный вариант get_country_by_name: ожидание CountryLayer не занимает поток.
+        """
+        return await cls.country_cache.aget_or_load(
+            cls._get_cache_key(country_name),
+            lambda: cls.afetch_country_by_name(country_name),
+            not_found=(ResourceNotFoundError, CountryNotFoundError),
+        )
 
     @staticmethod
-    def _validate_country_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_cache_key(country_name: str) -> str:
+        return quote(country_name.strip().casefold())
+
+    @classmethod
+    def fetch_country_by_name(cls, country_name: str) -> Dict[str, Any]:
         """
-        Валидация данных о стране через сериализатор.
+        Найти страну по названию запросом к CountryLayer.
         """
-        serializer = CountryLayerListSerializer(data={'countries': data})
-        if serializer.is_valid():
-            return serializer.validated_data['countries']
+        response = cls._make_request(f'name/{country_name}', cls.GET, headers=cls.HEADERS)
+        return cls.parse_country_data(response.json())
+
+    @classmethod
+    async def afetch_country_by_name(cls, country_name: str) -> Dict[str, Any]:
+        response = await cls._amake_request(f'name/{country_name}', cls.GET, headers=cls.HEADERS)
+        return cls.parse_country_data(response.json())
+
+    @classmethod
+    def fetch_all_countries(cls) -> List[Dict[str, Any]]:
+        """
+        Получить весь справочник стран CountryLayer одним запросом.
+        """
+        response = cls._make_request('all', cls.GET, headers=cls.HEADERS)
+        return cls.parse_country_data(response.json())
+
+    @classmethod
+    def parse_country_data(cls, country_data) -> Dict[str, Any]:
+        """
+        Проверить список стран из ответа CountryLayer (или его сохраненной копии).
+        """
+        if country_data:
+            return cls._validate_country_data(country_data)
         else:
-            raise ValidationError(serializer.errors)
+            raise CountryNotFoundError()
 
+    @classmethod
+    def _validate_country_data(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Валидация данных о стране: тот же результат и те же ошибки, что у
+        CountryLayerListSerializer, но корректный ответ проверяется без полей DRF.
+        """
+        return cls.country_validator.validate({'countries': data})['countries']
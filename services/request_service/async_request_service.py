@@ -0,0 +1,72 @@
+import asyncio
+import weakref
+from urllib.parse import urljoin
+
+import httpx
+from django.conf import settings
+from rest_framework.status import is_server_error
+
+from services.request_service.circuit_breaker import circuit_breakers
+from services.request_service.exceptions import HubServerError
+from services.request_service.metrics import upstream_metrics
+from services.request_service.request_service import METHODS, ServiceRequest
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Creates a client with pooled keep-alive connections sized like the sync
+    session; connection errors are retried by the transport for any method."""
+    limits = httpx.Limits(max_connections=settings.HTTP_POOL_MAXSIZE, max_keepalive_connections=settings.HTTP_POOL_MAXSIZE)
+    transport = httpx.AsyncHTTPTransport(retries=settings.HTTP_RETRIES, limits=limits)
+    return httpx.AsyncClient(transport=transport)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the client of the running event loop: httpx connections belong
+    to the loop they were opened in, so each loop has its own pool."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = create_async_client()
+    return client
+
+
+class AsyncServiceRequest(ServiceRequest):
+    """
+    ServiceRequest с асинхронным вариантом запроса (httpx) для ASGI: ожидание
+    ответа внешнего сервиса не занимает поток. Таймауты, повторы GET с паузой,
+    метрики и ошибки (ClientNotFoundError, HubServerError) - как у синхронного.
+    """
+    RETRY_STATUSES = (502, 503, 504)
+    IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+    @classmethod
+    def _get_async_timeout(cls) -> httpx.Timeout:
+        connect, read = cls._get_timeout()
+        return httpx.Timeout(read, connect=connect)
+
+    @classmethod
+    async def _amake_request(cls, endpoint: str, method: METHODS, **kwargs):
+        url = f'{urljoin(cls._get_base_url(), endpoint)}'
+        kwargs.setdefault('timeout', cls._get_async_timeout())
+        attempts = settings.HTTP_RETRIES + 1 if method.upper() in cls.IDEMPOTENT_METHODS else 1
+        upstream = cls.get_upstream()
+        with circuit_breakers.get(upstream).guard(), upstream_metrics.measure(upstream):
+            for attempt in range(attempts):
+                if attempt:
+                    await asyncio.sleep(settings.HTTP_RETRY_BACKOFF * 2 ** (attempt - 1))
+                last_attempt = attempt + 1 == attempts
+                try:
+                    response = await get_async_client().request(method, url, **kwargs)
+                except httpx.TransportError as exc:
+                    if last_attempt:
+                        raise HubServerError() from exc
+                    continue
+                if last_attempt or response.status_code not in cls.RETRY_STATUSES:
+                    break
+            if is_server_error(response.status_code):
+                raise HubServerError()
+
+        cls._check_response(response)
+        return response
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+from django.conf import settings
+
+from services.request_service.exceptions import CircuitOpenError, HubServerError
+
+
+class CircuitBreaker:
+    """Per-process circuit breaker of one upstream.
+
+    Closed: calls go through, and the outcomes of the last
+    ``HTTP_BREAKER_WINDOW`` calls are kept. A call is a failure if it raised
+    ``HubServerError`` (connection error, timeout, 5xx) or took longer than
+    ``HTTP_BREAKER_SLOW_CALL`` seconds. Once the window holds at least
+    ``HTTP_BREAKER_MIN_CALLS`` outcomes and the failure rate reaches
+    ``HTTP_BREAKER_FAILURE_RATE``, the circuit opens.
+
+    Open: calls fail at once with ``CircuitOpenError`` for
+    ``HTTP_BREAKER_OPEN_TIMEOUT`` seconds, so an outage costs no worker time.
+
+    Half-open: after that a single probe call is let through; its success
+    closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._open_timeout_passed():
+                return self.HALF_OPEN
+            return self._state
+
+    @contextmanager
+    def guard(self):
+        """Lets the block run if the circuit allows it and records its outcome."""
+        probe = self._before_call()
+        started = time.perf_counter()
+        try:
+            yield
+        except HubServerError:
+            self._record(False, probe)
+            raise
+        except BaseException:
+            # Not an upstream failure: only release the probe slot
+            self._record(None, probe)
+            raise
+        self._record(time.perf_counter() - started < settings.HTTP_BREAKER_SLOW_CALL, probe)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _before_call(self) -> bool:
+        """Returns whether the call is the half-open probe; raises when the circuit is open."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN and self._open_timeout_passed():
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            raise CircuitOpenError()
+
+    def _record(self, success, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                if success:
+                    self._close()
+                elif success is False:
+                    self._open()
+                return
+            if success is None or self._state != self.CLOSED:
+                return
+            self._outcomes.append(success)
+            while len(self._outcomes) > settings.HTTP_BREAKER_WINDOW:
+                self._outcomes.popleft()
+            failures = self._outcomes.count(False)
+            if (len(self._outcomes) >= settings.HTTP_BREAKER_MIN_CALLS
+                    and failures / len(self._outcomes) >= settings.HTTP_BREAKER_FAILURE_RATE):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        self._state = self.CLOSED
+        self._outcomes.clear()
+        self._probe_in_flight = False
+
+    def _open_timeout_passed(self) -> bool:
+        return time.monotonic() - self._opened_at >= settings.HTTP_BREAKER_OPEN_TIMEOUT
+
+
+class CircuitBreakers:
+    """Circuit breakers of all upstreams of the process, created on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, upstream: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(upstream)
+            if breaker is None:
+                breaker = self._breakers[upstream] = CircuitBreaker(upstream)
+            return breaker
+
+    def snapshot(self) -> Dict[str, str]:
+        """Returns the state of every upstream's circuit."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.state for breaker in breakers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakers()
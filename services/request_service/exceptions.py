@@ -6,6 +6,14 @@ class ClientNotFoundError(APIException):
     default_detail = 'Неверный формат запроса!'
 
 
+class ResourceNotFoundError(ClientNotFoundError):
+    """Сервис ответил 404: запрошенного объекта нет."""
+
+
 class HubServerError(APIException):
     status_code = 400
     default_detail = 'Ошибка сервиса ...!'
+
+
+class CircuitOpenError(HubServerError):
+    default_detail = 'Сервис временно недоступен.'
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+
+class UpstreamMetrics:
+    """Per-process latency and error counters of external services.
+
+    Every ``ServiceRequest`` call is recorded under its upstream name. Recent
+    latencies are kept in a bounded window, so percentiles reflect the current
+    state of the upstream rather than the whole lifetime of the process.
+
+    Attributes:
+        window: How many recent latencies are kept per upstream.
+    """
+
+    window = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._upstreams: Dict[str, dict] = {}
+
+    @contextmanager
+    def measure(self, upstream: str):
+        """Times the block; an exception raised in it counts as an error."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(upstream, time.perf_counter() - started, error=True)
+            raise
+        self.record(upstream, time.perf_counter() - started)
+
+    def record(self, upstream: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._upstreams.setdefault(
+                upstream, {'requests': 0, 'errors': 0, 'latencies': deque(maxlen=self.window)}
+            )
+            stats['requests'] += 1
+            stats['errors'] += error
+            stats['latencies'].append(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns request and error counts and latency percentiles in ms per upstream."""
+        with self._lock:
+            upstreams = {name: (stats['requests'], stats['errors'], sorted(stats['latencies']))
+                         for name, stats in self._upstreams.items()}
+        snapshot = {}
+        for name, (requests, errors, latencies) in upstreams.items():
+            snapshot[name] = {
+                'requests': requests,
+                'errors': errors,
+                'p50_ms': self._percentile(latencies, 0.5),
+                'p95_ms': self._percentile(latencies, 0.95),
+                'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+            }
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._upstreams.clear()
+
+    @staticmethod
+    def _percentile(latencies, fraction: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000
+
+
+upstream_metrics = UpstreamMetrics()
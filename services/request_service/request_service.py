@@ -1,16 +1,63 @@
-
+import os
+import threading
 from abc import ABC, abstractmethod
 from json import JSONDecodeError
 from typing import Literal
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 from rest_framework.status import is_client_error, is_server_error
+from urllib3.util.retry import Retry
 
-from services.request_service.exceptions import ClientNotFoundError, HubServerError
+from services.request_service.circuit_breaker import circuit_breakers
+from services.request_service.exceptions import ClientNotFoundError, HubServerError, ResourceNotFoundError
+from services.request_service.metrics import upstream_metrics
 
 METHODS = Literal['post', 'get']
 
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def create_session() -> requests.Session:
+    """Creates a session with pooled keep-alive connections.
+
+    Idempotent requests (GET, HEAD) are retried with exponential backoff on
+    connection errors, read timeouts and 502/503/504 responses.
+    """
+    retry = Retry(
+        total=settings.HTTP_RETRIES,
+        backoff_factor=settings.HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Returns the session of this process, shared by all ServiceRequest
+    subclasses, so connections to an upstream stay warm between requests.
+    A forked worker gets its own session instead of the parent's sockets."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session, _session_pid = create_session(), pid
+    return _session
+
 
 class BaseRequest(ABC):
     POST = 'post'
@@ -24,19 +71,45 @@ class BaseRequest(ABC):
 
 class ServiceRequest(BaseRequest):
     BASE_URL = None
+    # (connect, read) в секундах; подклассы могут задать свои
+    TIMEOUT = None
 
     @classmethod
     def _get_base_url(cls):
         return cls.BASE_URL
 
+    @classmethod
+    def _get_timeout(cls):
+        return cls.TIMEOUT or (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+    @classmethod
+    def get_upstream(cls) -> str:
+        """Имя внешнего сервиса в метриках: хост BASE_URL."""
+        return urlsplit(cls._get_base_url() or '').netloc or cls.__name__
+
     @classmethod
     def _make_request(cls, endpoint: str, method: METHODS, **kwargs):
         url = f'{urljoin(cls._get_base_url(), endpoint)}'
-        response = requests.request(
-            method,
-            url,
-            **kwargs
-        )
+        kwargs.setdefault('timeout', cls._get_timeout())
+        upstream = cls.get_upstream()
+        with circuit_breakers.get(upstream).guard(), upstream_metrics.measure(upstream):
+            try:
+                response = get_session().request(
+                    method,
+                    url,
+                    **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                raise HubServerError() from exc
+            if is_server_error(response.status_code):
+                raise HubServerError()
+
+        cls._check_response(response)
+        return response
+
+    @classmethod
+    def _check_response(cls, response):
+        """Ошибки клиента (4xx) - ClientNotFoundError с сообщением сервиса (404 - ResourceNotFoundError)."""
         if is_client_error(response.status_code):
             error_msg = None
 
@@ -46,12 +119,8 @@ class ServiceRequest(BaseRequest):
             except JSONDecodeError:
                 response.raise_for_status()
 
+            if response.status_code == 404:
+                raise ResourceNotFoundError(detail=error_msg)
             raise ClientNotFoundError(detail=error_msg)
 
-        elif is_server_error(response.status_code):
-
-            raise HubServerError()
-
         response.raise_for_status()
-
-        return response
@@ -0,0 +1,244 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from services.request_service import request_service
+from services.request_service.async_request_service import AsyncServiceRequest
+from services.request_service.circuit_breaker import CircuitBreaker, circuit_breakers
+from services.request_service.exceptions import CircuitOpenError, ClientNotFoundError, HubServerError, ResourceNotFoundError
+from services.request_service.metrics import upstream_metrics
+from services.request_service.request_service import ServiceRequest
+
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    responses = []
+
+    def do_GET(self):
+        self.server.requests.append((self.command, self.path, self.client_address[1]))
+        status, delay = self.responses.pop(0) if self.responses else (200, 0)
+        time.sleep(delay)
+        body = b'{"message": "error"}' if status >= 400 else b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class _UpstreamServer(ThreadingHTTPServer):
+
+    def handle_error(self, request, client_address):
+        # Клиент закрыл соединение по таймауту, не дочитав ответ
+        pass
+
+
+@override_settings(HTTP_RETRIES=2, HTTP_RETRY_BACKOFF=0, HTTP_CONNECT_TIMEOUT=1, HTTP_READ_TIMEOUT=0.5)
+class ServiceRequestTests(SimpleTestCase):
+    """Запросы идут через общий пул соединений, с таймаутами, повторами GET и метриками."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = _UpstreamServer(('127.0.0.1', 0), _UpstreamHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.shutdown)
+
+        class Upstream(ServiceRequest):
+            BASE_URL = f'http://127.0.0.1:{cls.server.server_port}/api/'
+
+        cls.upstream = Upstream
+
+    def setUp(self):
+        # Новая сессия с настройками теста
+        request_service._session = None
+        self.server.requests.clear()
+        _UpstreamHandler.responses = []
+        upstream_metrics.reset()
+        circuit_breakers.reset()
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.upstream._make_request('countries', ServiceRequest.GET).json(), {'ok': True})
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+
+    def test_get_is_retried(self):
+        _UpstreamHandler.responses = [(503, 0), (502, 0)]
+        self.assertEqual(self.upstream._make_request('countries', ServiceRequest.GET).status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_post_is_not_retried(self):
+        _UpstreamHandler.responses = [(503, 0)]
+        with self.assertRaises(HubServerError):
+            self.upstream._make_request('countries', ServiceRequest.POST)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_timeout(self):
+        _UpstreamHandler.responses = [(200, 1)] * 3
+        started = time.monotonic()
+        with self.assertRaises(HubServerError):
+            self.upstream._make_request('countries', ServiceRequest.GET)
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_client_error(self):
+        _UpstreamHandler.responses = [(404, 0), (401, 0)]
+        with self.assertRaises(ResourceNotFoundError):
+            self.upstream._make_request('countries', ServiceRequest.GET)
+        with self.assertRaises(ClientNotFoundError) as error:
+            self.upstream._make_request('countries', ServiceRequest.GET)
+        self.assertNotIsInstance(error.exception, ResourceNotFoundError)
+
+    def test_metrics(self):
+        _UpstreamHandler.responses = [(200, 0), (500, 0)]
+        self.upstream._make_request('countries', ServiceRequest.GET)
+        with self.assertRaises(HubServerError):
+            self.upstream._make_request('countries', ServiceRequest.POST)
+        metrics = upstream_metrics.snapshot()[self.upstream.get_upstream()]
+        self.assertEqual((metrics['requests'], metrics['errors']), (2, 1))
+        self.assertGreater(metrics['p95_ms'], 0)
+
+
+@override_settings(HTTP_RETRIES=2, HTTP_RETRY_BACKOFF=0, HTTP_CONNECT_TIMEOUT=1, HTTP_READ_TIMEOUT=0.5)
+class AsyncServiceRequestTests(SimpleTestCase):
+    """Асинхронный клиент повторяет поведение синхронного: пул, повторы GET, таймауты, ошибки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = _UpstreamServer(('127.0.0.1', 0), _UpstreamHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.shutdown)
+
+        class Upstream(AsyncServiceRequest):
+            BASE_URL = f'http://127.0.0.1:{cls.server.server_port}/api/'
+
+        cls.upstream = Upstream
+
+    def setUp(self):
+        self.server.requests.clear()
+        _UpstreamHandler.responses = []
+        upstream_metrics.reset()
+        circuit_breakers.reset()
+
+    async def test_connections_are_reused(self):
+        for _ in range(3):
+            response = await self.upstream._amake_request('countries', ServiceRequest.GET)
+            self.assertEqual(response.json(), {'ok': True})
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+
+    async def test_concurrent_requests(self):
+        _UpstreamHandler.responses = [(200, 0.3)] * 5
+        started = time.monotonic()
+        await asyncio.gather(*(self.upstream._amake_request('countries', ServiceRequest.GET) for _ in range(5)))
+        self.assertLess(time.monotonic() - started, 1)
+
+    async def test_get_is_retried(self):
+        _UpstreamHandler.responses = [(503, 0), (502, 0)]
+        response = await self.upstream._amake_request('countries', ServiceRequest.GET)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    async def test_post_is_not_retried(self):
+        _UpstreamHandler.responses = [(503, 0)]
+        with self.assertRaises(HubServerError):
+            await self.upstream._amake_request('countries', ServiceRequest.POST)
+        self.assertEqual(len(self.server.requests), 1)
+
+    async def test_timeout(self):
+        _UpstreamHandler.responses = [(200, 1)] * 3
+        with self.assertRaises(HubServerError):
+            await self.upstream._amake_request('countries', ServiceRequest.GET)
+        metrics = upstream_metrics.snapshot()[self.upstream.get_upstream()]
+        self.assertEqual((metrics['requests'], metrics['errors']), (1, 1))
+
+    async def test_client_error(self):
+        _UpstreamHandler.responses = [(404, 0)]
+        with self.assertRaises(ClientNotFoundError) as error:
+            await self.upstream._amake_request('countries', ServiceRequest.GET)
+        self.assertEqual(error.exception.detail, 'error')
+
+
+@override_settings(HTTP_BREAKER_WINDOW=4, HTTP_BREAKER_MIN_CALLS=4, HTTP_BREAKER_FAILURE_RATE=0.5,
+                   HTTP_BREAKER_SLOW_CALL=0.1, HTTP_BREAKER_OPEN_TIMEOUT=0.2)
+class CircuitBreakerTests(SimpleTestCase):
+    """Circuit breaker открывается по доле ошибок и медленных запросов и проверяет сервис одним запросом."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker('upstream')
+
+    def call(self, error=False, delay=0):
+        with self.breaker.guard():
+            time.sleep(delay)
+            if error:
+                raise HubServerError()
+
+    def fail(self, times):
+        for _ in range(times):
+            with self.assertRaises(HubServerError):
+                self.call(error=True)
+
+    def test_opens_on_failure_rate(self):
+        self.call()
+        self.call()
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.call()
+
+    def test_slow_calls_are_failures(self):
+        self.call()
+        self.call()
+        self.call(delay=0.15)
+        self.call(delay=0.15)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_client_errors_are_not_failures(self):
+        for _ in range(4):
+            with self.assertRaises(ClientNotFoundError):
+                with self.breaker.guard():
+                    raise ClientNotFoundError()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe(self):
+        self.fail(4)
+        time.sleep(0.2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # Пробный запрос неудачен - снова открыт
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.2)
+        with self.breaker.guard():
+            # Пока идет пробный запрос, остальные завершаются сразу
+            with self.assertRaises(CircuitOpenError):
+                self.call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    @override_settings(HTTP_RETRIES=0, HTTP_READ_TIMEOUT=0.5)
+    def test_open_circuit_skips_upstream(self):
+        server = _UpstreamServer(('127.0.0.1', 0), _UpstreamHandler)
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+
+        class Upstream(ServiceRequest):
+            BASE_URL = f'http://127.0.0.1:{server.server_port}/api/'
+
+        circuit_breakers.reset()
+        _UpstreamHandler.responses = [(500, 0)] * 4
+        for _ in range(5):
+            with self.assertRaises(HubServerError):
+                Upstream._make_request('countries', ServiceRequest.GET)
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(circuit_breakers.snapshot(), {Upstream.get_upstream(): CircuitBreaker.OPEN})
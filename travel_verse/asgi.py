@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_verse.settings')
+# Под ASGI представления ждут внешние сервисы асинхронно
+os.environ.setdefault('ASYNC_EXTERNAL_CALLS', 'True')
 
 application = get_asgi_application()
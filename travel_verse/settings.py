@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv  # добавляем для загрузки данных из .env
@@ -83,6 +84,31 @@ DATABASES = {
     }
 }
 
+# Cache
+# Общий кеш для снимков ответов; без REDIS_URL используется локальная память процесса
+REDIS_URL = os.getenv('REDIS_URL')
+# Ответы CountryLayer хранятся отдельно и переживают перезапуск процессов без внешних сервисов:
+# в файлах COUNTRY_LAYER_CACHE_DIR (по умолчанию во временном каталоге системы, вне репозитория) или в таблице БД (COUNTRY_LAYER_CACHE_BACKEND=db,
+# таблица создается командой createcachetable)
+COUNTRY_LAYER_CACHE_BACKEND = os.getenv('COUNTRY_LAYER_CACHE_BACKEND', 'file')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'country_layer': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'country_layer_cache',
+    } if COUNTRY_LAYER_CACHE_BACKEND == 'db' else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'COUNTRY_LAYER_CACHE_DIR', Path(tempfile.gettempdir()) / 'social_verse' / 'country_layer'
+        ),
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,6 +143,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
 
+# JSON API: orjson - быстрый кодировщик с тем же выводом, что у JSONRenderer; json - стандартный DRF
+API_JSON_BACKEND = os.getenv('API_JSON_BACKEND', 'orjson')
+if API_JSON_BACKEND == 'orjson':
+    JSON_RENDERER_CLASS = 'services.base.renderers.ORJSONRenderer'
+    JSON_PARSER_CLASS = 'services.base.parsers.ORJSONParser'
+else:
+    JSON_RENDERER_CLASS = 'rest_framework.renderers.JSONRenderer'
+    JSON_PARSER_CLASS = 'rest_framework.parsers.JSONParser'
+
+# Кеш пользователей JWT сбрасывается во всех процессах через версии в общем кеше, поэтому
+# включается только с Redis; с кешем в памяти процесса пользователь читается из базы на каждый запрос
+if REDIS_URL:
+    JWT_AUTHENTICATION_CLASS = 'apps.users.authentication.CachedJWTAuthentication'
+else:
+    JWT_AUTHENTICATION_CLASS = 'rest_framework_simplejwt.authentication.JWTAuthentication'
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DATE_FORMAT': "%d-%m-%Y",
@@ -125,15 +167,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'services.base.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        JWT_AUTHENTICATION_CLASS,
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER_CLASS,
+        'services.base.renderers.MessagePackRenderer',  # Accept: application/msgpack
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        JSON_PARSER_CLASS,
+        'services.base.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -152,9 +201,81 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Пользователи для JWT-аутентификации кешируются в памяти процесса (только колонки аутентификации, только с REDIS_URL)
+AUTH_USER_CACHE_TIMEOUT = float(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+
+# Feed settings
+# Главная страница читает материализованную ленту; False - собирать ленту запросом по подпискам
+FEED_MATERIALIZED_TIMELINE = os.getenv('FEED_MATERIALIZED_TIMELINE', 'True') == 'True'
+# Сколько последних постов переносится в ленту при подписке на автора, страну или тег
+TIMELINE_BACKFILL_LIMIT = int(os.getenv('TIMELINE_BACKFILL_LIMIT', 500))
+# Посты авторов с таким числом подписчиков не раскладываются по лентам, а подмешиваются при чтении
+FEED_PULL_FOLLOWER_THRESHOLD = int(os.getenv('FEED_PULL_FOLLOWER_THRESHOLD', 10000))
+# Как долго (в секундах) кешируется список таких авторов
+FEED_PULL_AUTHORS_CACHE_TIMEOUT = int(os.getenv('FEED_PULL_AUTHORS_CACHE_TIMEOUT', 300))
+
+# Ранжированная лента (?order=ranked): рейтинг = log10(вовлеченность) + время публикации / FEED_RANK_DECAY_SECONDS
+FEED_RANK_LIKE_WEIGHT = float(os.getenv('FEED_RANK_LIKE_WEIGHT', 1))
+FEED_RANK_COMMENT_WEIGHT = float(os.getenv('FEED_RANK_COMMENT_WEIGHT', 3))
+FEED_RANK_DECAY_SECONDS = float(os.getenv('FEED_RANK_DECAY_SECONDS', 45000))
+# Надбавка к рейтингу за совпадение с подпиской (1 = в 10 раз больше вовлеченности)
+FEED_RANK_AUTHOR_WEIGHT = float(os.getenv('FEED_RANK_AUTHOR_WEIGHT', 1))
+FEED_RANK_COUNTRY_WEIGHT = float(os.getenv('FEED_RANK_COUNTRY_WEIGHT', 0.5))
+FEED_RANK_TAG_WEIGHT = float(os.getenv('FEED_RANK_TAG_WEIGHT', 0.25))
+
+# Сколько последних постов каждой страны показывается в профиле пользователя (posts_by_country)
+USER_POSTS_PER_COUNTRY = int(os.getenv('USER_POSTS_PER_COUNTRY', 5))
+
+# Сколько строк читается из курсора за раз при потоковой выдаче списков (?stream=true)
+STREAMING_CHUNK_SIZE = int(os.getenv('STREAMING_CHUNK_SIZE', 2000))
+
+# Лайки: изменения счетчика копятся в памяти процесса и записываются пачкой
+# раз в LIKE_COUNTER_FLUSH_INTERVAL секунд (0 - сразу) или при накоплении LIKE_COUNTER_FLUSH_SIZE постов
+LIKE_COUNTER_FLUSH_INTERVAL = float(os.getenv('LIKE_COUNTER_FLUSH_INTERVAL', 5))
+LIKE_COUNTER_FLUSH_SIZE = int(os.getenv('LIKE_COUNTER_FLUSH_SIZE', 1000))
+
+# Готовый ответ главной страницы для анонимных пользователей: только с общим кешем (REDIS_URL),
+# иначе сброс при изменении постов не дошел бы до остальных процессов
+HOME_PAGE_SNAPSHOT_ENABLED = bool(REDIS_URL)
+# Время жизни (в секундах) готового ответа главной страницы для анонимных пользователей
+HOME_PAGE_SNAPSHOT_TIMEOUT = int(os.getenv('HOME_PAGE_SNAPSHOT_TIMEOUT', 300))
+
+# Дашборд: готовый ответ пересобирается фоново (команда refresh_dashboard, только с REDIS_URL, или первый
+# запрос после DASHBOARD_REFRESH_INTERVAL секунд), устаревший ответ отдается, пока не собран новый
+DASHBOARD_REFRESH_INTERVAL = float(os.getenv('DASHBOARD_REFRESH_INTERVAL', 60))
+# Сколько секунд ответ хранится в кеше, если его никто не пересобирает
+DASHBOARD_STALE_TIMEOUT = int(os.getenv('DASHBOARD_STALE_TIMEOUT', 86400))
+# Сколько самых популярных тегов входит в облако тегов дашборда
+DASHBOARD_TAG_CLOUD_SIZE = int(os.getenv('DASHBOARD_TAG_CLOUD_SIZE', 50))
+
+# Внешние HTTP-сервисы (ServiceRequest): общий пул keep-alive соединений процесса
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))  # сколько хостов держат пул
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))  # соединений с одним хостом
+# Таймауты (в секундах) установки соединения и чтения ответа
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+# Повторы GET-запросов при ошибках соединения и ответах 502/503/504: пауза HTTP_RETRY_BACKOFF * 2^n секунд
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.3))
+# Circuit breaker внешнего сервиса: если из последних HTTP_BREAKER_WINDOW запросов (но не меньше
+# HTTP_BREAKER_MIN_CALLS) доля ошибок и запросов дольше HTTP_BREAKER_SLOW_CALL секунд достигла
+# HTTP_BREAKER_FAILURE_RATE, запросы HTTP_BREAKER_OPEN_TIMEOUT секунд сразу завершаются ошибкой,
+# затем один пробный запрос решает, закрыть ли его снова
+HTTP_BREAKER_WINDOW = int(os.getenv('HTTP_BREAKER_WINDOW', 20))
+HTTP_BREAKER_MIN_CALLS = int(os.getenv('HTTP_BREAKER_MIN_CALLS', 10))
+HTTP_BREAKER_FAILURE_RATE = float(os.getenv('HTTP_BREAKER_FAILURE_RATE', 0.5))
+HTTP_BREAKER_SLOW_CALL = float(os.getenv('HTTP_BREAKER_SLOW_CALL', 5))
+HTTP_BREAKER_OPEN_TIMEOUT = float(os.getenv('HTTP_BREAKER_OPEN_TIMEOUT', 30))
+# Асинхронные запросы к внешним сервисам в представлениях (включается в asgi.py)
+ASYNC_EXTERNAL_CALLS = os.getenv('ASYNC_EXTERNAL_CALLS', 'False') == 'True'
+
 # CountryLayer API settings
 COUNTRY_LAYER_BASE_URL = os.getenv('COUNTRY_LAYER_BASE_URL')
 COUNTRY_LAYER_API_KEY = os.getenv('COUNTRY_LAYER_API_KEY')
+# Сколько секунд хранится найденная страна и ответ "страна не найдена"
+COUNTRY_LAYER_CACHE_TIMEOUT = int(os.getenv('COUNTRY_LAYER_CACHE_TIMEOUT', 7 * 24 * 3600))
+COUNTRY_LAYER_NEGATIVE_CACHE_TIMEOUT = int(os.getenv('COUNTRY_LAYER_NEGATIVE_CACHE_TIMEOUT', 3600))
 
 assert COUNTRY_LAYER_BASE_URL
 assert COUNTRY_LAYER_API_KEY